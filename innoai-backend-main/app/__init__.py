@@ -5,7 +5,6 @@ from app.extensions import db, cors, cache, bcrypt, limiter, csrf, login_manager
 from flask_wtf.csrf import CSRFError
 from app.repositories.chroma_repository import ChromaRepository
 from app.repositories.mongo_repository import MongoRepository
-from app.services.ingestion_service import IngestionService
 
 def create_app(config_name):
     load_dotenv()
@@ -39,10 +38,6 @@ def create_app(config_name):
     mongo_repo = MongoRepository()
     app.config['MONGO_REPO'] = mongo_repo
 
-    ingestion_service = IngestionService()
-    ingestion_service.visualize_embeddings_with_tensorboard(collection_name="vehicle_collection",
-                                                            log_dir="tensorboard_logs")
-
     print(f"ChromaDB data is stored in: {chroma_repo.get_local_storage_path()}")
 
     from app.routes.auth import auth_bp
@@ -52,6 +47,8 @@ def create_app(config_name):
     from app.routes.api.chatbot import chatbot_bp
     from app.routes.api.chat_history import chat_history_bp
     from app.routes.api.chatroom import chatroom_bp  # Import the chatroom blueprint
+    from app.routes.api.health import health_bp, warmup_service
+    from app.routes.api import chatbot, ingestion
 
     app.register_blueprint(auth_bp)
     app.register_blueprint(api_bp)
@@ -61,6 +58,22 @@ def create_app(config_name):
     app.register_blueprint(chatbot_bp)
     app.register_blueprint(chat_history_bp)
     app.register_blueprint(chatroom_bp)  # Register the chatroom blueprint
+    app.register_blueprint(health_bp)
+
+    if os.getenv("TENSORBOARD_ON_STARTUP", "False") == "True":
+        # Opt-in: exports up to TENSORBOARD_MAX_RECORDS embeddings and needs TensorFlow.
+        try:
+            ingestion.ingestion_service.visualize_embeddings_with_tensorboard(
+                collection_name=os.getenv("TENSORBOARD_COLLECTION", "vehicle_collection"),
+                log_dir="tensorboard_logs"
+            )
+        except Exception as e:
+            app.logger.error(f"TensorBoard export failed: {e}")
+
+    # Warm the services that serve traffic; /health/ready reports 503 until this finishes.
+    warmup_service.start([chatbot.ingestion_service, ingestion.ingestion_service])
+    # Pick up queued and orphaned ingestion jobs in the background.
+    ingestion.ingestion_job_service.start()
 
     app.before_request(lambda: limiter.check())
 
@@ -1,15 +1,28 @@
 import logging
 import os
+import threading
+import numpy as np
 from chromadb import PersistentClient
 from chromadb.config import Settings
 
+RECORD_FIELDS = {"documents": "document", "metadatas": "metadata", "embeddings": "embedding"}
+
 
 class ChromaRepository:
-    def __init__(self, collection_name="vehicle_collection", embedding_dim=768):
+    # Clients and collection handles are shared by every repository in the process.
+    # Both caches are keyed by storage path and guarded by a single re-entrant lock
+    # so the threaded Flask server never builds the same client twice.
+    _pool_lock = threading.RLock()
+    _clients = {}
+    _collections = {}
+
+    def __init__(self, collection_name="vehicle_collection", embedding_dim=768, create=True):
         self.logger = logging.getLogger("ChromaRepository")
         self.use_local = os.getenv("USE_LOCAL_CHROMA_DB", "True") == "True"
         self.collection_name = collection_name
         self.embedding_dim = embedding_dim
+        self.create = create
+        self.upsert_batch_size = int(os.getenv("CHROMA_UPSERT_BATCH_SIZE", "256"))
 
         if self.use_local:
             self.chroma_storage_path = os.getenv("LOCAL_CHROMA_DB_PATH", "chroma_storage")
@@ -19,54 +32,104 @@ class ChromaRepository:
             chroma_db_path = os.getenv("CHROMA_DB_PATH")
             self.chroma_storage_path = f"http://{chroma_db_ip}:{chroma_db_port}{chroma_db_path}"
 
+        self.client = None
         self._initialize_client()
-        self.collection = None
         self._ensure_collection_exists()
 
+    @classmethod
+    def clear_pool(cls):
+        """Drop every pooled client and collection handle, e.g. between benchmark runs."""
+        with cls._pool_lock:
+            cls._collections.clear()
+            cls._clients.clear()
+
+    @property
+    def collection(self):
+        if not self.client:
+            return None
+        return self._get_collection(self.collection_name)
+
     def _initialize_client(self):
-        try:
-            if self.use_local:
-                if not os.path.exists(self.chroma_storage_path):
-                    os.makedirs(self.chroma_storage_path)
-                self.client = PersistentClient(
-                    path=self.chroma_storage_path,
-                    settings=Settings()
-                )
-                self.logger.info(f"ChromaDB client initialized with path: {self.chroma_storage_path}")
-            else:
-                self.logger.error("Remote ChromaDB initialization not implemented.")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize ChromaDB client: {str(e)}")
-            self.client = None
+        with self._pool_lock:
+            self.client = self._clients.get(self.chroma_storage_path)
+            if self.client is not None:
+                return
+            try:
+                if self.use_local:
+                    if not os.path.exists(self.chroma_storage_path):
+                        os.makedirs(self.chroma_storage_path)
+                    self.client = PersistentClient(
+                        path=self.chroma_storage_path,
+                        settings=Settings()
+                    )
+                    self._clients[self.chroma_storage_path] = self.client
+                    self.logger.info(f"ChromaDB client initialized with path: {self.chroma_storage_path}")
+                else:
+                    self.logger.error("Remote ChromaDB initialization not implemented.")
+            except Exception as e:
+                self.logger.error(f"Failed to initialize ChromaDB client: {str(e)}")
+                self.client = None
 
     def _ensure_collection_exists(self):
         if not self.client:
             self.logger.error("ChromaDB client is not initialized.")
             return
-        try:
-            self.collection = self.client.get_collection(self.collection_name)
-            self.logger.info(f"Collection '{self.collection_name}' retrieved successfully")
-        except Exception as e:
-            self.logger.info(f"Collection '{self.collection_name}' does not exist. Creating new collection.")
-            self._create_collection()
+        self._get_collection(self.collection_name)
+
+    def _get_collection(self, collection_name):
+        key = (self.chroma_storage_path, collection_name)
+        collection = self._collections.get(key)
+        if collection is not None:
+            return collection
+        with self._pool_lock:
+            collection = self._collections.get(key)
+            if collection is not None:
+                return collection
+            try:
+                collection = self.client.get_collection(collection_name)
+                self.logger.info(f"Collection '{collection_name}' retrieved successfully")
+            except Exception as e:
+                if not self.create:
+                    self.logger.warning(f"Collection '{collection_name}' does not exist")
+                    return None
+                self.logger.info(f"Collection '{collection_name}' does not exist. Creating new collection.")
+                collection = self._create_collection(collection_name)
+            if collection is not None:
+                self._collections[key] = collection
+            return collection
+
+    def exists(self):
+        return self.collection is not None
 
-    def _create_collection(self):
+    def _create_collection(self, collection_name):
         try:
-            self.collection = self.client.create_collection(
-                name=self.collection_name
+            collection = self.client.create_collection(
+                name=collection_name
             )
-            self.logger.info(f"Created collection '{self.collection_name}'")
+            self.logger.info(f"Created collection '{collection_name}'")
+            return collection
         except Exception as e:
-            self.collection = None
-            self.logger.error(f"Failed to create collection '{self.collection_name}': {e}")
+            self.logger.error(f"Failed to create collection '{collection_name}': {e}")
+            return None
+
+    def _invalidate_collection(self, collection_name=None):
+        with self._pool_lock:
+            if collection_name is not None:
+                self._collections.pop((self.chroma_storage_path, collection_name), None)
+                return
+            for key in [key for key in self._collections if key[0] == self.chroma_storage_path]:
+                del self._collections[key]
 
-    def delete_collection(self, collection_name):
+    def delete_collection(self, collection_name=None):
+        collection_name = collection_name or self.collection_name
         if not self.client:
             self.logger.error("ChromaDB client is not initialized.")
             return
         try:
             self.logger.info(f"Attempting to delete collection '{collection_name}'")
-            self.client.delete_collection(name=collection_name)
+            with self._pool_lock:
+                self.client.delete_collection(name=collection_name)
+                self._invalidate_collection(collection_name)
             self.logger.info(f"Successfully deleted collection '{collection_name}'")
         except Exception as e:
             self.logger.error(f"Could not delete collection '{collection_name}': {e}")
@@ -77,48 +140,207 @@ class ChromaRepository:
             return
         try:
             self.logger.info(f"Attempting to delete all collections")
-            collections = self.client.list_collections()
-            for collection in collections:
-                self.client.delete_collection(name=collection['name'])
-                self.logger.info(f"Successfully deleted collection '{collection['name']}'")
+            with self._pool_lock:
+                try:
+                    collections = self.client.list_collections()
+                    for collection in collections:
+                        self.client.delete_collection(name=collection.name)
+                        self.logger.info(f"Successfully deleted collection '{collection.name}'")
+                finally:
+                    self._invalidate_collection()
             self.logger.info(f"All collections deleted successfully")
         except Exception as e:
             self.logger.error(f"Could not delete all collections: {e}")
 
+    def get_max_batch_size(self):
+        batch_size = self.upsert_batch_size
+        try:
+            batch_size = min(batch_size, self.client.max_batch_size)
+        except Exception:
+            pass
+        return max(batch_size, 1)
+
     def upsert_data(self, documents, embeddings, ids, metadata):
-        if not self.collection:
+        collection = self.collection
+        if not collection:
             self.logger.error("Collection is not initialized.")
             return
         try:
-            self.collection.add(
-                ids=ids,
-                embeddings=embeddings,
-                metadatas=metadata,
-                documents=documents
-            )
-            self.logger.info(f"Data upserted successfully: {documents}, with IDs: {ids} and metadata: {metadata}")
+            batch_size = self.get_max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                end = start + batch_size
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadata[start:end],
+                    documents=documents[start:end]
+                )
+            self.logger.info(f"Data upserted successfully: {len(ids)} records in batches of {batch_size}")
+            self.logger.debug(f"Upserted IDs: {ids}")
         except Exception as e:
             self.logger.error(f"An error occurred while upserting data: {e}")
+            raise
 
-    def query_data(self, query_embedding, n_results=5):
-        if not self.collection:
+    def upsert_stream(self, batches):
+        """Write an iterable of (documents, embeddings, ids, metadata) batches as they become ready."""
+        total = 0
+        for documents, embeddings, ids, metadata in batches:
+            self.upsert_data(documents, embeddings, ids, metadata)
+            total += len(ids)
+        return total
+
+    def update_metadata(self, ids, metadata):
+        """Replace the metadata of stored records without touching their documents or embeddings."""
+        collection = self.collection
+        if not collection:
+            self.logger.error("Collection is not initialized.")
+            return
+        if not ids:
+            return
+        try:
+            batch_size = self.get_max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                collection.update(ids=ids[start:start + batch_size], metadatas=metadata[start:start + batch_size])
+            self.logger.info(f"Updated metadata of {len(ids)} records in '{self.collection_name}'")
+        except Exception as e:
+            self.logger.error(f"An error occurred while updating metadata: {e}")
+            raise
+
+    def get_existing_ids(self, ids):
+        collection = self.collection
+        if not collection or not ids:
+            return set()
+        existing = set()
+        batch_size = self.get_max_batch_size()
+        for start in range(0, len(ids), batch_size):
+            result = collection.get(ids=ids[start:start + batch_size], include=[])
+            existing.update(result["ids"])
+        return existing
+
+    def get_records(self, ids, include=None, where=None, where_document=None):
+        """Fetch records by id as {id: {"document", "metadata"}}; unknown or filtered-out ids are left out."""
+        collection = self.collection
+        if not collection or not ids:
+            return {}
+        if include is None:
+            include = ["documents", "metadatas"]
+        records = {}
+        batch_size = self.get_max_batch_size()
+        for start in range(0, len(ids), batch_size):
+            result = collection.get(
+                ids=ids[start:start + batch_size], where=where, where_document=where_document, include=include
+            )
+            for index, record_id in enumerate(result["ids"]):
+                records[record_id] = {
+                    "document": result["documents"][index] if result.get("documents") else None,
+                    "metadata": result["metadatas"][index] if result.get("metadatas") else None,
+                }
+        return records
+
+    def delete_data(self, ids):
+        collection = self.collection
+        if not collection:
+            self.logger.error("Collection is not initialized.")
+            return
+        if not ids:
+            return
+        try:
+            batch_size = self.get_max_batch_size()
+            for start in range(0, len(ids), batch_size):
+                collection.delete(ids=ids[start:start + batch_size])
+            self.logger.info(f"Deleted {len(ids)} records from '{self.collection_name}'")
+        except Exception as e:
+            self.logger.error(f"An error occurred while deleting data: {e}")
+            raise
+
+    def query_data(self, query_embedding, n_results=5, include=None, where=None, where_document=None):
+        collection = self.collection
+        if not collection:
             self.logger.error("Collection is not initialized.")
             return None
+        if include is None:
+            include = ["metadatas", "documents", "distances"]
         try:
-            results = self.collection.query(query_embeddings=[query_embedding], n_results=n_results)
+            results = collection.query(
+                query_embeddings=[query_embedding],
+                n_results=n_results,
+                where=where,
+                where_document=where_document,
+                include=include
+            )
             self.logger.info(f"Query results: {results}")
             return results
         except Exception as e:
             self.logger.error(f"An error occurred while querying data: {e}")
             return None
 
-    def get_all_data(self):
-        if not self.collection:
+    def query_data_batch(self, query_embeddings, n_results=5, where=None, where_document=None, include=None):
+        collection = self.collection
+        if not collection:
             self.logger.error("Collection is not initialized.")
             return None
+        if include is None:
+            include = ["metadatas", "documents", "distances"]
+        try:
+            results = collection.query(
+                query_embeddings=query_embeddings,
+                n_results=n_results,
+                where=where,
+                where_document=where_document,
+                include=include
+            )
+            self.logger.info(f"Batch query returned results for {len(query_embeddings)} embeddings")
+            return results
+        except Exception as e:
+            self.logger.error(f"An error occurred while batch querying data: {e}")
+            return None
+
+    def iter_records(self, include=None, page_size=1000, where=None, where_document=None):
+        """
+        Yield every record of the collection as {"id", "document", "metadata"[, "embedding"]}.
+
+        Pages are read with collection.get(limit, offset) and only the included fields are
+        loaded, so memory stays bounded by one page whatever the collection size.
+        """
+        collection = self.collection
+        if not collection:
+            self.logger.error("Collection is not initialized.")
+            return
+        include = list(include if include is not None else ["documents", "metadatas"])
+        offset = 0
+        while True:
+            page = collection.get(
+                limit=page_size, offset=offset, where=where, where_document=where_document, include=include
+            )
+            ids = page["ids"]
+            for index, record_id in enumerate(ids):
+                record = {"id": record_id}
+                for field in include:
+                    value = page[field][index]
+                    if field == "embeddings":
+                        value = np.asarray(value, dtype=float).tolist()
+                    record[RECORD_FIELDS[field]] = value
+                yield record
+            if len(ids) < page_size:
+                return
+            offset += len(ids)
+
+    def count(self):
+        collection = self.collection
+        return collection.count() if collection else 0
+
+    def export_snapshot(self, snapshot_repo, page_size=1000):
+        """Publish every record with its embedding to a VectorSnapshotRepository."""
+        collection = self.collection
+        if not collection:
+            raise ValueError("Collection is not initialized.")
+        records = self.iter_records(include=["documents", "metadatas", "embeddings"], page_size=page_size)
+        return snapshot_repo.publish(collection.count(), records)
+
+    def get_all_data(self, include=None):
         try:
-            all_data = self.collection.query(query_texts=["*"], n_results=1000)
-            self.logger.info(f"All data in the collection: {all_data}")
+            all_data = list(self.iter_records(include=include))
+            self.logger.info(f"Retrieved {len(all_data)} records from '{self.collection_name}'")
             return {"results": all_data}
         except Exception as e:
             self.logger.error(f"An error occurred while retrieving all data: {e}")
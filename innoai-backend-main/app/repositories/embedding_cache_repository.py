@@ -0,0 +1,140 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+class EmbeddingCacheRepository:
+    """
+    Disk-backed embedding cache stored in SQLite.
+
+    Vectors are stored as raw float16 (default) or float32 blobs keyed by a caller-supplied
+    hash, with their dimension and dtype kept per row so a file written with another
+    `EMBEDDING_CACHE_DTYPE` still decodes; a blob whose size does not match is a miss.
+    Every read refreshes `last_access`; once the table grows past `max_entries` the
+    least recently used rows are evicted. WAL mode lets several worker processes share
+    the same file.
+    """
+
+    EVICTION_SLACK = 0.05
+
+    def __init__(self, cache_path=None, max_entries=None, dtype=None):
+        self.logger = logging.getLogger("EmbeddingCacheRepository")
+        self.cache_path = cache_path or os.getenv("EMBEDDING_CACHE_PATH", os.path.join("embedding_cache", "embeddings.sqlite3"))
+        self.max_entries = int(max_entries or os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "500000"))
+        self.dtype = np.dtype(dtype or os.getenv("EMBEDDING_CACHE_DTYPE", "float16"))
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        cache_dir = os.path.dirname(self.cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self._conn = sqlite3.connect(self.cache_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, dim INTEGER NOT NULL, dtype TEXT, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+        if "dtype" not in columns:
+            # Files written before the dtype column keep NULL and are decoded from the blob size.
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN dtype TEXT")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+        self._entries = self._count()
+        self.logger.info(f"Embedding cache opened at {self.cache_path} with {self._entries} entries")
+
+    def _count(self):
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def _decode(dim, dtype, blob):
+        if dtype is None:
+            dtype = {2: "float16", 4: "float32"}.get(len(blob) // dim if dim else 0)
+            if dtype is None:
+                return None
+        dtype = np.dtype(dtype)
+        if len(blob) != dim * dtype.itemsize:
+            return None
+        return np.frombuffer(blob, dtype=dtype).astype(np.float32)
+
+    def get_many(self, keys):
+        """Return {key: float32 vector} for the keys present in the cache."""
+        if not keys:
+            return {}
+        found = {}
+        now = time.time()
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, dim, dtype, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+                ).fetchall()
+                for key, dim, dtype, vector in rows:
+                    decoded = self._decode(dim, dtype, vector)
+                    if decoded is None:
+                        self.logger.warning(f"Ignoring cached embedding {key} with a {len(vector)}-byte blob for {dim} {dtype}")
+                        continue
+                    found[key] = decoded
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in found]
+                )
+                self._conn.commit()
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, items):
+        """Store an iterable of (key, vector) pairs and evict the oldest rows if over capacity."""
+        now = time.time()
+        rows = [
+            (key, int(np.shape(vector)[-1]), self.dtype.name, np.asarray(vector, dtype=self.dtype).tobytes(), now)
+            for key, vector in items
+        ]
+        if not rows:
+            return
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, dtype, vector, last_access) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._entries += self._conn.total_changes - before
+            if self._entries > self.max_entries:
+                self._evict()
+
+    def _evict(self):
+        self._entries = self._count()
+        overflow = self._entries - self.max_entries
+        if overflow <= 0:
+            return
+        # Evict a little more than needed so we do not run eviction on every insert.
+        to_delete = overflow + int(self.max_entries * self.EVICTION_SLACK)
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN (SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+            (to_delete,)
+        )
+        self._conn.commit()
+        self._entries = self._count()
+        self.logger.info(f"Evicted {to_delete} least recently used embeddings")
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "dtype": self.dtype.name,
+            }
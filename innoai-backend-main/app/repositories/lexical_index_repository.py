@@ -0,0 +1,265 @@
+import fcntl
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    # Stored chunks are cleaned with NON_WORD_PATTERN, so part numbers like "AB-1234"
+    # are indexed as "ab" "1234"; queries are split the same way.
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class LexicalIndex:
+    """Immutable view of one index generation; arrays are memory-mapped from disk."""
+
+    def __init__(self, terms, doc_ids, offsets, docs, tfs, doc_lengths):
+        self.terms = terms
+        self.doc_ids = doc_ids
+        self.offsets = offsets
+        self.docs = docs
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.avgdl = float(np.mean(doc_lengths)) if len(doc_lengths) else 0.0
+
+    @classmethod
+    def empty(cls):
+        return cls({}, [], np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32),
+                   np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.float32))
+
+
+class LexicalIndexRepository:
+    """
+    BM25 inverted index kept next to a Chroma collection.
+
+    Postings are stored term-major in flat numpy arrays (CSR layout) and opened with
+    mmap_mode="r", so loading is cheap and a query only reads the postings of its own
+    terms. Each commit writes a new generation directory and switches the CURRENT
+    pointer with os.replace, so readers never see a half-written index; the previous
+    generation is kept for readers that have not switched yet. Commits take a file lock
+    and merge the staged changes into the latest generation on disk, so workers and
+    services sharing the directory do not overwrite each other's additions, and searches
+    pick up their commits on the next refresh check.
+    """
+
+    ARRAYS = ("offsets", "docs", "tfs", "doc_lengths")
+
+    def __init__(self, collection_name, index_path=None):
+        self.logger = logging.getLogger("LexicalIndexRepository")
+        self.collection_name = collection_name
+        self.base_path = index_path or os.getenv("LEXICAL_INDEX_PATH", "lexical_index")
+        self.index_path = os.path.join(self.base_path, collection_name)
+        self.k1 = float(os.getenv("BM25_K1", "1.5"))
+        self.b = float(os.getenv("BM25_B", "0.75"))
+        self.refresh_seconds = float(os.getenv("LEXICAL_INDEX_REFRESH_SECONDS", "5"))
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._removed = set()
+        self._generation = self._read_pointer()
+        self._index = self._load(self._generation)
+        self._checked_at = time.monotonic()
+
+    def __len__(self):
+        return len(self.current().doc_ids)
+
+    def _read_pointer(self):
+        try:
+            with open(os.path.join(self.index_path, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _load(self, generation):
+        if generation is None:
+            return LexicalIndex.empty()
+        try:
+            generation_path = os.path.join(self.index_path, generation)
+            with open(os.path.join(generation_path, "terms.json"), "r", encoding="utf-8") as f:
+                terms = json.load(f)
+            with open(os.path.join(generation_path, "doc_ids.json"), "r", encoding="utf-8") as f:
+                doc_ids = json.load(f)
+            arrays = {name: np.load(os.path.join(generation_path, f"{name}.npy"), mmap_mode="r") for name in self.ARRAYS}
+            self.logger.info(f"Loaded lexical index '{self.collection_name}' with {len(doc_ids)} documents")
+            return LexicalIndex(terms, doc_ids, **arrays)
+        except Exception as e:
+            self.logger.error(f"Could not load lexical index '{self.index_path}', starting empty: {e}")
+            return LexicalIndex.empty()
+
+    def current(self):
+        """Return the active index, switching to a newer generation committed by another worker."""
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_seconds:
+            return self._index
+        with self._lock:
+            self._checked_at = now
+            generation = self._read_pointer()
+            if generation != self._generation:
+                self._generation = generation
+                self._index = self._load(generation)
+            return self._index
+
+    @contextmanager
+    def _file_lock(self):
+        """Serialize writers across processes sharing the index directory."""
+        os.makedirs(self.index_path, exist_ok=True)
+        with open(os.path.join(self.index_path, "LOCK"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def add(self, ids, documents):
+        """Stage documents for the next commit; an existing id is replaced."""
+        counts = [Counter(tokenize(document)) for document in documents]
+        with self._lock:
+            for record_id, terms in zip(ids, counts):
+                self._pending[record_id] = terms
+                self._removed.discard(record_id)
+
+    def remove(self, ids):
+        with self._lock:
+            for record_id in ids:
+                self._pending.pop(record_id, None)
+                self._removed.add(record_id)
+
+    def commit(self):
+        """Merge staged changes into the latest on-disk generation and swap the result in."""
+        with self._lock, self._file_lock():
+            if not self._pending and not self._removed:
+                return
+            latest = self._read_pointer()
+            index = self._index if latest == self._generation else self._load(latest)
+            self._swap(self._build(index, self._pending, self._removed), latest)
+
+    def rebuild(self, batches):
+        """Replace the index with the (ids, documents) batches, e.g. read back from Chroma."""
+        pending = {}
+        for ids, documents in batches:
+            for record_id, document in zip(ids, documents):
+                pending[record_id] = Counter(tokenize(document))
+        with self._lock, self._file_lock():
+            self._swap(self._build(LexicalIndex.empty(), pending, set()), self._read_pointer())
+
+    def _swap(self, index, previous):
+        generation = self._write(index, previous)
+        self._pending = {}
+        self._removed = set()
+        self._generation = generation
+        self._index = self._load(generation)
+        self._checked_at = time.monotonic()
+
+    def _build(self, index, pending, removed):
+        replaced = removed.union(pending)
+        keep = np.fromiter((doc_id not in replaced for doc_id in index.doc_ids), dtype=bool, count=len(index.doc_ids))
+        posting_terms = np.repeat(np.arange(len(index.offsets) - 1), np.diff(index.offsets))
+        posting_keep = keep[index.docs]
+        doc_remap = np.cumsum(keep) - 1
+
+        doc_ids = [doc_id for doc_id, kept in zip(index.doc_ids, keep) if kept]
+        terms = dict(index.terms)
+        new_docs, new_terms, new_tfs, new_lengths = [], [], [], []
+        for record_id, counts in pending.items():
+            doc_no = len(doc_ids)
+            doc_ids.append(record_id)
+            new_lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                new_terms.append(terms.setdefault(term, len(terms)))
+                new_docs.append(doc_no)
+                new_tfs.append(tf)
+
+        docs = np.concatenate([doc_remap[index.docs[posting_keep]], np.asarray(new_docs, dtype=np.int64)])
+        posting_terms = np.concatenate([posting_terms[posting_keep], np.asarray(new_terms, dtype=np.int64)])
+        tfs = np.concatenate([index.tfs[posting_keep], np.asarray(new_tfs, dtype=np.float32)])
+        doc_lengths = np.concatenate([index.doc_lengths[keep], np.asarray(new_lengths, dtype=np.float32)])
+
+        # Drop terms that lost all their postings and renumber the rest.
+        frequencies = np.bincount(posting_terms, minlength=len(terms))
+        used = frequencies > 0
+        term_remap = np.cumsum(used) - 1
+        terms = {term: int(term_remap[row]) for term, row in terms.items() if used[row]}
+        posting_terms = term_remap[posting_terms]
+
+        order = np.lexsort((docs, posting_terms))
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(frequencies[used], out=offsets[1:])
+        return LexicalIndex(
+            terms, doc_ids, offsets, docs[order].astype(np.int32), tfs[order].astype(np.float32),
+            doc_lengths.astype(np.float32)
+        )
+
+    def _write(self, index, previous):
+        generation = str(time.time_ns())
+        generation_path = os.path.join(self.index_path, generation)
+        os.makedirs(generation_path)
+        for name in self.ARRAYS:
+            np.save(os.path.join(generation_path, f"{name}.npy"), getattr(index, name))
+        with open(os.path.join(generation_path, "terms.json"), "w", encoding="utf-8") as f:
+            json.dump(index.terms, f)
+        with open(os.path.join(generation_path, "doc_ids.json"), "w", encoding="utf-8") as f:
+            json.dump(index.doc_ids, f)
+        pointer = os.path.join(self.index_path, "CURRENT")
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(f"{pointer}.tmp", pointer)
+        # Keep the previous generation for workers that have read the old pointer but not opened it yet.
+        for name in os.listdir(self.index_path):
+            if name not in (generation, previous, "CURRENT", "LOCK"):
+                shutil.rmtree(os.path.join(self.index_path, name), ignore_errors=True)
+        self.logger.info(f"Wrote lexical index '{self.collection_name}' with {len(index.doc_ids)} documents")
+        return generation
+
+    def search(self, query, n_results=10):
+        """
+        Rank documents by BM25 against the query.
+
+        Parameters:
+            query (str): The query text.
+            n_results (int, optional): The maximum number of hits. Defaults to 10.
+
+        Returns:
+            list[tuple[str, float]]: (id, score) pairs, best first.
+        """
+        index = self.current()
+        total = len(index.doc_ids)
+        if not total:
+            return []
+        scores = np.zeros(total, dtype=np.float32)
+        for term in set(tokenize(query)):
+            row = index.terms.get(term)
+            if row is None:
+                continue
+            start, end = int(index.offsets[row]), int(index.offsets[row + 1])
+            docs = index.docs[start:end]
+            tfs = index.tfs[start:end]
+            idf = math.log(1 + (total - (end - start) + 0.5) / ((end - start) + 0.5))
+            norms = self.k1 * (1 - self.b + self.b * index.doc_lengths[docs] / index.avgdl)
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + norms)
+        hits = np.flatnonzero(scores)
+        if len(hits) > n_results:
+            hits = hits[np.argpartition(-scores[hits], n_results - 1)[:n_results]]
+        hits = hits[np.argsort(-scores[hits], kind="stable")]
+        return [(index.doc_ids[i], float(scores[i])) for i in hits]
+
+    def delete(self):
+        with self._lock:
+            shutil.rmtree(self.index_path, ignore_errors=True)
+            self._pending = {}
+            self._removed = set()
+            self._generation = None
+            self._index = LexicalIndex.empty()
+
+    @staticmethod
+    def delete_all(index_path=None):
+        shutil.rmtree(index_path or os.getenv("LEXICAL_INDEX_PATH", "lexical_index"), ignore_errors=True)
@@ -0,0 +1,157 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from app.utils.pca import PCAProjection
+
+
+class ManifestRepository:
+    """
+    Persistent record of what has been ingested into each collection.
+
+    One JSON file per collection maps every source document to the hash of the file
+    it was built from, the fingerprint of the ingestion settings that produced it and
+    the content-derived ids of its chunks. Files are replaced atomically so a crash
+    mid-write never leaves a truncated manifest behind, and updates hold a per-collection
+    file lock so workers sharing the directory do not drop each other's sources.
+    """
+
+    def __init__(self, manifest_path=None):
+        self.logger = logging.getLogger("ManifestRepository")
+        self.manifest_path = manifest_path or os.getenv("INGEST_MANIFEST_PATH", "ingest_manifests")
+        self._lock = threading.Lock()
+        self._projections = {}
+        os.makedirs(self.manifest_path, exist_ok=True)
+
+    def _file_path(self, collection_name):
+        return os.path.join(self.manifest_path, f"{collection_name}.json")
+
+    def _load(self, collection_name):
+        file_path = self._file_path(collection_name)
+        if not os.path.exists(file_path):
+            return {"sources": {}}
+        try:
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            self.logger.error(f"Could not read manifest '{file_path}', starting empty: {e}")
+            return {"sources": {}}
+
+    @contextmanager
+    def _file_lock(self, collection_name):
+        """Serialize read-merge-replace cycles on a collection's manifest across processes."""
+        with open(os.path.join(self.manifest_path, f"{collection_name}.lock"), "w") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _save(self, collection_name, manifest):
+        file_path = self._file_path(collection_name)
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, file_path)
+
+    def get_source(self, collection_name, source):
+        with self._lock:
+            return self._load(collection_name)["sources"].get(source)
+
+    def update_sources(self, collection_name, entries, fingerprint=None):
+        """Record {source: (file_hash, chunk_ids)} ingested with `fingerprint` for a collection in a single write."""
+        if not entries:
+            return
+        now = datetime.now().isoformat()
+        with self._lock, self._file_lock(collection_name):
+            manifest = self._load(collection_name)
+            for source, (file_hash, chunk_ids) in entries.items():
+                manifest["sources"][source] = {
+                    "file_hash": file_hash,
+                    "fingerprint": fingerprint,
+                    "chunk_ids": list(chunk_ids),
+                    "updated_at": now,
+                }
+            self._save(collection_name, manifest)
+
+    def update_source(self, collection_name, source, file_hash, chunk_ids, fingerprint=None):
+        self.update_sources(collection_name, {source: (file_hash, chunk_ids)}, fingerprint)
+
+    def _version_path(self, collection_name):
+        return os.path.join(self.manifest_path, f"{collection_name}.version")
+
+    def get_version(self, collection_name):
+        """Return an opaque token that changes whenever the collection's content changes."""
+        try:
+            with open(self._version_path(collection_name), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return "0"
+
+    def bump_version(self, collection_name):
+        version_path = self._version_path(collection_name)
+        tmp_path = f"{version_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(str(time.time_ns()))
+        os.replace(tmp_path, version_path)
+
+    def _projection_path(self, collection_name):
+        return os.path.join(self.manifest_path, f"{collection_name}.pca.npz")
+
+    def get_projection(self, collection_name):
+        """Return the collection's PCAProjection, or None when it stores full-size embeddings."""
+        projection_path = self._projection_path(collection_name)
+        try:
+            mtime = os.stat(projection_path).st_mtime_ns
+        except FileNotFoundError:
+            self._projections.pop(collection_name, None)
+            return None
+        cached = self._projections.get(collection_name)
+        if cached is None or cached[0] != mtime:
+            cached = (mtime, PCAProjection.load(projection_path))
+            self._projections[collection_name] = cached
+        return cached[1]
+
+    def save_projection(self, collection_name, projection):
+        """
+        Store a projection unless the collection already has one, and return the stored one.
+
+        Two ingestions into the same empty collection may both fit a projection; linking the
+        file into place fails for the second, which then adopts the first one's projection.
+        """
+        projection_path = self._projection_path(collection_name)
+        tmp_path = f"{projection_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            projection.save(f)
+        try:
+            os.link(tmp_path, projection_path)
+        except FileExistsError:
+            self.logger.info(f"Collection '{collection_name}' already has a PCA projection, keeping it")
+        finally:
+            os.remove(tmp_path)
+        return self.get_projection(collection_name)
+
+    def delete_collection(self, collection_name):
+        with self._lock, self._file_lock(collection_name):
+            file_path = self._file_path(collection_name)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            projection_path = self._projection_path(collection_name)
+            if os.path.exists(projection_path):
+                os.remove(projection_path)
+            self._projections.pop(collection_name, None)
+            self.bump_version(collection_name)
+
+    def delete_all(self):
+        with self._lock:
+            for filename in os.listdir(self.manifest_path):
+                if filename.endswith((".json", ".pca.npz")):
+                    os.remove(os.path.join(self.manifest_path, filename))
+                elif filename.endswith(".version"):
+                    self.bump_version(filename[:-len(".version")])
+            self._projections.clear()
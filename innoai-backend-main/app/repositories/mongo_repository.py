@@ -1,5 +1,5 @@
 import logging
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 import os
 from dotenv import load_dotenv
 from uuid import uuid4
@@ -17,6 +17,7 @@ class MongoRepository:
         self.db = self.client.innoai
         self.chatroom_collection = self.db.chatroom
         self.chat_history_collection = self.db.chathistory
+        self.ingestion_job_collection = self.db.ingestion_jobs
 
     def save_chat_history(self, user_id, chat_history):
         self.logger.debug(f"Saving chat history for user_id: {user_id}")
@@ -67,3 +68,52 @@ class MongoRepository:
             {"$push": {"messages": new_message}}
         )
         return result.modified_count > 0
+
+    def create_ingestion_job(self, job_type, params):
+        self.logger.debug(f"Creating ingestion job of type: {job_type}")
+        now = datetime.utcnow().isoformat()
+        job_id = str(uuid4())
+        record = {
+            "job_id": job_id,
+            "type": job_type,
+            "params": params,
+            "status": "queued",
+            "progress": {},
+            "result": None,
+            "error": None,
+            "createdDate": now,
+            "updatedDate": now
+        }
+        self.ingestion_job_collection.insert_one(record)
+        return job_id
+
+    def get_ingestion_job(self, job_id):
+        self.logger.debug(f"Retrieving ingestion job: {job_id}")
+        return self.ingestion_job_collection.find_one({"job_id": job_id}, {"_id": 0})
+
+    def claim_ingestion_job(self, job_id):
+        self.logger.debug(f"Claiming ingestion job: {job_id}")
+        job = self.ingestion_job_collection.find_one_and_update(
+            {"job_id": job_id, "status": "queued"},
+            {"$set": {"status": "running", "updatedDate": datetime.utcnow().isoformat()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if job:
+            job.pop("_id", None)
+        return job
+
+    def update_ingestion_job(self, job_id, **fields):
+        fields["updatedDate"] = datetime.utcnow().isoformat()
+        result = self.ingestion_job_collection.update_one({"job_id": job_id}, {"$set": fields})
+        return result.modified_count > 0
+
+    def requeue_stale_ingestion_jobs(self, stale_before):
+        self.logger.debug(f"Requeueing ingestion jobs running since before: {stale_before}")
+        result = self.ingestion_job_collection.update_many(
+            {"status": "running", "updatedDate": {"$lt": stale_before}},
+            {"$set": {"status": "queued", "updatedDate": datetime.utcnow().isoformat()}}
+        )
+        return result.modified_count
+
+    def get_queued_ingestion_jobs(self):
+        return list(self.ingestion_job_collection.find({"status": "queued"}, {"_id": 0}).sort("createdDate", 1))
@@ -0,0 +1,168 @@
+import hashlib
+import heapq
+import itertools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.repositories.chroma_repository import ChromaRepository
+
+QUERY_FIELDS = {"documents", "metadatas", "embeddings"}
+
+
+def shard_collection_names(collection_name, shards):
+    return [f"{collection_name}__shard{index}" for index in range(shards)]
+
+
+class ShardedChromaRepository:
+    """
+    ChromaRepository look-alike spread over several physical collections.
+
+    Writes are routed by a hash of the record id, and ids are derived from the chunk
+    content hash, so a chunk always lands on the same shard. Reads fan out over a thread
+    pool and queries are merged k-way by distance. The same fan-out also serves searches
+    over several logical collections: pass their repositories as the shards, and a shared
+    executor so that building one per request does not start new threads.
+    """
+
+    def __init__(self, collection_name, shards, executor=None):
+        self.logger = logging.getLogger("ShardedChromaRepository")
+        self.collection_name = collection_name
+        self.shards = list(shards)
+        self.executor = executor or ThreadPoolExecutor(max_workers=len(self.shards), thread_name_prefix="chroma-fanout")
+
+    @classmethod
+    def create(cls, collection_name, shards, embedding_dim=768, create=True):
+        repositories = [
+            ChromaRepository(collection_name=name, embedding_dim=embedding_dim, create=create)
+            for name in shard_collection_names(collection_name, shards)
+        ]
+        return cls(collection_name, repositories)
+
+    def shard_for(self, record_id):
+        digest = hashlib.sha1(record_id.encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % len(self.shards)
+
+    def _route(self, ids):
+        groups = {}
+        for position, record_id in enumerate(ids):
+            groups.setdefault(self.shard_for(record_id), []).append(position)
+        return groups
+
+    def _fan_out(self, call):
+        return list(self.executor.map(call, self.shards))
+
+    def exists(self):
+        return all(shard.exists() for shard in self.shards)
+
+    def get_max_batch_size(self):
+        return min(shard.get_max_batch_size() for shard in self.shards)
+
+    def upsert_data(self, documents, embeddings, ids, metadata):
+        embeddings = np.asarray(embeddings)
+        futures = [
+            self.executor.submit(
+                self.shards[shard].upsert_data,
+                [documents[i] for i in positions],
+                embeddings[positions],
+                [ids[i] for i in positions],
+                [metadata[i] for i in positions],
+            )
+            for shard, positions in self._route(ids).items()
+        ]
+        for future in futures:
+            future.result()
+
+    def upsert_stream(self, batches):
+        """Write an iterable of (documents, embeddings, ids, metadata) batches as they become ready."""
+        total = 0
+        for documents, embeddings, ids, metadata in batches:
+            self.upsert_data(documents, embeddings, ids, metadata)
+            total += len(ids)
+        return total
+
+    def get_existing_ids(self, ids):
+        existing = set()
+        for shard, positions in self._route(ids).items():
+            existing.update(self.shards[shard].get_existing_ids([ids[i] for i in positions]))
+        return existing
+
+    def get_records(self, ids, include=None, where=None, where_document=None):
+        records = {}
+        for result in self._fan_out(lambda shard: shard.get_records(ids, include, where, where_document)):
+            records.update(result)
+        return records
+
+    def update_metadata(self, ids, metadata):
+        for shard, positions in self._route(ids).items():
+            self.shards[shard].update_metadata([ids[i] for i in positions], [metadata[i] for i in positions])
+
+    def delete_data(self, ids):
+        for shard, positions in self._route(ids).items():
+            self.shards[shard].delete_data([ids[i] for i in positions])
+
+    def _merge(self, responses, n_results, include):
+        responses = [response for response in responses if response and response.get("ids")]
+        fields = [field for field in include if field in QUERY_FIELDS]
+        merged = {"ids": [], "distances": [], **{field: [] for field in fields}}
+        if not responses:
+            return merged
+        for row in range(len(responses[0]["ids"])):
+            # Each shard returns its hits sorted by distance, so a k-way merge yields the global order.
+            streams = [
+                [(distance, shard, index) for index, distance in enumerate(response["distances"][row])]
+                for shard, response in enumerate(responses)
+            ]
+            top = list(itertools.islice(heapq.merge(*streams), n_results))
+            merged["ids"].append([responses[shard]["ids"][row][index] for _, shard, index in top])
+            merged["distances"].append([distance for distance, _, _ in top])
+            for field in fields:
+                merged[field].append([responses[shard][field][row][index] for _, shard, index in top])
+        return merged
+
+    def query_data(self, query_embedding, n_results=5, include=None, where=None, where_document=None):
+        include = list(dict.fromkeys((include or ["metadatas", "documents"]) + ["distances"]))
+        responses = self._fan_out(
+            lambda shard: shard.query_data(query_embedding, n_results, include, where, where_document)
+        )
+        if all(response is None for response in responses):
+            return None
+        return self._merge(responses, n_results, include)
+
+    def query_data_batch(self, query_embeddings, n_results=5, where=None, where_document=None, include=None):
+        include = list(dict.fromkeys((include or ["metadatas", "documents"]) + ["distances"]))
+        responses = self._fan_out(
+            lambda shard: shard.query_data_batch(query_embeddings, n_results, where, where_document, include)
+        )
+        if all(response is None for response in responses):
+            return None
+        return self._merge(responses, n_results, include)
+
+    def iter_records(self, include=None, page_size=1000, where=None, where_document=None):
+        for shard in self.shards:
+            yield from shard.iter_records(include, page_size, where, where_document)
+
+    def count(self):
+        return sum(self._fan_out(lambda shard: shard.count()))
+
+    def export_snapshot(self, snapshot_repo, page_size=1000):
+        records = self.iter_records(include=["documents", "metadatas", "embeddings"], page_size=page_size)
+        return snapshot_repo.publish(self.count(), records)
+
+    def get_all_data(self, include=None):
+        try:
+            return {"results": list(self.iter_records(include=include))}
+        except Exception as e:
+            self.logger.error(f"An error occurred while retrieving all data: {e}")
+            return {"results": []}
+
+    def delete_collection(self):
+        for shard in self.shards:
+            shard.delete_collection(shard.collection_name)
+
+    def delete_all_collections(self):
+        self.shards[0].delete_all_collections()
+
+    def get_local_storage_path(self):
+        return self.shards[0].get_local_storage_path()
@@ -0,0 +1,240 @@
+import json
+import logging
+import mmap
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+
+SNAPSHOT_METRICS = ("l2", "cosine")
+
+
+class VectorSnapshot:
+    """One published generation: a memory-mapped embedding matrix and its record sidecar."""
+
+    def __init__(self, generation, path):
+        self.generation = generation
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.metric = meta["metric"]
+        self.count = meta["count"]
+        self.matrix = np.load(os.path.join(path, "embeddings.npy"), mmap_mode="r")
+        self.sq_norms = np.load(os.path.join(path, "sq_norms.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "record_offsets.npy"), mmap_mode="r")
+        with open(os.path.join(path, "records.jsonl"), "rb") as f:
+            self.records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b""
+
+    def record(self, row):
+        return json.loads(self.records[int(self.offsets[row]):int(self.offsets[row + 1])])
+
+
+class VectorSnapshotRepository:
+    """
+    Read-optimized copy of a collection for serving exact top-k queries without Chroma.
+
+    Embeddings are stored as one contiguous float32/float16 .npy matrix and records
+    (id, document, metadata) as a JSON-lines sidecar with byte offsets. Everything is
+    opened with mmap, so worker processes on one host share the pages through the OS
+    cache. Publishing writes a new generation directory and swaps the CURRENT pointer
+    with os.replace; readers pick the new generation up on their next refresh check.
+    """
+
+    def __init__(self, collection_name, snapshot_path=None, metric=None, dtype=None):
+        self.logger = logging.getLogger("VectorSnapshotRepository")
+        self.collection_name = collection_name
+        self.base_path = snapshot_path or os.getenv("SNAPSHOT_PATH", "vector_snapshots")
+        self.snapshot_path = os.path.join(self.base_path, collection_name)
+        self.metric = metric or os.getenv("SNAPSHOT_METRIC", "l2")
+        if self.metric not in SNAPSHOT_METRICS:
+            raise ValueError(f"Unsupported snapshot metric '{self.metric}', expected one of {SNAPSHOT_METRICS}")
+        self.dtype = np.dtype(dtype or os.getenv("SNAPSHOT_DTYPE", "float32"))
+        self.refresh_seconds = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "5"))
+        self.block_rows = int(os.getenv("SNAPSHOT_BLOCK_ROWS", "2048"))
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._checked_at = None
+
+    def _read_pointer(self):
+        try:
+            with open(os.path.join(self.snapshot_path, "CURRENT"), "r", encoding="utf-8") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def current(self):
+        """Return the active snapshot, switching to a newer published generation when there is one."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.refresh_seconds:
+            return self._snapshot
+        with self._lock:
+            self._checked_at = now
+            generation = self._read_pointer()
+            if generation is None:
+                self._snapshot = None
+            elif self._snapshot is None or self._snapshot.generation != generation:
+                try:
+                    self._snapshot = VectorSnapshot(generation, os.path.join(self.snapshot_path, generation))
+                    self.logger.info(
+                        f"Loaded snapshot '{self.collection_name}' generation {generation} "
+                        f"with {self._snapshot.count} vectors"
+                    )
+                except Exception as e:
+                    self.logger.error(f"Could not load snapshot generation {generation}: {e}")
+            return self._snapshot
+
+    def publish(self, count, records):
+        """
+        Write records ({"id", "document", "metadata", "embedding"}) as a new generation and activate it.
+
+        Parameters:
+            count (int): The expected number of records, used to preallocate the matrix; it
+                grows if more records arrive, e.g. ones added while the collection is exported.
+            records (Iterable[dict]): The records, e.g. ChromaRepository.iter_records with embeddings.
+
+        Returns:
+            dict: The published generation and its record count.
+        """
+        generation = str(time.time_ns())
+        path = os.path.join(self.snapshot_path, generation)
+        os.makedirs(path)
+        matrix = None
+        capacity = max(int(count), 1)
+        sq_norms = np.zeros(capacity, dtype=np.float32)
+        offsets = [0]
+        written = 0
+        with open(os.path.join(path, "records.jsonl"), "wb") as f:
+            for record in records:
+                embedding = np.asarray(record.pop("embedding"), dtype=np.float32)
+                if matrix is None:
+                    matrix = np.lib.format.open_memmap(
+                        os.path.join(path, "embeddings.npy"), mode="w+", dtype=self.dtype,
+                        shape=(capacity, len(embedding))
+                    )
+                elif written == capacity:
+                    # Records were added while exporting; double the matrix instead of dropping them.
+                    capacity *= 2
+                    matrix = self._grow(path, matrix, capacity)
+                    sq_norms = np.concatenate([sq_norms, np.zeros(capacity - len(sq_norms), dtype=np.float32)])
+                if self.metric == "cosine":
+                    norm = np.linalg.norm(embedding)
+                    embedding = embedding / norm if norm else embedding
+                matrix[written] = embedding
+                stored = matrix[written].astype(np.float32)
+                sq_norms[written] = stored @ stored
+                line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets.append(offsets[-1] + len(line))
+                written += 1
+
+        if matrix is None:
+            np.save(os.path.join(path, "embeddings.npy"), np.zeros((0, 0), dtype=self.dtype))
+        else:
+            matrix.flush()
+            if written < capacity:
+                # Records were deleted while exporting, or the matrix was grown; shrink to what was written.
+                trimmed = np.array(matrix[:written])
+                del matrix
+                np.save(os.path.join(path, "embeddings.npy"), trimmed)
+            else:
+                del matrix
+        np.save(os.path.join(path, "sq_norms.npy"), sq_norms[:written])
+        np.save(os.path.join(path, "record_offsets.npy"), np.asarray(offsets, dtype=np.int64))
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"metric": self.metric, "dtype": self.dtype.name, "count": written}, f)
+
+        pointer = os.path.join(self.snapshot_path, "CURRENT")
+        previous = self._read_pointer()
+        with open(f"{pointer}.tmp", "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(f"{pointer}.tmp", pointer)
+        # Keep the previous generation for workers that have read the old pointer but not opened it yet.
+        for name in os.listdir(self.snapshot_path):
+            if name not in (generation, previous, "CURRENT"):
+                shutil.rmtree(os.path.join(self.snapshot_path, name), ignore_errors=True)
+
+        with self._lock:
+            self._snapshot = VectorSnapshot(generation, path)
+            self._checked_at = time.monotonic()
+        if written != count:
+            self.logger.warning(
+                f"Snapshot '{self.collection_name}' expected {count} vectors but exported {written}; "
+                f"the collection changed during the export"
+            )
+        self.logger.info(f"Published snapshot '{self.collection_name}' generation {generation} with {written} vectors")
+        return {"generation": generation, "records": written}
+
+    @staticmethod
+    def _grow(path, matrix, capacity):
+        """Copy a full embedding matrix into a larger memory-mapped file and return the new matrix."""
+        grown = np.lib.format.open_memmap(
+            os.path.join(path, "embeddings.grow.npy"), mode="w+", dtype=matrix.dtype, shape=(capacity, matrix.shape[1])
+        )
+        grown[:len(matrix)] = matrix
+        grown.flush()
+        del matrix, grown
+        os.replace(os.path.join(path, "embeddings.grow.npy"), os.path.join(path, "embeddings.npy"))
+        return np.lib.format.open_memmap(os.path.join(path, "embeddings.npy"), mode="r+")
+
+    def search(self, query_embedding, n_results=5, include_embeddings=False):
+        """
+        Exact top-k over the snapshot, shaped like a Chroma query result for a single query.
+
+        The matrix is scanned in blocks of SNAPSHOT_BLOCK_ROWS so float16 snapshots are
+        upcast one block at a time. Distances are squared L2 (Chroma's default) or 1 - cosine.
+
+        Returns:
+            dict or None: ids, distances, documents, metadatas (and embeddings), or None without a snapshot.
+        """
+        snapshot = self.current()
+        if snapshot is None:
+            return None
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if snapshot.metric == "cosine":
+            norm = np.linalg.norm(query)
+            query = query / norm if norm else query
+        k = min(int(n_results), snapshot.count)
+        if k <= 0:
+            return {"ids": [[]], "distances": [[]], "documents": [[]], "metadatas": [[]], "embeddings": [[]]}
+        best_rows = np.zeros(0, dtype=np.int64)
+        best_distances = np.zeros(0, dtype=np.float32)
+        for start in range(0, snapshot.count, self.block_rows):
+            block = np.asarray(snapshot.matrix[start:start + self.block_rows], dtype=np.float32)
+            similarity = block @ query
+            if snapshot.metric == "cosine":
+                distances = 1.0 - similarity
+            else:
+                distances = snapshot.sq_norms[start:start + len(block)] - 2.0 * similarity + query @ query
+            if len(distances) > k:
+                rows = np.argpartition(distances, k - 1)[:k]
+            else:
+                rows = np.arange(len(distances))
+            best_rows = np.concatenate([best_rows, rows + start])
+            best_distances = np.concatenate([best_distances, distances[rows]])
+            if len(best_rows) > k:
+                keep = np.argpartition(best_distances, k - 1)[:k]
+                best_rows, best_distances = best_rows[keep], best_distances[keep]
+        order = np.argsort(best_distances, kind="stable")
+        best_rows, best_distances = best_rows[order], best_distances[order]
+
+        records = [snapshot.record(row) for row in best_rows]
+        results = {
+            "ids": [[record["id"] for record in records]],
+            "distances": [[float(distance) for distance in best_distances]],
+            "documents": [[record.get("document") for record in records]],
+            "metadatas": [[record.get("metadata") for record in records]],
+        }
+        if include_embeddings:
+            results["embeddings"] = [np.asarray(snapshot.matrix[best_rows], dtype=np.float32)]
+        return results
+
+    def delete(self):
+        with self._lock:
+            shutil.rmtree(self.snapshot_path, ignore_errors=True)
+            self._snapshot = None
+            self._checked_at = None
+
+    @staticmethod
+    def delete_all(snapshot_path=None):
+        shutil.rmtree(snapshot_path or os.getenv("SNAPSHOT_PATH", "vector_snapshots"), ignore_errors=True)
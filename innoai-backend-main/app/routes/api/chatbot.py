@@ -1,11 +1,18 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.services.answer_gpt_service import AnswerGPTService
 from app.services.split_gpt_service import SplitGPTService
 from app.services.ingestion_service import IngestionService
 from app.services.chatroom_service import ChatroomService  # Import the chatroom service
+from app.services.semantic_cache_service import SemanticCacheService
+from app.services.compound_answer_service import CompoundAnswerService
 from app.repositories.mongo_repository import MongoRepository
+from app.utils.completion_cache import BYPASS_HEADER
+from app.utils.latency import LatencyTracker
+from app.utils.retrieval import assemble_context
+import json
 import logging
 import os
+import time
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger("ChatbotAPI")
@@ -22,11 +29,19 @@ split_gpt_service = SplitGPTService()
 ingestion_service = IngestionService()
 mongo_repo = MongoRepository()
 chatroom_service = ChatroomService(mongo_repo)
+semantic_cache_service = SemanticCacheService()
+compound_answer_service = CompoundAnswerService(answer_gpt_service, split_gpt_service, ingestion_service, chatroom_service)
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+answer_latency = LatencyTracker(int(os.getenv("ANSWER_LATENCY_WINDOW", "1000")))
 
 def format_search_results(results):
     context = f"Document ID: {results['id']}\nMetadata: {results['metadata']}\nContent: {results['document']}"
     return context
 
+def completion_cache_bypassed():
+    # "X-Completion-Cache: bypass" forces a fresh completion, which then replaces the cached one.
+    return request.headers.get(BYPASS_HEADER, "").strip().lower() == "bypass"
+
 @chatbot_bp.route("/split", methods=["POST"])
 def split_question():
     try:
@@ -39,7 +54,7 @@ def split_question():
 
         if model == 'gpt-3.5-turbo':
             logger.debug(f"Splitting question with GPT model: {question}")
-            result = split_gpt_service.split(model, question)
+            result = split_gpt_service.split(model, question, completion_cache_bypassed())
         elif model == 'llama':
             logger.debug(f"Splitting question with LLama model: {question}")
             result = split_llama_service.split(model, question)
@@ -53,41 +68,195 @@ def split_question():
         logger.error(f"Error in split_question: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+def sse_event(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def stream_cached_answer(cached):
+    # Same event sequence as a live stream, with the whole answer in one delta.
+    answer = cached.pop('answer')
+    yield sse_event("context", cached)
+    yield sse_event("delta", {"content": answer})
+    yield sse_event("done", {"cached": True, "cache_similarity": cached.get('cache_similarity')})
+
+def sse_response(events):
+    return Response(stream_with_context(events), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @chatbot_bp.route("/answer", methods=["POST"])
 def answer_question():
+    request_started = time.perf_counter()
     try:
         data = request.get_json()
         model = data.get('model')
         question = data.get('question')
         chat_history = data.get('chat_history', '')
-        collection_name = data.get('collection_name', 'vehicle_collection')
+        collection_name = data.get('collection_names') or data.get('collection_name', 'vehicle_collection')
         chatroom_id = data.get('chatroom_id')
+        stream = bool(data.get('stream', False))
 
         if not question or not chatroom_id:
             return jsonify({"error": "Question and chatroom ID are required"}), 400
         if not model:
             return jsonify({"error":"Model Information is required"}), 400
 
+        top_k = data.get('top_k', ingestion_service.retrieval_top_k)
+        mmr = data.get('mmr')
+        mode = data.get('mode')
+
+        if data.get('compound'):
+            if stream:
+                return jsonify({"error": "Streaming is not supported for compound questions"}), 400
+            result = compound_answer_service.answer(
+                model, question, chat_history, collection_name, CONTEXT_MAX_TOKENS, format_search_results,
+                chatroom_id, {"top_k": top_k, "mmr": mmr, "mode": mode,
+                              "where": data.get('where'), "where_document": data.get('where_document')},
+                completion_cache_bypassed()
+            )
+            answer_latency.record("compound_total", time.perf_counter() - request_started)
+            return jsonify(result), 200
+
+        # Answers depend on the conversation, so only stand-alone questions are cached.
+        use_semantic_cache = semantic_cache_service.enabled and chat_history in ('', '[]', None)
+        if use_semantic_cache:
+            cache_namespace = semantic_cache_service.namespace(collection_name, model, {
+                "top_k": top_k, "mmr": mmr, "mode": mode,
+                "where": data.get('where'), "where_document": data.get('where_document')
+            })
+            cache_version = semantic_cache_service.get_version(collection_name)
+            question_embedding = ingestion_service.embed_query(question)
+            cached = semantic_cache_service.lookup(cache_namespace, question_embedding, cache_version)
+            if cached is not None:
+                chatroom_service.update_chatroom_message(chatroom_id, question, cached['answer'])
+                if stream:
+                    return sse_response(stream_cached_answer(cached))
+                return jsonify({**cached, "cached": True}), 200
+        started = time.perf_counter()
+        bypass_completion_cache = completion_cache_bypassed()
+
         logger.debug(f"Searching for context with query: {question}")
-        search_results = ingestion_service.search(question, collection_name)
+        search_results = ingestion_service.search(
+            question, collection_name, top_k=top_k, mmr=mmr, mode=mode,
+            where=data.get('where'), where_document=data.get('where_document')
+        )
 
         if 'error' in search_results:
             return jsonify(search_results), 500
 
-        formatted_context = format_search_results(search_results['results'])
+        formatted_context, context_results, context_tokens = assemble_context(
+            search_results['results'], ingestion_service.count_tokens, CONTEXT_MAX_TOKENS, format_search_results
+        )
+        if not context_results:
+            context_results = search_results['results'][:1]
+            formatted_context = format_search_results(context_results[0])
+        logger.debug(f"Context assembled from {len(context_results)} chunks, {context_tokens} tokens")
+
+        retrieval = {
+            "id": context_results[0]['id'],
+            "document": context_results[0]['document'],
+            "metadata": context_results[0]['metadata'],
+            "sources": [
+                {"id": result['id'], "distance": result['distance'], "metadata": result['metadata']}
+                for result in context_results
+            ]
+        }
+
+        if stream:
+            parts = []
+            failed = []
+
+            def events():
+                timings = {}
+                prompt_stats = {}
+                deltas = answer_gpt_service.answer_stream(
+                    model, question, chat_history, formatted_context, chatroom_service, chatroom_id, timings,
+                    prompt_stats, bypass_completion_cache
+                )
+                try:
+                    yield sse_event("context", retrieval)
+                    for delta in deltas:
+                        if not parts:
+                            timings["ttft"] = time.perf_counter() - request_started
+                            answer_latency.record("stream_ttft", timings["ttft"])
+                        parts.append(delta)
+                        yield sse_event("delta", {"content": delta})
+                except Exception as e:
+                    logger.error(f"Error in answer_question stream: {str(e)}")
+                    failed.append(str(e))
+                    yield sse_event("error", {"error": str(e)})
+                    return
+                finally:
+                    # Runs on client disconnect too, so the partial answer is still saved.
+                    deltas.close()
+
+                total = time.perf_counter() - request_started
+                answer_latency.record("stream_total", total)
+                if "llm_ttft" in timings:
+                    answer_latency.record("llm_ttft", timings["llm_ttft"])
+                if use_semantic_cache:
+                    semantic_cache_service.store(
+                        cache_namespace, question_embedding, {**retrieval, "answer": "".join(parts)}, cache_version,
+                        time.perf_counter() - started
+                    )
+                yield sse_event("done", {
+                    "cached": False,
+                    "completion_cached": timings.get("completion_cached", False),
+                    "ttft_ms": round(timings.get("ttft", total) * 1000, 1),
+                    "total_ms": round(total * 1000, 1),
+                    "prompt": prompt_stats
+                })
+
+            def save_unanswered():
+                # A client that leaves before the first delta closes the stream before the
+                # upstream generator starts, so nothing else records the question.
+                if not parts and not failed:
+                    chatroom_service.update_chatroom_message(chatroom_id, question, "")
+
+            response = sse_response(events())
+            response.call_on_close(save_unanswered)
+            return response
 
         logger.debug(f"Answering question with GPT model: {question}")
+        prompt_stats = {}
         answer = answer_gpt_service.answer(
-            model, question, chat_history, formatted_context, chatroom_service, chatroom_id
+            model, question, chat_history, formatted_context, chatroom_service, chatroom_id, prompt_stats,
+            bypass_completion_cache
         )
 
+        response = {**retrieval, "answer": answer}
+        answer_latency.record("blocking_total", time.perf_counter() - request_started)
+        if use_semantic_cache:
+            semantic_cache_service.store(
+                cache_namespace, question_embedding, response, cache_version, time.perf_counter() - started
+            )
+        return jsonify({**response, "cached": False, "prompt": prompt_stats}), 200
+
+    except Exception as e:
+        logger.error(f"Error in answer_question: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@chatbot_bp.route("/answer/stats", methods=["GET"])
+def get_answer_stats():
+    try:
+        return jsonify({**answer_latency.get_stats(), "prompt_tokens": answer_gpt_service.prompt_builder.get_stats()}), 200
+    except Exception as e:
+        logger.error(f"Error in get_answer_stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@chatbot_bp.route("/completion-cache/stats", methods=["GET"])
+def get_completion_cache_stats():
+    try:
         return jsonify({
-            "id": search_results['results']['id'],
-            "document": search_results['results']['document'],
-            "metadata": search_results['results']['metadata'],
-            "answer": answer
+            "answer": answer_gpt_service.completion_cache.get_stats(),
+            "split": split_gpt_service.completion_cache.get_stats()
         }), 200
+    except Exception as e:
+        logger.error(f"Error in get_completion_cache_stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
+@chatbot_bp.route("/semantic-cache/stats", methods=["GET"])
+def get_semantic_cache_stats():
+    try:
+        return jsonify(semantic_cache_service.get_stats()), 200
     except Exception as e:
-        logger.error(f"Error in answer_question: {str(e)}")
+        logger.error(f"Error in get_semantic_cache_stats: {str(e)}")
         return jsonify({"error": str(e)}), 500
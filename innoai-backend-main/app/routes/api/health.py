@@ -0,0 +1,24 @@
+from flask import Blueprint, jsonify
+from app.extensions import limiter
+from app.services.warmup_service import WarmupService
+import logging
+
+logger = logging.getLogger("HealthAPI")
+
+health_bp = Blueprint("health", __name__, url_prefix="/health")
+limiter.exempt(health_bp)
+
+warmup_service = WarmupService()
+
+@health_bp.route("/live", methods=["GET"])
+def live():
+    return jsonify({"status": "ok"}), 200
+
+@health_bp.route("/ready", methods=["GET"])
+def ready():
+    try:
+        status = warmup_service.get_status()
+        return jsonify(status), 200 if status["ready"] else 503
+    except Exception as e:
+        logger.error(f"Error in ready: {str(e)}")
+        return jsonify({"error": str(e)}), 500
@@ -1,6 +1,9 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from app.services.ingestion_service import IngestionService
+from app.services.ingestion_job_service import IngestionJobService
+import json
 import os
+import time
 import logging
 
 logging.basicConfig(level=logging.DEBUG)
@@ -13,6 +16,13 @@ logger.debug("Ingestion Blueprint Created")
 ingestion_service = IngestionService()
 logger.debug("Ingestion Service Initialized")
 
+# Pending jobs are resumed by create_app; MongoDB is only contacted on first use.
+ingestion_job_service = IngestionJobService(ingestion_service)
+
+JOB_EVENTS_POLL_SECONDS = float(os.getenv("INGEST_JOB_EVENTS_POLL_SECONDS", "1.0"))
+JOB_EVENTS_TIMEOUT_SECONDS = float(os.getenv("INGEST_JOB_EVENTS_TIMEOUT_SECONDS", "3600"))
+EXPORT_FIELDS = {"documents", "metadatas", "embeddings"}
+
 PDF_DIRECTORY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..', 'external_resources', 'pdfs'))
 
 @ingestion_bp.route("/ingest/<string:file>", methods=["POST"])
@@ -25,6 +35,9 @@ def ingest_pdf(file):
 
         file_path = os.path.join(PDF_DIRECTORY, file)
         logger.debug(f"File path constructed: {file_path}")
+        if data.get('async'):
+            job_id = ingestion_job_service.submit("pdf", {"file_path": file_path, "collection_name": collection_name})
+            return jsonify({"job_id": job_id, "status": "queued"}), 202
         result = ingestion_service.process_pdf(file_path, collection_name)
         logger.debug(f"Ingestion result: {result}")
         return jsonify(result), 200
@@ -41,6 +54,9 @@ def ingest_all_pdfs():
             return jsonify({"error": "Missing collection_name in request body"}), 400
 
         logger.debug(f"Directory path: {PDF_DIRECTORY}")
+        if data.get('async'):
+            job_id = ingestion_job_service.submit("all", {"directory_path": PDF_DIRECTORY, "collection_name": collection_name})
+            return jsonify({"job_id": job_id, "status": "queued"}), 202
         result = ingestion_service.process_all_pdfs_in_directory(PDF_DIRECTORY, collection_name)
         logger.debug(f"Ingestion of all PDFs result: {result}")
         return jsonify(result), 200
@@ -48,6 +64,44 @@ def ingest_all_pdfs():
         logger.error(f"Error in ingest_all_pdfs: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@ingestion_bp.route("/jobs/<string:job_id>", methods=["GET"])
+def get_ingestion_job(job_id):
+    try:
+        job = ingestion_job_service.get_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        logger.error(f"Error in get_ingestion_job: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@ingestion_bp.route("/jobs/<string:job_id>/events", methods=["GET"])
+def stream_ingestion_job(job_id):
+    if not ingestion_job_service.get_job(job_id):
+        return jsonify({"error": "Job not found"}), 404
+
+    def events():
+        last_sent = None
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT_SECONDS
+        while True:
+            job = ingestion_job_service.get_job(job_id)
+            if job and job != last_sent:
+                last_sent = job
+                event = job["status"] if job["status"] in ("done", "failed") else "progress"
+                yield f"event: {event}\ndata: {json.dumps(job)}\n\n"
+            if not job or job["status"] in ("done", "failed"):
+                return
+            # A job whose worker died stays "running" until the next restart requeues it.
+            stale = ingestion_job_service.is_stale(job)
+            if stale or time.monotonic() >= deadline:
+                reason = "stale" if stale else "max_wait"
+                yield f"event: timeout\ndata: {json.dumps({**job, 'reason': reason})}\n\n"
+                return
+            time.sleep(JOB_EVENTS_POLL_SECONDS)
+
+    return Response(stream_with_context(events()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @ingestion_bp.route("/ingest-text", methods=["POST"])
 def ingest_text():
     try:
@@ -57,6 +111,9 @@ def ingest_text():
             return jsonify({"error": "Missing collection_name in request body"}), 400
 
         text = data.get("text")
+        if data.get('async'):
+            job_id = ingestion_job_service.submit("text", {"text": text, "collection_name": collection_name})
+            return jsonify({"job_id": job_id, "status": "queued"}), 202
         result = ingestion_service.process_text(text, collection_name)
         return jsonify(result), 200
     except Exception as e:
@@ -72,6 +129,9 @@ def ingest_semantic_chunk():
             return jsonify({"error": "Missing collection_name in request body"}), 400
 
         text = data.get("text")
+        if data.get('async'):
+            job_id = ingestion_job_service.submit("semantic_chunk", {"text": text, "collection_name": collection_name})
+            return jsonify({"job_id": job_id, "status": "queued"}), 202
         result = ingestion_service.process_semantic_chunks(text, collection_name)
         return jsonify(result), 200
     except Exception as e:
@@ -87,6 +147,9 @@ def ingest_token_text_split():
             return jsonify({"error": "Missing collection_name in request body"}), 400
 
         text = data.get("text")
+        if data.get('async'):
+            job_id = ingestion_job_service.submit("token_text_split", {"text": text, "collection_name": collection_name})
+            return jsonify({"job_id": job_id, "status": "queued"}), 202
         result = ingestion_service.process_token_text_splitter(text, collection_name)
         return jsonify(result), 200
     except Exception as e:
@@ -120,17 +183,68 @@ def delete_all_collections():
 def search():
     try:
         data = request.get_json()
-        collection_name = data.get('collection_name')
+        collection_name = data.get('collection_names') or data.get('collection_name')
         if not collection_name:
             return jsonify({"error": "Missing collection_name in request body"}), 400
 
         query = data.get('query')
-        result = ingestion_service.search(query, collection_name)
+        result = ingestion_service.search(
+            query, collection_name, top_k=data.get('top_k'), mmr=data.get('mmr'), fetch_k=data.get('fetch_k'),
+            mode=data.get('mode'), where=data.get('where'), where_document=data.get('where_document')
+        )
         return jsonify(result), 200
     except Exception as e:
         logger.error(f"Error in search: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@ingestion_bp.route("/search-batch", methods=["POST"])
+def search_batch():
+    try:
+        data = request.get_json()
+        collection_name = data.get('collection_names') or data.get('collection_name')
+        if not collection_name:
+            return jsonify({"error": "Missing collection_name in request body"}), 400
+
+        queries = data.get('queries')
+        if not queries or not isinstance(queries, list):
+            return jsonify({"error": "Missing queries list in request body"}), 400
+
+        result = ingestion_service.search_batch(queries, collection_name, n_results=data.get('n_results', 5))
+        if 'error' in result:
+            return jsonify(result), 500
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error in search_batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@ingestion_bp.route("/lexical-index/rebuild", methods=["POST"])
+def rebuild_lexical_index():
+    try:
+        data = request.get_json()
+        collection_name = data.get('collection_name')
+        if not collection_name:
+            return jsonify({"error": "Missing collection_name in request body"}), 400
+
+        result = ingestion_service.rebuild_lexical_index(collection_name)
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error in rebuild_lexical_index: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@ingestion_bp.route("/snapshot/publish", methods=["POST"])
+def publish_snapshot():
+    try:
+        data = request.get_json()
+        collection_name = data.get('collection_name')
+        if not collection_name:
+            return jsonify({"error": "Missing collection_name in request body"}), 400
+
+        result = ingestion_service.publish_snapshot(collection_name)
+        return jsonify(result), 200
+    except Exception as e:
+        logger.error(f"Error in publish_snapshot: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
 @ingestion_bp.route("/get-all-data", methods=["POST"])
 def get_all_data():
     try:
@@ -139,8 +253,39 @@ def get_all_data():
         if not collection_name:
             return jsonify({"error": "Missing collection_name in request body"}), 400
 
-        all_data = ingestion_service.get_all_data(collection_name)
-        return jsonify(all_data), 200
+        include = data.get('include', ["documents", "metadatas"])
+        if not isinstance(include, list) or not set(include) <= EXPORT_FIELDS:
+            return jsonify({"error": f"include must be a list drawn from {sorted(EXPORT_FIELDS)}"}), 400
+
+        records = ingestion_service.export_records(
+            collection_name, include=include, where=data.get('where'), where_document=data.get('where_document')
+        )
     except Exception as e:
         logger.error(f"Error in get_all_data: {str(e)}")
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+    def lines():
+        try:
+            for record in records:
+                yield json.dumps(record, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.error(f"Error in get_all_data stream: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+@ingestion_bp.route("/embedding-cache/stats", methods=["GET"])
+def get_embedding_cache_stats():
+    try:
+        return jsonify(ingestion_service.get_embedding_cache_stats()), 200
+    except Exception as e:
+        logger.error(f"Error in get_embedding_cache_stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@ingestion_bp.route("/query-cache/stats", methods=["GET"])
+def get_query_cache_stats():
+    try:
+        return jsonify(ingestion_service.get_query_cache_stats()), 200
+    except Exception as e:
+        logger.error(f"Error in get_query_cache_stats: {str(e)}")
+        return jsonify({"error": str(e)}), 500
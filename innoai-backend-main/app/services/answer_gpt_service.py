@@ -1,7 +1,11 @@
 import os
-import json
 import openai
+import asyncio
+import contextvars
 import logging
+import time
+from app.services.prompt_builder import PromptBuilder
+from app.utils.completion_cache import CompletionCache
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger("AnswerGPTService")
@@ -25,37 +29,53 @@ class AnswerGPTService:
             "| Item 3 | Feature 1 details | Feature 2 details | Feature 3 details |\n"
             "For any other type of answer, provide a clear and concise response in paragraph form.\n"
             "<context>\n{context}\n</context>\n"
-            "<chat_history>\n{chat_history}\n</chat_history>\n"
             "Question: {question}\n"
             "Helpful answer in markdown:"
         )
+        self.prompt_builder = PromptBuilder("You are an expert researcher.", self.QA_TEMPLATE_GPTANSWER)
+        self.max_tokens = 3000
+        self.temperature = 0.1
+        self.completion_cache = CompletionCache(
+            "answer",
+            ttl=int(os.getenv("ANSWER_COMPLETION_CACHE_TTL", "3600")),
+            enabled=os.getenv("COMPLETION_CACHE_ENABLED", "True") == "True"
+        )
+
+    def build_messages(self, model, question, chat_history, context, prompt_stats=None):
+        # The history goes in once, as chat messages, trimmed to the prompt budget.
+        messages, stats = self.prompt_builder.build(model, question, chat_history, context)
+        if prompt_stats is not None:
+            prompt_stats.update(stats)
+        logger.debug(
+            "Prompt: %d tokens, %d saved, %d history turns dropped",
+            stats["prompt_tokens"], stats["tokens_saved"], stats["dropped_turns"]
+        )
+        return messages
 
-    def answer(self, model, question, chat_history, context, chatroom_service, chatroom_id):
-        history_messages = []
-        if chat_history:
-            history = json.loads(chat_history)
-            for entry in history:
-                history_messages.append({"role": entry["role"], "content": entry["content"]})
+    def completion_key(self, model, messages):
+        return self.completion_cache.key(model, messages, self.temperature, self.max_tokens)
 
-        messages = [
-            {"role": "system", "content": "You are an expert researcher."}
-        ] + history_messages + [
-            {"role": "user", "content": self.QA_TEMPLATE_GPTANSWER.format(context=context, chat_history=chat_history, question=question)}
-        ]
+    def answer(self, model, question, chat_history, context, chatroom_service, chatroom_id, prompt_stats=None,
+               bypass_cache=False):
+        messages = self.build_messages(model, question, chat_history, context, prompt_stats)
 
         logger.debug("Model: %s", model)
         logger.debug("Question: %s", question)
         logger.debug("Chat History: %s", chat_history)
         logger.debug("Context: %s", context)
 
-        response = openai.chat.completions.create(
-            model=model,
-            messages=messages,
-            max_tokens=3000,
-            temperature=0.1
-        )
-
-        response_message = response.choices[0].message.content
+        cache_key = self.completion_key(model, messages)
+        response_message = self.completion_cache.get(cache_key, bypass=bypass_cache)
+        if response_message is None:
+            started = time.perf_counter()
+            response = openai.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature
+            )
+            response_message = response.choices[0].message.content
+            self.completion_cache.set(cache_key, response_message, time.perf_counter() - started)
         chatbot_message = response_message
 
         # Update the chatroom with the new messages
@@ -63,6 +83,98 @@ class AnswerGPTService:
 
         return response_message
 
+    async def answer_async(self, client, model, question, chat_history, context, prompt_stats=None,
+                           bypass_cache=False):
+        """
+        Answer with an AsyncOpenAI client; the caller takes care of updating the chatroom.
+
+        Completion cache reads and writes can block on the network (Redis), so they run on
+        the loop's thread pool, in a copy of the current context to keep the app context.
+        """
+        messages = self.build_messages(model, question, chat_history, context, prompt_stats)
+        cache_key = self.completion_key(model, messages)
+        loop = asyncio.get_running_loop()
+        cached = await loop.run_in_executor(
+            None, contextvars.copy_context().run, self.completion_cache.get, cache_key, bypass_cache
+        )
+        if cached is not None:
+            return cached
+        started = time.perf_counter()
+        response = await client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature
+        )
+        answer = response.choices[0].message.content
+        await loop.run_in_executor(
+            None, contextvars.copy_context().run, self.completion_cache.set, cache_key, answer,
+            time.perf_counter() - started
+        )
+        return answer
+
+    def answer_stream(self, model, question, chat_history, context, chatroom_service, chatroom_id, timings=None,
+                      prompt_stats=None, bypass_cache=False):
+        """
+        Yield the answer as text deltas while it is generated.
+
+        The chatroom is updated with the accumulated text once the generator finishes,
+        including when it is closed early because the client disconnected. When a timings
+        dict is passed, it receives the seconds to the first token and to the end of the
+        LLM stream. A cached completion is yielded as a single delta, and only a stream
+        that ran to the end is stored in the completion cache.
+        """
+        messages = self.build_messages(model, question, chat_history, context, prompt_stats)
+        logger.debug("Model: %s", model)
+        logger.debug("Question: %s", question)
+
+        timings = {} if timings is None else timings
+        cache_key = self.completion_key(model, messages)
+        cached = self.completion_cache.get(cache_key, bypass=bypass_cache)
+        if cached is not None:
+            timings["completion_cached"] = True
+            chatroom_service.update_chatroom_message(chatroom_id, question, cached)
+            yield cached
+            return
+
+        started = time.perf_counter()
+        parts = []
+        stream = None
+        completed = False
+        try:
+            stream = openai.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=self.max_tokens,
+                temperature=self.temperature,
+                stream=True
+            )
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                if not parts:
+                    timings["llm_ttft"] = time.perf_counter() - started
+                parts.append(delta)
+                yield delta
+            completed = True
+        finally:
+            timings["llm_total"] = time.perf_counter() - started
+            # Stop reading from OpenAI when the client went away mid-answer.
+            response = getattr(stream, "response", None)
+            if response is not None:
+                response.close()
+            if parts:
+                chatroom_service.update_chatroom_message(chatroom_id, question, "".join(parts))
+            if completed:
+                self.completion_cache.set(cache_key, "".join(parts), timings["llm_total"])
+            logger.debug(
+                "Streamed %d chunks, first token after %.3fs, total %.3fs",
+                len(parts), timings.get("llm_ttft", 0.0), timings["llm_total"]
+            )
+
 def format_search_results(results):
     context = f"Document ID: {results['id']}\nMetadata: {results['metadata']}\nContent: {results['document']}"
     return context
@@ -0,0 +1,156 @@
+import asyncio
+import contextlib
+import logging
+import os
+import threading
+import time
+
+import openai
+from flask import current_app, has_app_context
+
+from app.utils.retrieval import assemble_context
+
+
+class CompoundAnswerService:
+    """
+    Answers a compound question by splitting it and handling the parts concurrently.
+
+    The question is split with SplitGPTService, then every sub-question is retrieved and
+    answered at the same time, so the total latency is close to the slowest sub-answer
+    rather than the sum. LLM calls go through one AsyncOpenAI client on a long-lived
+    event loop thread, which keeps its connection pool warm across requests, and a
+    semaphore caps the completions in flight across all requests of the worker.
+    Retrieval runs on the loop's default thread pool under the same semaphore. A failed
+    sub-question is reported with its error while the others are still answered.
+    """
+
+    def __init__(self, answer_gpt_service, split_gpt_service, ingestion_service, chatroom_service):
+        self.logger = logging.getLogger("CompoundAnswerService")
+        self.answer_gpt_service = answer_gpt_service
+        self.split_gpt_service = split_gpt_service
+        self.ingestion_service = ingestion_service
+        self.chatroom_service = chatroom_service
+        self.max_concurrency = int(os.getenv("COMPOUND_MAX_CONCURRENCY", "4"))
+        self.max_sub_questions = int(os.getenv("COMPOUND_MAX_SUB_QUESTIONS", "5"))
+        self.split_model = os.getenv("COMPOUND_SPLIT_MODEL") or None
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def _get_loop(self):
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="compound-answer-loop", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_client(self):
+        # Created on the loop thread so its connection pool belongs to that loop.
+        if self._client is None:
+            self._client = openai.AsyncOpenAI(api_key=self.answer_gpt_service.api_key)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def answer(self, model, question, chat_history, collection_name, context_max_tokens, format_result,
+               chatroom_id, search_options=None, bypass_cache=False):
+        """
+        Split, retrieve and answer concurrently, then merge the sub-answers.
+
+        Returns:
+            dict: The merged answer, one entry per sub-question with its answer, sources and
+            latency (or its error), and the split, total and summed sub-answer seconds.
+
+        Raises:
+            ValueError: If no sub-question could be answered.
+        """
+        started = time.perf_counter()
+        sub_questions = self.split_gpt_service.split_questions(self.split_model or model, question, bypass_cache)
+        sub_questions = sub_questions[:self.max_sub_questions] or [question]
+        split_seconds = time.perf_counter() - started
+        self.logger.info(f"Split into {len(sub_questions)} sub-questions in {split_seconds:.2f}s")
+
+        # One model call embeds every sub-question; the concurrent searches then hit the query cache.
+        self.ingestion_service.embed_queries(sub_questions)
+        app = current_app._get_current_object() if has_app_context() else None
+        parts = asyncio.run_coroutine_threadsafe(
+            self._answer_all(app, model, sub_questions, chat_history, collection_name, context_max_tokens,
+                             format_result, search_options or {}, bypass_cache),
+            self._get_loop()
+        ).result()
+
+        answered = [part for part in parts if "error" not in part]
+        if not answered:
+            raise ValueError(parts[0]["error"])
+        answer = "\n\n".join(f"### {part['question']}\n{part['answer']}" for part in answered)
+        self.chatroom_service.update_chatroom_message(chatroom_id, question, answer)
+        total_seconds = time.perf_counter() - started
+        self.logger.info(
+            f"Compound answer in {total_seconds:.2f}s, sub-answers summed to "
+            f"{sum(part['seconds'] for part in parts):.2f}s"
+        )
+        return {
+            "answer": answer,
+            "sub_questions": parts,
+            "split_seconds": round(split_seconds, 3),
+            "total_seconds": round(total_seconds, 3),
+            "sequential_seconds": round(split_seconds + sum(part["seconds"] for part in parts), 3),
+        }
+
+    async def _answer_all(self, app, model, sub_questions, chat_history, collection_name, context_max_tokens,
+                          format_result, search_options, bypass_cache):
+        client = self._get_client()
+        # The sub-answer tasks copy this context, so the completion cache can reach the app's cache backend.
+        with app.app_context() if app is not None else contextlib.nullcontext():
+            return await asyncio.gather(*[
+                self._answer_one(client, model, sub_question, chat_history, collection_name, context_max_tokens,
+                                 format_result, search_options, bypass_cache)
+                for sub_question in sub_questions
+            ])
+
+    async def _answer_one(self, client, model, sub_question, chat_history, collection_name, context_max_tokens,
+                          format_result, search_options, bypass_cache):
+        started = time.perf_counter()
+        try:
+            return await self._answer_part(client, model, sub_question, chat_history, collection_name,
+                                           context_max_tokens, format_result, search_options, bypass_cache, started)
+        except Exception as e:
+            self.logger.error(f"Sub-question '{sub_question}' failed: {e}")
+            return {
+                "question": sub_question,
+                "error": str(e),
+                "sources": [],
+                "seconds": round(time.perf_counter() - started, 3),
+            }
+
+    async def _answer_part(self, client, model, sub_question, chat_history, collection_name, context_max_tokens,
+                           format_result, search_options, bypass_cache, started):
+        async with self._semaphore:
+            search_results = await asyncio.get_running_loop().run_in_executor(
+                None, lambda: self.ingestion_service.search(sub_question, collection_name, **search_options)
+            )
+            if 'error' in search_results:
+                raise ValueError(f"Retrieval failed for '{sub_question}': {search_results['error']}")
+            results = search_results['results']
+            results = results if isinstance(results, list) else [results]
+            context, context_results, _ = assemble_context(
+                results, self.ingestion_service.count_tokens, context_max_tokens, format_result
+            )
+            if not context_results:
+                context_results = results[:1]
+                context = format_result(context_results[0])
+            prompt_stats = {}
+            answer = await self.answer_gpt_service.answer_async(
+                client, model, sub_question, chat_history, context, prompt_stats, bypass_cache
+            )
+        return {
+            "question": sub_question,
+            "answer": answer,
+            "prompt_tokens": prompt_stats.get("prompt_tokens"),
+            "sources": [
+                {"id": result['id'], "distance": result['distance'], "metadata": result['metadata']}
+                for result in context_results
+            ],
+            "seconds": round(time.perf_counter() - started, 3),
+        }
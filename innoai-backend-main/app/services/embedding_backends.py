@@ -0,0 +1,50 @@
+import importlib.util
+import logging
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+logger = logging.getLogger("EmbeddingBackends")
+
+EMBEDDING_BACKENDS = ("torch", "torch-int8", "onnx")
+
+
+def load_embedding_model(model_name, backend="torch"):
+    """
+    Load a SentenceTransformer on the requested CPU inference backend.
+
+    - "torch": the default PyTorch fp32 model.
+    - "torch-int8": PyTorch with every nn.Linear dynamically quantized to int8.
+    - "onnx": ONNX Runtime through sentence-transformers' ONNX backend
+      (requires sentence-transformers>=3.2 and optimum[onnxruntime], which are
+      installed separately from requirements-onnx.txt).
+
+    Every backend returns a SentenceTransformer, so encode(), tokenizer and
+    max_seq_length behave the same for callers.
+    """
+    logger.info(f"Loading embedding model '{model_name}' with backend '{backend}'")
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "torch-int8":
+        import torch
+        model = SentenceTransformer(model_name, device="cpu")
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == "onnx":
+        if importlib.util.find_spec("optimum") is None:
+            raise ImportError("The onnx embedding backend needs optimum[onnxruntime]: "
+                              "pip install -r requirements-onnx.txt")
+        return SentenceTransformer(model_name, device="cpu", backend="onnx")
+    raise ValueError(f"Unsupported embedding backend '{backend}', expected one of {EMBEDDING_BACKENDS}")
+
+
+def measure_cosine_drift(reference_model, candidate_model, sentences, batch_size=32):
+    """Compare a candidate backend to the fp32 reference; returns cosine similarity statistics per sentence."""
+    reference = reference_model.encode(sentences, batch_size=batch_size, normalize_embeddings=True)
+    candidate = candidate_model.encode(sentences, batch_size=batch_size, normalize_embeddings=True)
+    similarity = np.sum(np.asarray(reference) * np.asarray(candidate), axis=1)
+    return {
+        "sentences": len(sentences),
+        "mean_cosine": float(np.mean(similarity)),
+        "min_cosine": float(np.min(similarity)),
+        "max_drift": float(1.0 - np.min(similarity)),
+    }
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from app.repositories.mongo_repository import MongoRepository
+
+# Jobs that ingest raw text from the request body, mapped to the IngestionService method that handles them.
+TEXT_JOB_METHODS = {
+    "text": "process_text",
+    "semantic_chunk": "process_semantic_chunks",
+    "token_text_split": "process_token_text_splitter",
+}
+JOB_TYPES = ("pdf", "all", *TEXT_JOB_METHODS)
+
+
+class IngestionJobService:
+    """
+    Runs ingestion requests on a local background worker pool.
+
+    Job state lives in MongoDB, so it is visible to every web worker and survives
+    restarts: queued jobs are picked up again on start(), and running jobs whose last
+    update is older than INGEST_JOB_STALE_SECONDS are considered orphaned and requeued.
+    A running job refreshes its update time every INGEST_JOB_HEARTBEAT_SECONDS, so a
+    live job that reports no progress for a while (one long PDF parse) is never taken
+    for an orphan. Ingestion itself is idempotent (see ManifestRepository), so replaying
+    a job is safe. MongoDB is only contacted on first use.
+    """
+
+    def __init__(self, ingestion_service, mongo_repo=None):
+        self.logger = logging.getLogger("IngestionJobService")
+        self.ingestion_service = ingestion_service
+        self._mongo_repo = mongo_repo
+        self._lock = threading.Lock()
+        self.stale_seconds = int(os.getenv("INGEST_JOB_STALE_SECONDS", "600"))
+        self.heartbeat_seconds = float(os.getenv("INGEST_JOB_HEARTBEAT_SECONDS", "60"))
+        if self.heartbeat_seconds >= self.stale_seconds:
+            self.logger.warning(
+                f"INGEST_JOB_HEARTBEAT_SECONDS ({self.heartbeat_seconds}) should be well below "
+                f"INGEST_JOB_STALE_SECONDS ({self.stale_seconds}), live jobs may be requeued"
+            )
+        self.executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("INGEST_JOB_WORKERS", "1")),
+            thread_name_prefix="ingestion-job"
+        )
+
+    @property
+    def mongo_repo(self):
+        if self._mongo_repo is None:
+            with self._lock:
+                if self._mongo_repo is None:
+                    self._mongo_repo = MongoRepository()
+        return self._mongo_repo
+
+    def start(self):
+        """Resume pending jobs on the worker pool, without holding up the caller on MongoDB."""
+        return self.executor.submit(self.resume_pending)
+
+    def submit(self, job_type, params):
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Unsupported ingestion job type: {job_type}")
+        job_id = self.mongo_repo.create_ingestion_job(job_type, params)
+        self.logger.info(f"Queued ingestion job {job_id} ({job_type})")
+        self.executor.submit(self._run, job_id)
+        return job_id
+
+    def get_job(self, job_id):
+        return self.mongo_repo.get_ingestion_job(job_id)
+
+    def is_stale(self, job):
+        """True for a running job whose heartbeat stopped, i.e. one resume_pending would requeue."""
+        stale_before = (datetime.utcnow() - timedelta(seconds=self.stale_seconds)).isoformat()
+        return job["status"] == "running" and job["updatedDate"] < stale_before
+
+    def resume_pending(self):
+        stale_before = (datetime.utcnow() - timedelta(seconds=self.stale_seconds)).isoformat()
+        try:
+            requeued = self.mongo_repo.requeue_stale_ingestion_jobs(stale_before)
+            jobs = self.mongo_repo.get_queued_ingestion_jobs()
+        except Exception as e:
+            self.logger.error(f"Could not resume pending ingestion jobs: {e}")
+            return 0
+        if requeued:
+            self.logger.info(f"Requeued {requeued} orphaned ingestion jobs")
+        for job in jobs:
+            self.executor.submit(self._run, job["job_id"])
+        return len(jobs)
+
+    def _run(self, job_id):
+        job = self.mongo_repo.claim_ingestion_job(job_id)
+        if job is None:
+            # Another worker claimed it, or it already finished.
+            return
+        self.logger.info(f"Running ingestion job {job_id}")
+
+        def report_progress(progress):
+            self.mongo_repo.update_ingestion_job(job_id, progress=progress)
+
+        stop_heartbeat = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job_id, stop_heartbeat), name=f"ingestion-job-heartbeat-{job_id}", daemon=True
+        )
+        heartbeat.start()
+        try:
+            result = self._process(job, report_progress)
+        except Exception as e:
+            self.logger.error(f"Ingestion job {job_id} failed: {str(e)}")
+            outcome = {"status": "failed", "error": str(e)}
+        else:
+            outcome = {"status": "done", "result": result}
+        finally:
+            stop_heartbeat.set()
+            heartbeat.join()
+        self.mongo_repo.update_ingestion_job(job_id, **outcome)
+        self.logger.info(f"Ingestion job {job_id} {outcome['status']}")
+
+    def _process(self, job, report_progress):
+        params = job["params"]
+        if job["type"] == "pdf":
+            return self.ingestion_service.process_pdf(
+                params["file_path"], params["collection_name"], progress_callback=report_progress
+            )
+        if job["type"] == "all":
+            return self.ingestion_service.process_all_pdfs_in_directory(
+                params["directory_path"], params["collection_name"], progress_callback=report_progress
+            )
+        process = getattr(self.ingestion_service, TEXT_JOB_METHODS[job["type"]])
+        return process(params["text"], params["collection_name"])
+
+    def _heartbeat(self, job_id, stop):
+        while not stop.wait(self.heartbeat_seconds):
+            try:
+                self.mongo_repo.update_ingestion_job(job_id)
+            except Exception as e:
+                self.logger.error(f"Heartbeat for ingestion job {job_id} failed: {e}")
@@ -0,0 +1,117 @@
+import logging
+import queue
+import threading
+
+import numpy as np
+
+from app.utils.pca import PCAProjection
+
+
+class ChromaWriter:
+    """
+    Background writer that persists embedded batches while the caller encodes the next one.
+
+    At most `max_pending` batches wait in the queue; `submit` blocks once it is full so a
+    slow Chroma write applies back-pressure to the embedding stage instead of buffering
+    the whole directory in memory.
+    """
+
+    _STOP = object()
+
+    def __init__(self, chroma_repo, max_pending=4):
+        self.logger = logging.getLogger("ChromaWriter")
+        self.chroma_repo = chroma_repo
+        self.errors = {}
+        self._queue = queue.Queue(maxsize=max(max_pending, 1))
+        self._thread = threading.Thread(target=self._run, name="chroma-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, ids, documents, embeddings, metadata, sources=()):
+        self._queue.put((ids, documents, embeddings, metadata, sources))
+
+    def close(self):
+        """Wait for every queued batch to be written and return write errors keyed by source."""
+        self._queue.put(self._STOP)
+        self._thread.join()
+        return self.errors
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                return
+            ids, documents, embeddings, metadata, sources = item
+            try:
+                self.chroma_repo.upsert_data(documents, embeddings, ids, metadata)
+            except Exception as e:
+                self.logger.error(f"Failed to write batch of {len(ids)} records: {e}")
+                for source in sources:
+                    self.errors.setdefault(source, str(e))
+
+
+class ProjectionStage:
+    """
+    Projects embedded batches into a collection's reduced PCA space.
+
+    With a projection, batches pass straight through. Without one, batches are held back
+    until `sample_size` (and at least `dim`) embeddings have arrived or the ingestion ends,
+    a projection is fitted on them and handed to `on_fit` to be stored, and the held
+    batches are released projected. Each batch is an (embeddings, payload) pair; the payload is passed along.
+    When fewer than `dim` embeddings arrive before the ingestion ends, no projection is
+    fitted or stored; the batches are released at full size and the stage passes later
+    batches through unchanged, so the collection keeps full-size embeddings.
+    """
+
+    def __init__(self, projection=None, dim=None, sample_size=4096, on_fit=None):
+        self.logger = logging.getLogger("ProjectionStage")
+        self.projection = projection
+        self.dim = dim
+        self.sample_size = sample_size
+        self.on_fit = on_fit
+        self._held = []
+        self._held_rows = 0
+        self.full_size = False
+
+    def push(self, embeddings, payload):
+        """Add a batch and return the (projected_embeddings, payload) batches ready to be written."""
+        if self.projection is not None:
+            return [(self.projection.transform(embeddings), payload)]
+        if self.full_size:
+            return [(embeddings, payload)]
+        self._held.append((embeddings, payload))
+        self._held_rows += len(embeddings)
+        if self._held_rows < max(self.sample_size, self.dim):
+            return []
+        return self._fit_and_release()
+
+    def close(self):
+        """Fit on whatever is still held and return the remaining batches."""
+        if self.projection is not None or self.full_size or not self._held:
+            return []
+        return self._fit_and_release()
+
+    def project_stream(self, batches, embedding_index):
+        """Apply the stage to a stream of tuples whose `embedding_index` item holds the embeddings."""
+        def replace(batch, embeddings):
+            return batch[:embedding_index] + (embeddings,) + batch[embedding_index + 1:]
+
+        for batch in batches:
+            for embeddings, original in self.push(batch[embedding_index], batch):
+                yield replace(original, embeddings)
+        for embeddings, original in self.close():
+            yield replace(original, embeddings)
+
+    def _fit_and_release(self):
+        held, self._held, self._held_rows = self._held, [], 0
+        sample = np.concatenate([np.asarray(embeddings, dtype=np.float32) for embeddings, _ in held])
+        if len(sample) < self.dim:
+            self.logger.warning(
+                f"Only {len(sample)} embeddings for a {self.dim}-d PCA projection; storing full-size embeddings"
+            )
+            self.full_size = True
+            return held
+        projection = PCAProjection.fit(sample[:max(self.sample_size, self.dim)], self.dim)
+        self.projection = self.on_fit(projection) if self.on_fit else projection
+        kept = float(self.projection.explained_variance_ratio.sum())
+        self.logger.info(f"PCA projection to {self.projection.dim} dimensions keeps {kept:.1%} of the variance")
+        return [(self.projection.transform(embeddings), payload) for embeddings, payload in held]
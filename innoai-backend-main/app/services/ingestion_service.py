@@ -1,36 +1,253 @@
+import itertools
+import json
 import logging
 import os
-import fitz  # PyMuPDF for PDF handling
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
-from sentence_transformers import SentenceTransformer
+import multiprocessing
+import numpy as np
+from app.extensions import cache
 from app.repositories.chroma_repository import ChromaRepository
-import re
-import nltk  # Ensure nltk is installed beforehand
-from nltk.tokenize import word_tokenize
+from app.repositories.embedding_cache_repository import EmbeddingCacheRepository
+from app.repositories.lexical_index_repository import LexicalIndexRepository
+from app.repositories.manifest_repository import ManifestRepository
+from app.repositories.sharded_chroma_repository import ShardedChromaRepository
+from app.repositories.vector_snapshot_repository import VectorSnapshotRepository
+from app.services import text_processing
+from app.services.embedding_backends import load_embedding_model
+from app.services.ingestion_pipeline import ChromaWriter, ProjectionStage
+from app.utils.hashing import content_id, hash_file, hash_text
+from app.utils.iterators import batched
+from app.utils.lru import LRUCache
+from app.utils.retrieval import mmr_select, reciprocal_rank_fusion
 
-nltk.download('punkt')
+# Bump when content_records changes the metadata it stores, so existing sources are re-ingested.
+METADATA_SCHEMA_VERSION = 1
 
 class IngestionService:
     def __init__(self):
         self.logger = logging.getLogger("IngestionService")
-        self.embed_model = SentenceTransformer('all-mpnet-base-v2')
+        self.embed_model_name = 'all-mpnet-base-v2'
+        self.embed_backend = os.getenv("EMBEDDING_BACKEND", "torch")
+        self.embed_model = load_embedding_model(self.embed_model_name, self.embed_backend)
+        self.embed_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+        max_chunk_tokens = self.embed_model.max_seq_length - text_processing.SPECIAL_TOKENS
+        self.chunker = text_processing.TokenChunker(
+            self.embed_model.tokenizer,
+            max_tokens=min(int(os.getenv("CHUNK_MAX_TOKENS", str(max_chunk_tokens))), max_chunk_tokens),
+            overlap_tokens=int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+        )
+        self.chunker_config = (
+            self.embed_model.tokenizer.name_or_path, self.chunker.max_tokens, self.chunker.overlap_tokens
+        )
+        # Everything besides the file itself that decides a source's chunks, vectors and metadata.
+        self.ingest_fingerprint = hash_text(json.dumps({
+            "chunker": self.chunker_config,
+            "model": self.embed_model_name,
+            "backend": self.embed_backend,
+            "schema": METADATA_SCHEMA_VERSION,
+        }, sort_keys=True))
+        self.ingest_batch_size = int(os.getenv("INGEST_BATCH_SIZE", "256"))
+        self.parse_workers = int(os.getenv("INGEST_PARSE_WORKERS", str(max((os.cpu_count() or 2) - 1, 1))))
+        self.parse_start_method = os.getenv("INGEST_PARSE_START_METHOD") or None
+        self.write_queue_size = int(os.getenv("INGEST_WRITE_QUEUE_SIZE", "4"))
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.chroma_storage_base = os.path.join(self.base_dir, '..', 'chroma_storage')
         self.tensorboard_logs = os.path.join(self.base_dir, '..', 'tensorboard_logs')
+        self.tensorboard_max_records = int(os.getenv("TENSORBOARD_MAX_RECORDS", "10000"))
+        self._chroma_repos = {}
+        self.search_executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("SEARCH_FANOUT_WORKERS", "8")), thread_name_prefix="chroma-fanout"
+        )
+        self.chroma_shards = int(os.getenv("CHROMA_SHARDS", "1"))
+        self._chroma_repos_lock = threading.Lock()
+        self.manifest_repo = ManifestRepository()
+        self.embedding_cache = None
+        if os.getenv("EMBEDDING_CACHE_ENABLED", "True") == "True":
+            self.embedding_cache = EmbeddingCacheRepository()
+        self.query_cache_ttl = int(os.getenv("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+        self.query_cache = LRUCache(int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024")), ttl=self.query_cache_ttl)
+        self.query_cache_shared = os.getenv("QUERY_EMBEDDING_CACHE_SHARED", "False") == "True"
+        self.retrieval_top_k = int(os.getenv("RETRIEVAL_TOP_K", "5"))
+        self.retrieval_fetch_k = int(os.getenv("RETRIEVAL_FETCH_K", "20"))
+        self.retrieval_mmr = os.getenv("RETRIEVAL_MMR", "True") == "True"
+        self.retrieval_mmr_lambda = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.5"))
+        self.retrieval_mode = os.getenv("RETRIEVAL_MODE", "vector")
+        self.rrf_k = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+        self.lexical_index_enabled = os.getenv("LEXICAL_INDEX_ENABLED", "True") == "True"
+        self._lexical_indexes = {}
+        self.export_page_size = int(os.getenv("EXPORT_PAGE_SIZE", "1000"))
+        self.snapshot_serving = os.getenv("SNAPSHOT_SERVING", "False") == "True"
+        self.snapshot_publish = os.getenv("SNAPSHOT_PUBLISH_ON_INGEST", "False") == "True"
+        self._snapshots = {}
+        self.pca_dim = int(os.getenv("PCA_DIM", "0"))
+        self.pca_collections = {name.strip() for name in os.getenv("PCA_COLLECTIONS", "").split(",") if name.strip()}
+        self.pca_sample_size = int(os.getenv("PCA_SAMPLE_SIZE", "4096"))
 
     def get_chroma_repo(self, collection_name):
-        return ChromaRepository(collection_name=collection_name, embedding_dim=768)
+        chroma_repo = self._chroma_repos.get(collection_name)
+        if chroma_repo is None:
+            with self._chroma_repos_lock:
+                chroma_repo = self._chroma_repos.get(collection_name)
+                if chroma_repo is None:
+                    if self.chroma_shards > 1:
+                        chroma_repo = ShardedChromaRepository.create(collection_name, self.chroma_shards, embedding_dim=768)
+                    else:
+                        chroma_repo = ChromaRepository(collection_name=collection_name, embedding_dim=768)
+                    self._chroma_repos[collection_name] = chroma_repo
+        return chroma_repo
+
+    @staticmethod
+    def is_multi_collection(collection_names):
+        return not isinstance(collection_names, str) and len(set(collection_names)) > 1
+
+    def open_chroma_repo(self, collection_name):
+        """Return a repository for an existing collection without creating it, or None when it is missing."""
+        # Not cached: a repository opened with create=False must not serve later ingestions.
+        # Clients and collection handles are pooled, so opening one is cheap.
+        if self.chroma_shards > 1:
+            chroma_repo = ShardedChromaRepository.create(collection_name, self.chroma_shards, embedding_dim=768,
+                                                         create=False)
+        else:
+            chroma_repo = ChromaRepository(collection_name=collection_name, embedding_dim=768, create=False)
+        return chroma_repo if chroma_repo.exists() else None
+
+    def get_search_repo(self, collection_names):
+        """
+        Return the repository to search: one collection, or a fan-out over several logical collections.
+
+        The fan-out is built per request over the shared search executor, so arbitrary
+        combinations of collection names do not accumulate repositories or thread pools.
+        """
+        if isinstance(collection_names, str):
+            return self.get_chroma_repo(collection_names)
+        names = list(dict.fromkeys(collection_names))
+        if len(names) == 1:
+            return self.get_chroma_repo(names[0])
+        repositories = [self.get_chroma_repo(name) for name in names]
+        return ShardedChromaRepository("+".join(names), repositories, executor=self.search_executor)
+
+    def get_lexical_index(self, collection_name):
+        if not self.lexical_index_enabled:
+            return None
+        lexical_index = self._lexical_indexes.get(collection_name)
+        if lexical_index is None:
+            with self._chroma_repos_lock:
+                lexical_index = self._lexical_indexes.get(collection_name)
+                if lexical_index is None:
+                    lexical_index = LexicalIndexRepository(collection_name)
+                    self._lexical_indexes[collection_name] = lexical_index
+        return lexical_index
+
+    def get_snapshot(self, collection_name):
+        snapshot = self._snapshots.get(collection_name)
+        if snapshot is None:
+            with self._chroma_repos_lock:
+                snapshot = self._snapshots.get(collection_name)
+                if snapshot is None:
+                    snapshot = VectorSnapshotRepository(collection_name)
+                    self._snapshots[collection_name] = snapshot
+        return snapshot
+
+    def get_projection_stage(self, chroma_repo):
+        """
+        Return the stage that maps new embeddings into the collection's PCA space, or None.
+
+        Collections that already have a projection always use it. A new, empty collection gets
+        one fitted on its first PCA_SAMPLE_SIZE embeddings when PCA_DIM is set and the collection
+        is listed in PCA_COLLECTIONS (or that list is empty). Collections that already hold
+        full-size embeddings keep them.
+        """
+        collection_name = chroma_repo.collection_name
+        projection = self.manifest_repo.get_projection(collection_name)
+        if projection is not None:
+            return ProjectionStage(projection=projection)
+        if self.pca_dim <= 0 or (self.pca_collections and collection_name not in self.pca_collections):
+            return None
+        if chroma_repo.count():
+            self.logger.info(f"Collection '{collection_name}' already stores full-size embeddings, PCA not applied")
+            return None
+        return ProjectionStage(
+            dim=self.pca_dim, sample_size=self.pca_sample_size,
+            on_fit=lambda fitted: self.manifest_repo.save_projection(collection_name, fitted)
+        )
+
+    def project_queries(self, collection_names, query_embeddings):
+        """Map full-size query embeddings into the space the searched collection stores."""
+        names = [collection_names] if isinstance(collection_names, str) else list(dict.fromkeys(collection_names))
+        projections = [self.manifest_repo.get_projection(name) for name in names]
+        if all(projection is None for projection in projections):
+            return query_embeddings
+        if len(names) > 1:
+            raise ValueError("Collections with a PCA projection can only be searched on their own")
+        return projections[0].transform(query_embeddings).tolist()
+
+    def publish_snapshot(self, collection_name):
+        """Export the collection to a new read-optimized snapshot generation and activate it."""
+        chroma_repo = self.get_chroma_repo(collection_name)
+        result = chroma_repo.export_snapshot(self.get_snapshot(collection_name), page_size=self.export_page_size)
+        return {"message": "Snapshot published", **result}
+
+    def publish_collection(self, collection_name, removed_ids=()):
+        """
+        Bring the derived read structures up to date once an ingestion has been written.
+
+        The collection version is bumped last, so answers cached by another worker while
+        the lexical index or snapshot is still being published are invalidated too.
+        """
+        lexical_index = self.get_lexical_index(collection_name)
+        if lexical_index is not None:
+            try:
+                lexical_index.remove(removed_ids)
+                lexical_index.commit()
+            except Exception as e:
+                self.logger.error(f"Failed to update lexical index for '{collection_name}': {e}")
+        if self.snapshot_publish:
+            try:
+                self.publish_snapshot(collection_name)
+            except Exception as e:
+                self.logger.error(f"Failed to publish snapshot for '{collection_name}': {e}")
+        self.manifest_repo.bump_version(collection_name)
+
+    def rebuild_lexical_index(self, collection_name):
+        """Rebuild the BM25 index from the documents already stored in Chroma."""
+        lexical_index = self.get_lexical_index(collection_name)
+        if lexical_index is None:
+            raise ValueError("Lexical index is disabled")
+        chroma_repo = self.get_chroma_repo(collection_name)
+        pages = batched(chroma_repo.iter_records(include=["documents"], page_size=self.export_page_size),
+                        self.export_page_size)
+        lexical_index.rebuild(([record["id"] for record in page], [record["document"] for record in page])
+                              for page in pages)
+        return {"message": "Lexical index rebuilt", "documents": len(lexical_index)}
 
     def delete_collection(self, collection_name):
         chroma_repo = self.get_chroma_repo(collection_name)
         self.logger.info(f"Deleting collection: {collection_name}")
-        chroma_repo.delete_collection(collection_name)
+        chroma_repo.delete_collection()
+        self.manifest_repo.delete_collection(collection_name)
+        lexical_index = self.get_lexical_index(collection_name)
+        if lexical_index is not None:
+            lexical_index.delete()
+        self.get_snapshot(collection_name).delete()
         return {"message": f"Collection '{collection_name}' deleted successfully"}
 
     def delete_all_collections(self):
         self.logger.info("Deleting all collections")
-        chroma_repo = ChromaRepository()
+        chroma_repo = self.get_chroma_repo("vehicle_collection")
         chroma_repo.delete_all_collections()
+        self.manifest_repo.delete_all()
+        with self._chroma_repos_lock:
+            for lexical_index in self._lexical_indexes.values():
+                lexical_index.delete()
+            self._lexical_indexes.clear()
+            for snapshot in self._snapshots.values():
+                snapshot.delete()
+            self._snapshots.clear()
+        LexicalIndexRepository.delete_all()
+        VectorSnapshotRepository.delete_all()
         return {"message": "All collections deleted successfully"}
 
     def process_text(self, text, collection_name):
@@ -38,40 +255,70 @@ class IngestionService:
         self.logger.info("Processing text input")
         try:
             text = self.clean_text(text)
-            docs = [text]
-            embeddings = self.create_embeddings(docs)
-            now = datetime.now().isoformat()
-            self.logger.debug(f"Documents: {docs}")
-            self.logger.debug(f"Embeddings: {embeddings}")
-            metadata = [{"update_time": now} for _ in docs]
-            ids = [f"text_input_vec0"]
-            chroma_repo.upsert_data(docs, embeddings, ids, metadata)
+            records, skipped = self.ingest_new_records(chroma_repo, "text_input", [text])
             self.logger.info("Ingestion complete")
-            items = [{"id": ids[0], "content": docs[0], "metadata": metadata[0]}]
-            return {"message": "Ingestion complete", "items": items}
+            items = [{"id": id_, "content": doc, "metadata": meta} for id_, doc, meta in records]
+            return {"message": "Ingestion complete", "items": items, "skipped": skipped}
         except Exception as e:
             self.logger.error(f"Error processing text: {str(e)}")
             raise ValueError("Failed to process text input")
 
-    def process_pdf(self, file_path, collection_name):
+    def reusable_ids(self, previous, file_hash=None):
+        """
+        Return the chunk ids of a manifest entry that can be kept without re-embedding.
+
+        Ids are content-derived, so after a change to the chunker, the embedding model or
+        backend, or the metadata schema the same ids may hold stale vectors or metadata;
+        none of them is reused then. With `file_hash`, the ids are only returned when the
+        file is unchanged too.
+        """
+        if not previous or previous.get("fingerprint") != self.ingest_fingerprint:
+            return None
+        if file_hash is not None and previous["file_hash"] != file_hash:
+            return None
+        return set(previous["chunk_ids"])
+
+    def process_pdf(self, file_path, collection_name, progress_callback=None):
         chroma_repo = self.get_chroma_repo(collection_name)
         self.logger.info(f"Processing file: {file_path}")
         try:
-            raw_docs = self.load_pdf(file_path)
-            docs = self.split_text(raw_docs)
-            cleaned_docs = [self.clean_text(doc) for doc in docs]
-            meaningful_docs = [doc for doc in cleaned_docs if len(doc.split()) > 5]
-            embeddings = self.create_embeddings(meaningful_docs)
-            base_filename = os.path.splitext(os.path.basename(file_path))[0]
-            now = datetime.now().isoformat()
-            self.logger.debug(f"Documents: {meaningful_docs}")
-            self.logger.debug(f"Embeddings: {embeddings}")
-            metadata = [{"update_time": now} for _ in meaningful_docs]
-            ids = [f"{base_filename}_vec{idx}" for idx, _ in enumerate(meaningful_docs)]
-            chroma_repo.upsert_data(meaningful_docs, embeddings, ids, metadata)
+            source = os.path.basename(file_path)
+            base_filename = os.path.splitext(source)[0]
+            file_hash = hash_file(file_path)
+            previous = self.manifest_repo.get_source(collection_name, source)
+            if self.reusable_ids(previous, file_hash) is not None:
+                self.logger.info(f"File unchanged since last ingestion, skipping: {file_path}")
+                return {"message": "File unchanged, ingestion skipped", "file": base_filename,
+                        "chunks": len(previous["chunk_ids"]), "skipped": True}
+            previous_ids = set(previous["chunk_ids"]) if previous else set()
+            kept_ids = self.reusable_ids(previous)
+            if previous and kept_ids is None:
+                self.logger.info(f"Ingestion settings changed since last ingestion, re-embedding: {file_path}")
+            kept_ids = kept_ids or set()
+
+            self.logger.info(f"Loading PDF file: {file_path}")
+            chunks = text_processing.iter_pdf_chunks(file_path, self.chunker)
+            chunk_ids = []
+            kept_records = []
+
+            def changed_records():
+                for record in self.content_records(base_filename, chunks):
+                    chunk_ids.append(record[0])
+                    if record[0] not in kept_ids:
+                        yield record
+                    else:
+                        kept_records.append(record)
+
+            stats = self.ingest_records(chroma_repo, changed_records(), progress_callback=progress_callback)
+            metadata_updated = self.refresh_metadata(chroma_repo, kept_records)
+            removed_ids = sorted(previous_ids.difference(chunk_ids))
+            chroma_repo.delete_data(removed_ids)
+            self.publish_collection(collection_name, removed_ids)
+            self.manifest_repo.update_source(collection_name, source, file_hash, chunk_ids, self.ingest_fingerprint)
             self.logger.info("Ingestion complete")
-            items = [{"id": id_, "content": doc, "metadata": meta} for id_, doc, meta in zip(ids, meaningful_docs, metadata)]
-            return {"message": "Ingestion complete", "items": items}
+            return {"message": "Ingestion complete", "file": base_filename, **stats,
+                    "chunks": len(chunk_ids), "upserted": stats["chunks"], "metadata_updated": metadata_updated,
+                    "deleted": len(removed_ids)}
         except Exception as e:
             self.logger.error(f"Error processing PDF: {str(e)}")
             raise ValueError("Failed to process PDF")
@@ -84,16 +331,10 @@ class IngestionService:
             doc = nlp(text)
             docs = [self.clean_text(sent.text) for sent in doc.sents]
             meaningful_docs = [doc for doc in docs if len(doc.split()) > 5]
-            embeddings = self.create_embeddings(meaningful_docs)
-            now = datetime.now().isoformat()
-            self.logger.debug(f"Documents: {meaningful_docs}")
-            self.logger.debug(f"Embeddings: {embeddings}")
-            metadata = [{"update_time": now} for _ in meaningful_docs]
-            ids = [f"semantic_chunk_vec{idx}" for idx, _ in enumerate(meaningful_docs)]
-            chroma_repo.upsert_data(meaningful_docs, embeddings, ids, metadata)
+            records, skipped = self.ingest_new_records(chroma_repo, "semantic_chunk", meaningful_docs)
             self.logger.info("Ingestion complete")
-            items = [{"id": id_, "content": doc, "metadata": meta} for id_, doc, meta in zip(ids, meaningful_docs, metadata)]
-            return {"message": "Ingestion complete", "items": items}
+            items = [{"id": id_, "content": doc, "metadata": meta} for id_, doc, meta in records]
+            return {"message": "Ingestion complete", "items": items, "skipped": skipped}
         except Exception as e:
             self.logger.error(f"Error processing text: {str(e)}")
             raise ValueError("Failed to process text input")
@@ -102,115 +343,593 @@ class IngestionService:
         chroma_repo = self.get_chroma_repo(collection_name)
         self.logger.info("Processing text using Token Text Splitter")
         try:
-            words = word_tokenize(self.clean_text(text))
-            chunk_size = 50
-            docs = [' '.join(words[i:i + chunk_size]) for i in range(0, len(words), chunk_size)]
+            docs = self.chunker.split(self.clean_text(text))
             meaningful_docs = [doc for doc in docs if len(doc.split()) > 5]
-            embeddings = self.create_embeddings(meaningful_docs)
-            now = datetime.now().isoformat()
-            self.logger.debug(f"Documents: {meaningful_docs}")
-            self.logger.debug(f"Embeddings: {embeddings}")
-            metadata = [{"update_time": now} for _ in meaningful_docs]
-            ids = [f"token_text_split_vec{idx}" for idx, _ in enumerate(meaningful_docs)]
-            chroma_repo.upsert_data(meaningful_docs, embeddings, ids, metadata)
+            records, skipped = self.ingest_new_records(chroma_repo, "token_text_split", meaningful_docs)
             self.logger.info("Ingestion complete")
-            items = [{"id": id_, "content": doc, "metadata": meta} for id_, doc, meta in zip(ids, meaningful_docs, metadata)]
-            return {"message": "Ingestion complete", "items": items}
+            items = [{"id": id_, "content": doc, "metadata": meta} for id_, doc, meta in records]
+            return {"message": "Ingestion complete", "items": items, "skipped": skipped}
         except Exception as e:
             self.logger.error(f"Error processing text: {str(e)}")
             raise ValueError("Failed to process text input")
 
-    def process_all_pdfs_in_directory(self, directory_path, collection_name):
+    def process_all_pdfs_in_directory(self, directory_path, collection_name, progress_callback=None):
+        """
+        Ingest every PDF in a directory through a three-stage pipeline.
+
+        PDFs are parsed and cleaned in a process pool, chunks from all files are
+        embedded in shared batches on this thread, and a background ChromaWriter
+        persists each batch while the next one is being encoded.
+        """
         chroma_repo = self.get_chroma_repo(collection_name)
         self.logger.info(f"Processing all PDFs in directory: {directory_path}")
+        started = time.perf_counter()
+        file_paths = []
+        file_hashes = {}
+        previous_ids = {}
+        kept_ids = {}
+        kept_records = {}
+        chunk_ids = {}
+        upserted = {}
+        skipped = {}
+        errors = []
+        for filename in sorted(os.listdir(directory_path)):
+            if not filename.endswith('.pdf'):
+                continue
+            file_path = os.path.join(directory_path, filename)
+            file_paths.append(file_path)
+            try:
+                file_hashes[file_path] = hash_file(file_path)
+            except Exception as e:
+                self.logger.error(f"Failed to process file {file_path}: {str(e)}")
+                errors.append({"file": file_path, "error": str(e)})
+                continue
+            previous = self.manifest_repo.get_source(collection_name, filename)
+            if self.reusable_ids(previous, file_hashes[file_path]) is not None:
+                skipped[file_path] = len(previous["chunk_ids"])
+            else:
+                previous_ids[file_path] = set(previous["chunk_ids"]) if previous else set()
+                kept_ids[file_path] = self.reusable_ids(previous) or set()
+
+        pending = []
+        writer = ChromaWriter(chroma_repo, max_pending=self.write_queue_size)
+        lexical_index = self.get_lexical_index(collection_name)
+        projection_stage = self.get_projection_stage(chroma_repo)
+        mp_context = multiprocessing.get_context(self.parse_start_method)
+        progress = {"files_total": len(file_paths), "files_skipped": len(skipped), "files_parsed": 0,
+                    "chunks_embedded": 0}
+
+        def report_progress():
+            if progress_callback:
+                progress_callback(dict(progress))
+
+        def submit(batch, embeddings):
+            writer.submit(
+                [record[0] for record in batch],
+                [record[1] for record in batch],
+                embeddings,
+                [record[2] for record in batch],
+                sources={record[3] for record in batch},
+            )
+
+        def flush(batch):
+            docs = [record[1] for record in batch]
+            embeddings = self.create_embeddings(docs)
+            if lexical_index is not None:
+                lexical_index.add([record[0] for record in batch], docs)
+            if projection_stage is None:
+                submit(batch, embeddings)
+            else:
+                for projected, held_batch in projection_stage.push(embeddings, batch):
+                    submit(held_batch, projected)
+            progress["chunks_embedded"] += len(batch)
+            report_progress()
+
+        report_progress()
+
+        try:
+            with ProcessPoolExecutor(max_workers=self.parse_workers, mp_context=mp_context) as pool:
+                queued = iter(list(previous_ids))
+                in_flight = {}
+                # Keep at most two files per worker parsed ahead of the embedding stage.
+                for file_path in queued:
+                    in_flight[pool.submit(text_processing.parse_pdf_file, file_path, self.chunker_config)] = file_path
+                    if len(in_flight) >= self.parse_workers * 2:
+                        break
+                while in_flight:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        file_path = in_flight.pop(future)
+                        next_path = next(queued, None)
+                        if next_path is not None:
+                            in_flight[pool.submit(text_processing.parse_pdf_file, next_path, self.chunker_config)] = next_path
+                        progress["files_parsed"] += 1
+                        try:
+                            chunks = future.result()
+                        except Exception as e:
+                            self.logger.error(f"Failed to process file {file_path}: {str(e)}")
+                            errors.append({"file": file_path, "error": str(e)})
+                            report_progress()
+                            continue
+                        report_progress()
+                        base_filename = os.path.splitext(os.path.basename(file_path))[0]
+                        chunk_ids[file_path] = []
+                        kept_records[file_path] = []
+                        upserted[file_path] = 0
+                        for record in self.content_records(base_filename, chunks):
+                            chunk_ids[file_path].append(record[0])
+                            if record[0] in kept_ids[file_path]:
+                                kept_records[file_path].append(record)
+                            else:
+                                upserted[file_path] += 1
+                                pending.append(record + (file_path,))
+                        while len(pending) >= self.ingest_batch_size:
+                            flush(pending[:self.ingest_batch_size])
+                            del pending[:self.ingest_batch_size]
+            if pending:
+                flush(pending)
+            if projection_stage is not None:
+                for projected, held_batch in projection_stage.close():
+                    submit(held_batch, projected)
+        finally:
+            write_errors = writer.close()
+
+        for file_path, error in write_errors.items():
+            self.logger.error(f"Failed to write file {file_path}: {error}")
+            errors.append({"file": file_path, "error": error})
+            chunk_ids.pop(file_path, None)
+
+        deleted = {}
+        metadata_updated = {}
+        manifest_entries = {}
+        all_removed_ids = []
+        for file_path, ids in chunk_ids.items():
+            removed_ids = sorted(previous_ids[file_path].difference(ids))
+            try:
+                metadata_updated[file_path] = self.refresh_metadata(chroma_repo, kept_records[file_path])
+                chroma_repo.delete_data(removed_ids)
+            except Exception as e:
+                errors.append({"file": file_path, "error": str(e)})
+                continue
+            deleted[file_path] = len(removed_ids)
+            all_removed_ids.extend(removed_ids)
+            manifest_entries[os.path.basename(file_path)] = (file_hashes[file_path], ids)
+        self.publish_collection(collection_name, all_removed_ids)
+        self.manifest_repo.update_sources(collection_name, manifest_entries, self.ingest_fingerprint)
+
         results = []
-        for filename in os.listdir(directory_path):
-            if filename.endswith('.pdf'):
-                file_path = os.path.join(directory_path, filename)
-                try:
-                    result = self.process_pdf(file_path, collection_name)
-                    results.append(result)
-                except Exception as e:
-                    self.logger.error(f"Failed to process file {file_path}: {str(e)}")
-        self.logger.info("All PDFs processed")
-        return {"message": "All PDFs processed", "results": results}
-
-    def load_pdf(self, file_path):
-        self.logger.info(f"Loading PDF file: {file_path}")
-        doc = fitz.open(file_path)
-        texts = [page.get_text() for page in doc]
-        return texts
-
-    def split_text(self, texts):
-        self.logger.info(f"Splitting texts into chunks")
-        CHUNK_SIZE = 1000
-        chunks = []
-        for text in texts:
-            for i in range(0, len(text), CHUNK_SIZE):
-                chunk = text[i:i + CHUNK_SIZE]
-                chunks.append(chunk)
-        self.logger.debug(f"Text split into {len(chunks)} chunks")
-        return chunks
+        for file_path in file_paths:
+            base_filename = os.path.splitext(os.path.basename(file_path))[0]
+            if file_path in skipped:
+                results.append({"message": "File unchanged, ingestion skipped", "file": base_filename,
+                                "chunks": skipped[file_path], "skipped": True})
+            elif file_path in deleted:
+                results.append({"message": "Ingestion complete", "file": base_filename,
+                                "chunks": len(chunk_ids[file_path]), "upserted": upserted[file_path],
+                                "metadata_updated": metadata_updated[file_path], "deleted": deleted[file_path]})
+        elapsed = time.perf_counter() - started
+        total = sum(upserted[file_path] for file_path in deleted)
+        chunks_per_sec = total / elapsed if elapsed > 0 else 0.0
+        self.logger.info(f"All PDFs processed: {total} chunks in {elapsed:.2f}s ({chunks_per_sec:.1f} chunks/sec)")
+        return {
+            "message": "All PDFs processed",
+            "results": results,
+            "errors": errors,
+            "chunks": total,
+            "seconds": round(elapsed, 3),
+            "chunks_per_sec": round(chunks_per_sec, 1),
+        }
 
     def clean_text(self, text):
-        # Remove 특수기호, 심볼, whitespace 삭제
-        clean_text = re.sub(r'[\W_]+', ' ', text)  # text만 추출
-        # page number, footer 삭제
-        clean_text = re.sub(r'(\b\d{1,2}\b)(?:\s[.\W_]+)*', '', clean_text)
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-        return clean_text
+        return text_processing.clean_text(text)
 
     def create_embeddings(self, texts):
         self.logger.info(f"Creating embeddings")
-        embeddings = self.embed_model.encode(texts)
+        if self.embedding_cache is None:
+            embeddings = self.embed_model.encode(texts, batch_size=self.embed_batch_size)
+            self.logger.debug(f"Created embeddings: {embeddings[:5]}")
+            return embeddings
+
+        keys = [self.embedding_cache_key(text) for text in texts]
+        cached = self.embedding_cache.get_many(keys)
+        missing = {}
+        for idx, key in enumerate(keys):
+            if key not in cached:
+                missing.setdefault(key, idx)
+        if missing:
+            # Only cache misses go to the model, in a single batch.
+            encoded = self.embed_model.encode([texts[idx] for idx in missing.values()], batch_size=self.embed_batch_size)
+            fresh = dict(zip(missing, encoded))
+            self.embedding_cache.put_many(fresh.items())
+            cached.update(fresh)
+        self.logger.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} misses")
+        embeddings = np.array([cached[key] for key in keys], dtype=np.float32)
         self.logger.debug(f"Created embeddings: {embeddings[:5]}")
         return embeddings
 
-    def search(self, query, collection_name):
-        chroma_repo = self.get_chroma_repo(collection_name)
+    def embedding_cache_key(self, text):
+        normalized = " ".join(text.split())
+        return f"{self.embed_model_name}:{self.embed_backend}:{hash_text(normalized)}"
+
+    def get_embedding_cache_stats(self):
+        if self.embedding_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.embedding_cache.get_stats()}
+
+    def iter_embedded_batches(self, records):
+        """
+        Embed (id, document, metadata) records in bounded batches.
+
+        Only one batch of documents and embeddings is alive at a time, so memory
+        does not grow with the length of the source document.
+        """
+        for batch in batched(records, self.ingest_batch_size):
+            ids = [record[0] for record in batch]
+            docs = [record[1] for record in batch]
+            metadata = [record[2] for record in batch]
+            embeddings = self.create_embeddings(docs)
+            yield docs, embeddings, ids, metadata
+
+    @staticmethod
+    def _index_lexical_batches(batches, lexical_index):
+        # Staged only; callers commit once the whole ingestion has been written.
+        for batch in batches:
+            lexical_index.add(batch[2], batch[0])
+            yield batch
+
+    @staticmethod
+    def _report_written_batches(batches, progress_callback):
+        written = 0
+        for batch in batches:
+            yield batch
+            # The consumer asks for the next batch only after writing this one.
+            written += len(batch[2])
+            progress_callback({"chunks_written": written})
+
+    def content_records(self, prefix, chunks):
+        """
+        Turn (document, metadata) chunks into (id, document, metadata) records with content-derived ids.
+
+        Metadata gains the chunk's position in its source and the ingestion time, both as the
+        ISO string kept for display and as an epoch timestamp that Chroma can range-filter.
+        """
+        now = datetime.now()
+        update_time = now.isoformat()
+        update_timestamp = int(now.timestamp())
+        seen = set()
+        for doc, metadata in chunks:
+            record_id = content_id(prefix, doc)
+            if record_id in seen:
+                continue
+            seen.add(record_id)
+            yield record_id, doc, {
+                "source": prefix,
+                **metadata,
+                "chunk_index": len(seen) - 1,
+                "update_time": update_time,
+                "update_timestamp": update_timestamp,
+            }
+
+    def refresh_metadata(self, chroma_repo, records):
+        """
+        Update the stored metadata of unchanged chunks whose position metadata moved.
+
+        A chunk keeps its content-derived id when text before it is edited, but its page,
+        character offsets and chunk_index may change; those records get the new metadata
+        through a metadata-only update instead of being re-embedded. Returns the number
+        of records updated.
+        """
+        if not records:
+            return 0
+        stored = chroma_repo.get_records([record[0] for record in records], include=["metadatas"])
+        ignored = ("update_time", "update_timestamp")
+
+        def position(metadata):
+            return {key: value for key, value in (metadata or {}).items() if key not in ignored}
+
+        changed = [record for record in records
+                   if record[0] in stored and position(stored[record[0]]["metadata"]) != position(record[2])]
+        chroma_repo.update_metadata([record[0] for record in changed], [record[2] for record in changed])
+        return len(changed)
+
+    def ingest_new_records(self, chroma_repo, prefix, docs):
+        """Ingest free-text chunks, skipping those whose content is already stored."""
+        records = list(self.content_records(prefix, ((doc, {"source": prefix}) for doc in docs)))
+        existing_ids = chroma_repo.get_existing_ids([record[0] for record in records])
+        self.ingest_records(chroma_repo, [record for record in records if record[0] not in existing_ids])
+        self.publish_collection(chroma_repo.collection_name)
+        return records, len(existing_ids)
+
+    def ingest_records(self, chroma_repo, records, progress_callback=None):
+        started = time.perf_counter()
+        batches = self.iter_embedded_batches(records)
+        projection_stage = self.get_projection_stage(chroma_repo)
+        if projection_stage is not None:
+            batches = projection_stage.project_stream(batches, embedding_index=1)
+        lexical_index = self.get_lexical_index(chroma_repo.collection_name)
+        if lexical_index is not None:
+            batches = self._index_lexical_batches(batches, lexical_index)
+        if progress_callback:
+            batches = self._report_written_batches(batches, progress_callback)
+        total = chroma_repo.upsert_stream(batches)
+        elapsed = time.perf_counter() - started
+        chunks_per_sec = total / elapsed if elapsed > 0 else 0.0
+        self.logger.info(f"Ingested {total} chunks in {elapsed:.2f}s ({chunks_per_sec:.1f} chunks/sec)")
+        return {"chunks": total, "seconds": round(elapsed, 3), "chunks_per_sec": round(chunks_per_sec, 1)}
+
+    def search(self, query, collection_name, top_k=None, mmr=None, fetch_k=None, mode=None, where=None,
+               where_document=None):
+        """
+        Return the closest chunk, or the top_k chunks when top_k is given.
+
+        With mmr enabled, fetch_k candidates are fetched with their embeddings in one query
+        and top_k of them are picked by maximal marginal relevance. mode="hybrid" instead
+        fuses fetch_k vector hits and fetch_k BM25 hits with reciprocal-rank fusion.
+        where and where_document are Chroma filters applied inside the query. collection_name
+        may be a list, in which case the collections are searched in parallel and merged.
+        """
+        chroma_repo = self.get_search_repo(collection_name)
         try:
             self.logger.info(f"Searching for query: {query}")
 
             # Create query embedding
-            query_embedding = self.embed_model.encode([query])[0].tolist()
+            query_embedding = self.project_queries(collection_name, self.embed_query(query))
             self.logger.debug(f"Query embedding created: {query_embedding}")
 
-            search_results = chroma_repo.query_data(query_embedding, n_results=10)
-            self.logger.debug(f"Search results from Chroma DB: {search_results}")
+            filters = {"where": where or None, "where_document": where_document or None}
+            multi_collection = self.is_multi_collection(collection_name)
+            mode = mode or self.retrieval_mode
+            if mode == "hybrid":
+                if multi_collection:
+                    raise ValueError("Hybrid search supports a single collection")
+                return self._search_hybrid(chroma_repo, query, query_embedding, top_k, fetch_k, filters)
+            if mode != "vector":
+                raise ValueError(f"Unsupported search mode '{mode}'")
+            if top_k is None:
+                return self._search_closest(chroma_repo, query_embedding, filters, multi_collection)
 
-            if not search_results or not search_results.get("ids"):
+            top_k = int(top_k)
+            mmr = self.retrieval_mmr if mmr is None else mmr
+            n_results = max(int(fetch_k or self.retrieval_fetch_k), top_k) if mmr else top_k
+            include = ["metadatas", "documents", "distances"] + (["embeddings"] if mmr else [])
+            search_results = self._query_vectors(
+                chroma_repo, query_embedding, n_results, include, filters, multi_collection
+            )
+            if not search_results or not search_results.get("ids") or not search_results["ids"][0]:
                 raise ValueError("Search results are empty")
 
-            # Extract results
             ids = search_results["ids"][0]
-            distances = search_results["distances"][0]
-            documents = search_results["documents"][0]
-            metadatas = search_results["metadatas"][0]
-
-            # Find the result with the closest distance
-            closest_distance = float('inf')
-            closest_result = None
-            for result_id, distance, document, metadata in zip(ids, distances, documents, metadatas):
-                self.logger.debug(f"Result - ID: {result_id}, Distance: {distance}, Document: {document}, Metadata: {metadata}")
-                if distance < closest_distance:
-                    closest_distance = distance
-                    closest_result = {
-                        "id": result_id,
-                        "distance": distance,
-                        "document": document,
-                        "metadata": metadata
-                    }
+            if mmr:
+                order = mmr_select(
+                    query_embedding, search_results["embeddings"][0], top_k, self.retrieval_mmr_lambda
+                )
+            else:
+                order = range(len(ids))
+            results = [
+                {
+                    "id": ids[i],
+                    "distance": search_results["distances"][0][i],
+                    "document": search_results["documents"][0][i],
+                    "metadata": search_results["metadatas"][0][i]
+                }
+                for i in order
+            ]
+            self.logger.info(f"Search complete, {len(results)} of {len(ids)} candidates selected")
+            return {"message": "Search complete", "results": results}
 
-            if closest_result is None:
-                raise ValueError("No suitable result found")
+        except Exception as e:
+            self.logger.error(f"Error searching Chroma DB: {str(e)}")
+            return {"error": str(e)}
+
+    def search_batch(self, queries, collection_name, n_results=5):
+        """
+        Search many queries with one model call and one Chroma query per distinct filter.
+
+        Each query is a string or a dict with "query" and optional "n_results", "where" and
+        "where_document". Results are returned in input order.
+        """
+        chroma_repo = self.get_search_repo(collection_name)
+        try:
+            entries = [query if isinstance(query, dict) else {"query": query} for query in queries]
+            if any(not entry.get("query") for entry in entries):
+                raise ValueError("Every batch entry needs a query")
+            self.logger.info(f"Batch searching {len(entries)} queries")
+            query_embeddings = self.project_queries(
+                collection_name, self.embed_queries([entry["query"] for entry in entries])
+            )
 
-            self.logger.info(f"Search complete, closest result: {closest_result}")
-            return {"message": "Search complete", "results": closest_result}
+            groups = {}
+            for index, entry in enumerate(entries):
+                filters = json.dumps([entry.get("where"), entry.get("where_document")], sort_keys=True)
+                groups.setdefault(filters, []).append(index)
+
+            results = [None] * len(entries)
+            for indices in groups.values():
+                first = entries[indices[0]]
+                limits = [int(entries[index].get("n_results", n_results)) for index in indices]
+                search_results = chroma_repo.query_data_batch(
+                    [query_embeddings[index] for index in indices],
+                    n_results=max(limits),
+                    where=first.get("where") or None,
+                    where_document=first.get("where_document") or None
+                )
+                if search_results is None:
+                    raise ValueError("Batch query failed")
+                for row, (index, limit) in enumerate(zip(indices, limits)):
+                    results[index] = {
+                        "query": entries[index]["query"],
+                        "results": [
+                            {
+                                "id": result_id,
+                                "distance": distance,
+                                "document": document,
+                                "metadata": metadata
+                            }
+                            for result_id, distance, document, metadata in zip(
+                                search_results["ids"][row][:limit],
+                                search_results["distances"][row],
+                                search_results["documents"][row],
+                                search_results["metadatas"][row]
+                            )
+                        ]
+                    }
+
+            self.logger.info(f"Batch search complete, {len(entries)} queries in {len(groups)} Chroma queries")
+            return {"message": "Search complete", "results": results}
 
         except Exception as e:
-            self.logger.error(f"Error searching Chroma DB: {str(e)}")
+            self.logger.error(f"Error batch searching Chroma DB: {str(e)}")
             return {"error": str(e)}
 
+    def _query_vectors(self, chroma_repo, query_embedding, n_results, include, filters, multi_collection=False):
+        # Unfiltered single-collection queries are answered from the mmap snapshot when serving
+        # from one; filters, fan-outs and collections without a published snapshot go to Chroma.
+        if self.snapshot_serving and not any(filters.values()) and not multi_collection:
+            results = self.get_snapshot(chroma_repo.collection_name).search(
+                query_embedding, n_results, include_embeddings="embeddings" in (include or [])
+            )
+            if results is not None:
+                return results
+        return chroma_repo.query_data(query_embedding, n_results=n_results, include=include, **filters)
+
+    def _search_hybrid(self, chroma_repo, query, query_embedding, top_k, fetch_k, filters):
+        top_k = int(top_k or self.retrieval_top_k)
+        fetch_k = max(int(fetch_k or self.retrieval_fetch_k), top_k)
+        lexical_index = self.get_lexical_index(chroma_repo.collection_name)
+        if lexical_index is None:
+            raise ValueError("Hybrid search requires the lexical index")
+
+        search_results = self._query_vectors(chroma_repo, query_embedding, fetch_k, None, filters)
+        records = {}
+        vector_ids = []
+        if search_results and search_results.get("ids"):
+            for result_id, distance, document, metadata in zip(
+                search_results["ids"][0], search_results["distances"][0],
+                search_results["documents"][0], search_results["metadatas"][0]
+            ):
+                vector_ids.append(result_id)
+                records[result_id] = {"distance": distance, "document": document, "metadata": metadata}
+        lexical_ids = [result_id for result_id, _ in lexical_index.search(query, fetch_k)]
+
+        fused = reciprocal_rank_fusion([vector_ids, lexical_ids], k=self.rrf_k)
+        # BM25-only hits still need their document and metadata from Chroma, which also
+        # drops the ones excluded by the filters.
+        lexical_only = [result_id for result_id, _ in fused if result_id not in records]
+        for result_id, record in chroma_repo.get_records(lexical_only, **filters).items():
+            records[result_id] = {"distance": None, **record}
+        results = [
+            {"id": result_id, **records[result_id], "score": score}
+            for result_id, score in fused if result_id in records
+        ][:top_k]
+        if not results:
+            raise ValueError("Search results are empty")
+        self.logger.info(
+            f"Hybrid search complete, {len(vector_ids)} vector and {len(lexical_ids)} lexical hits fused into {len(results)}"
+        )
+        return {"message": "Search complete", "results": results}
+
+    def _search_closest(self, chroma_repo, query_embedding, filters, multi_collection=False):
+        search_results = self._query_vectors(chroma_repo, query_embedding, 1, None, filters, multi_collection)
+        self.logger.debug(f"Search results from Chroma DB: {search_results}")
+
+        if not search_results or not search_results.get("ids") or not search_results["ids"][0]:
+            raise ValueError("Search results are empty")
+
+        closest_result = {
+            "id": search_results["ids"][0][0],
+            "distance": search_results["distances"][0][0],
+            "document": search_results["documents"][0][0],
+            "metadata": search_results["metadatas"][0][0]
+        }
+        self.logger.info(f"Search complete, closest result: {closest_result}")
+        return {"message": "Search complete", "results": closest_result}
+
+    def count_tokens(self, text):
+        return len(self.embed_model.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+    def embed_query(self, query):
+        """Return the query embedding, reusing cached embeddings of previously seen questions."""
+        return self.embed_queries([query])[0]
+
+    def embed_queries(self, queries):
+        """Return one embedding per query; every cache miss is encoded in a single model call."""
+        keys = []
+        for query in queries:
+            normalized = " ".join(query.split()).lower()
+            keys.append(f"{self.embed_model_name}:{self.embed_backend}:{hash_text(normalized)}")
+        embeddings = {}
+        for key in set(keys):
+            query_embedding = self.query_cache.get(key)
+            if query_embedding is not None:
+                embeddings[key] = query_embedding
+
+        missing = [key for key in dict.fromkeys(keys) if key not in embeddings]
+        if missing and self.query_cache_shared:
+            try:
+                shared = cache.get_many(*[f"query_embedding:{key}" for key in missing])
+            except Exception as e:
+                self.logger.error(f"Error when fetching shared query embeddings: {e}")
+                shared = [None] * len(missing)
+            for key, query_embedding in zip(missing, shared):
+                if query_embedding is not None:
+                    embeddings[key] = query_embedding
+                    self.query_cache.set(key, query_embedding)
+            missing = [key for key in missing if key not in embeddings]
+
+        if missing:
+            texts = {key: query for key, query in zip(keys, queries)}
+            encoded = self.embed_model.encode([texts[key] for key in missing], batch_size=self.embed_batch_size)
+            for key, query_embedding in zip(missing, encoded):
+                embeddings[key] = query_embedding.tolist()
+                self.query_cache.set(key, embeddings[key])
+            if self.query_cache_shared:
+                try:
+                    cache.set_many(
+                        {f"query_embedding:{key}": embeddings[key] for key in missing}, timeout=self.query_cache_ttl
+                    )
+                except Exception as e:
+                    self.logger.error(f"Error when caching shared query embeddings: {e}")
+        return [embeddings[key] for key in keys]
+
+    def get_query_cache_stats(self):
+        return {"shared": self.query_cache_shared, "ttl": self.query_cache_ttl, **self.query_cache.get_stats()}
+
+    def warm_up(self, collection_names):
+        """
+        Page in the embedding model and each collection's indexes before serving traffic.
+
+        Runs one dummy encode, then opens every collection and sends it a single-result
+        query so Chroma loads its HNSW index; the lexical index and the snapshot are
+        opened too when they are in use. Bypasses the query embedding cache so the model
+        actually runs. Missing collections are skipped, not created, and timed as None.
+        """
+        started = time.perf_counter()
+        query_embedding = self.embed_model.encode(["warm-up query"], batch_size=1)[0].tolist()
+        timings = {"encode": round(time.perf_counter() - started, 3)}
+        for collection_name in collection_names:
+            collection_started = time.perf_counter()
+            chroma_repo = self.open_chroma_repo(collection_name)
+            if chroma_repo is None:
+                self.logger.warning(f"Skipping warm-up of missing collection '{collection_name}'")
+                timings[collection_name] = None
+                continue
+            self._query_vectors(
+                chroma_repo, self.project_queries(collection_name, query_embedding), 1, ["distances"], {}
+            )
+            lexical_index = self.get_lexical_index(collection_name)
+            if lexical_index is not None:
+                lexical_index.search("warm-up query", n_results=1)
+            timings[collection_name] = round(time.perf_counter() - collection_started, 3)
+        self.logger.info(f"Warm-up finished in {time.perf_counter() - started:.2f}s: {timings}")
+        return timings
+
+    def export_records(self, collection_name, include=None, where=None, where_document=None):
+        """Stream every record of a collection page by page; see ChromaRepository.iter_records."""
+        chroma_repo = self.get_chroma_repo(collection_name)
+        return chroma_repo.iter_records(
+            include=include, page_size=self.export_page_size, where=where or None, where_document=where_document or None
+        )
+
     def get_all_data(self, collection_name):
         chroma_repo = self.get_chroma_repo(collection_name)
         try:
@@ -221,33 +940,37 @@ class IngestionService:
             self.logger.error(f"An error occurred while retrieving all data: {e}")
             return {"results": []}
 
-    def visualize_embeddings_with_tensorboard(self, collection_name, log_dir=None):
-        chroma_repo = self.get_chroma_repo(collection_name)
-        self.logger.info("Visualizing embeddings with TensorBoard")
-        data = chroma_repo.get_all_data()
-        if data is None or "results" not in data or not data["results"]:
-            self.logger.warning("No data found or data format is incorrect in Chroma repository.")
-            return
+    def visualize_embeddings_with_tensorboard(self, collection_name, log_dir=None, max_records=None):
+        """
+        Export up to max_records embeddings of a collection for the TensorBoard projector.
+
+        Records are read page by page and only the first max_records (TENSORBOARD_MAX_RECORDS,
+        default 10000) are kept, so a large collection is not loaded into memory whole.
+        Returns the number of exported records.
+        """
+        # TensorFlow is only needed for this export, so it is not imported with the service.
+        from app.utils.tensorboard_helper import save_embeddings, setup_tensorboard
+
+        if max_records is None:
+            max_records = self.tensorboard_max_records
         if log_dir is None:
             log_dir = self.tensorboard_logs
-        self.logger.debug(f"Data retrieved: {data['results']}")
+        self.logger.info("Visualizing embeddings with TensorBoard")
+        chroma_repo = self.get_chroma_repo(collection_name)
+        records = chroma_repo.iter_records(include=["documents", "embeddings"],
+                                           page_size=min(self.export_page_size, max_records))
         embeddings = []
         metadata = []
-        for record in data["results"]:
-            self.logger.debug(f"Processing record: {record}")
-            if isinstance(record, dict) and "embedding" in record and "document" in record:
-                embedding = record["embedding"]
-                document = record["document"]
-                if embedding and document:
-                    embeddings.append(embedding)
-                    metadata.append(document)
-                else:
-                    self.logger.error(f"Record missing 'embedding' or 'document': {record}")
+        for record in itertools.islice(records, max_records):
+            if record["embedding"] and record["document"]:
+                embeddings.append(record["embedding"])
+                metadata.append(record["document"])
             else:
-                self.logger.error(f"Record is not in expected dictionary format: {record}")
-        if embeddings and metadata:
-            self.logger.info(f"Saving embeddings and metadata to {log_dir}")
-            save_embeddings(embeddings, metadata, log_dir)
-            setup_tensorboard(log_dir)
-        else:
-            self.logger.error("No valid embeddings or metadata to save.")
\ No newline at end of file
+                self.logger.error(f"Record missing 'embedding' or 'document': {record['id']}")
+        if not embeddings:
+            self.logger.warning(f"No embeddings to visualize in '{collection_name}'")
+            return 0
+        self.logger.info(f"Saving {len(embeddings)} embeddings and metadata to {log_dir}")
+        save_embeddings(embeddings, metadata, log_dir)
+        setup_tensorboard(log_dir)
+        return len(embeddings)
\ No newline at end of file
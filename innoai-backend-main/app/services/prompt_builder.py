@@ -0,0 +1,230 @@
+import json
+import logging
+import os
+import threading
+
+PROMPT_SECTIONS = ("system", "context", "history", "question")
+# Every chat message costs a few tokens of framing on top of its content.
+MESSAGE_OVERHEAD_TOKENS = 4
+TRUNCATION_MARKER = " …"
+
+
+def parse_budget_split(value):
+    """Parse "system=0.15,context=0.5,..." into {section: share}."""
+    shares = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        section, share = item.split("=", 1)
+        section = section.strip()
+        if section not in PROMPT_SECTIONS:
+            raise ValueError(f"Unknown prompt section '{section}', expected one of {PROMPT_SECTIONS}")
+        shares[section] = float(share)
+    missing = set(PROMPT_SECTIONS).difference(shares)
+    if missing:
+        raise ValueError(f"PROMPT_BUDGET_SPLIT is missing {sorted(missing)}")
+    total = sum(shares.values())
+    return {section: share / total for section, share in shares.items()}
+
+
+class TokenCounter:
+    """
+    Counts and truncates text with the model's tiktoken encoding.
+
+    Encodings are loaded once per model. When tiktoken cannot provide one (an unknown
+    model falls back to o200k_base; a missing package or an offline host without the
+    cached BPE file falls back to an estimate of four characters per token), a warning
+    is logged and counting continues with the estimate.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("TokenCounter")
+        self._encodings = {}
+        self._lock = threading.Lock()
+
+    def _encoding(self, model):
+        if model not in self._encodings:
+            with self._lock:
+                if model not in self._encodings:
+                    self._encodings[model] = self._load_encoding(model)
+        return self._encodings[model]
+
+    def _load_encoding(self, model):
+        try:
+            import tiktoken
+            try:
+                return tiktoken.encoding_for_model(model)
+            except KeyError:
+                return tiktoken.get_encoding("o200k_base")
+        except Exception as e:
+            self.logger.warning(f"No tiktoken encoding for model '{model}', estimating token counts: {e}")
+            return None
+
+    def count(self, model, text):
+        encoding = self._encoding(model)
+        if encoding is None:
+            return (len(text) + 3) // 4
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, model, text, max_tokens):
+        """
+        Keep the beginning of text within max_tokens, marking the cut.
+
+        Room is left for the marker's own token count, and the result is re-counted because
+        tokens can merge across the cut; the kept prefix shrinks until the whole fits.
+        """
+        if max_tokens <= 0:
+            return ""
+        if self.count(model, text) <= max_tokens:
+            return text
+        encoding = self._encoding(model)
+        tokens = None if encoding is None else encoding.encode(text, disallowed_special=())
+        keep = max_tokens - self.count(model, TRUNCATION_MARKER)
+        while keep > 0:
+            if encoding is None:
+                truncated = text[:keep * 4] + TRUNCATION_MARKER
+            else:
+                truncated = encoding.decode(tokens[:keep]) + TRUNCATION_MARKER
+            if self.count(model, truncated) <= max_tokens:
+                return truncated
+            keep -= 1
+        return ""
+
+
+class PromptBuilder:
+    """
+    Assembles chat completion messages within a token budget.
+
+    The budget (PROMPT_MAX_TOKENS) is split by PROMPT_BUDGET_SPLIT across the system
+    section (system message and template instructions, never truncated), the retrieved
+    context, the chat history and the question. The question and the context are cut to
+    their shares. The history is sent once, as chat messages, within its own share plus
+    whatever the other sections left of theirs, and never beyond the total budget. Turns
+    are kept newest first, so the oldest turns are dropped, and the oldest kept turn is
+    truncated when it does not fit whole.
+
+    Every build reports the tokens sent and the tokens saved compared with sending the
+    full history both as messages and inside the template, as the previous prompt did.
+    """
+
+    def __init__(self, system_message, template, token_counter=None):
+        self.logger = logging.getLogger("PromptBuilder")
+        self.system_message = system_message
+        self.template = template
+        self.token_counter = token_counter or TokenCounter()
+        self.max_tokens = int(os.getenv("PROMPT_MAX_TOKENS", "6000"))
+        self.shares = parse_budget_split(
+            os.getenv("PROMPT_BUDGET_SPLIT", "system=0.15,context=0.5,history=0.25,question=0.1")
+        )
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+
+    def _count(self, model, text):
+        return self.token_counter.count(model, text)
+
+    def _message_tokens(self, model, message):
+        return self._count(model, message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+    @staticmethod
+    def parse_history(chat_history):
+        if not chat_history:
+            return []
+        history = json.loads(chat_history) if isinstance(chat_history, str) else chat_history
+        return [{"role": entry["role"], "content": entry["content"]} for entry in history]
+
+    def build(self, model, question, chat_history, context):
+        """
+        Return the messages for one completion and the token accounting behind them.
+
+        Returns:
+            tuple[list[dict], dict]: The messages and a stats dict with the tokens per section,
+            prompt_tokens, unbudgeted_tokens, tokens_saved and the number of kept/dropped turns.
+        """
+        history = self.parse_history(chat_history)
+        budget = {section: int(self.max_tokens * share) for section, share in self.shares.items()}
+        truncated = []
+
+        system_tokens = (self._count(model, self.system_message) + MESSAGE_OVERHEAD_TOKENS
+                         + self._count(model, self.template.format(context="", question="")) + MESSAGE_OVERHEAD_TOKENS)
+        if system_tokens > budget["system"]:
+            self.logger.warning(f"System prompt uses {system_tokens} tokens, over its {budget['system']} token share")
+
+        question_tokens = self._count(model, question)
+        if question_tokens > budget["question"]:
+            question = self.token_counter.truncate(model, question, budget["question"])
+            question_tokens = self._count(model, question)
+            truncated.append("question")
+        context_tokens = self._count(model, context)
+        if context_tokens > budget["context"]:
+            context = self.token_counter.truncate(model, context, budget["context"])
+            context_tokens = self._count(model, context)
+            truncated.append("context")
+
+        # History gets its own share plus whatever the other sections did not use of theirs;
+        # a system prompt over its share is paid for out of the history.
+        unused = {"system": system_tokens, "context": context_tokens, "question": question_tokens}
+        history_budget = min(
+            budget["history"] + sum(max(budget[section] - used, 0) for section, used in unused.items()),
+            self.max_tokens - system_tokens - question_tokens - context_tokens
+        )
+        kept = []
+        history_tokens = 0
+        for message in reversed(history):
+            message_tokens = self._message_tokens(model, message)
+            if history_tokens + message_tokens <= history_budget:
+                kept.append(message)
+                history_tokens += message_tokens
+                continue
+            remaining = history_budget - history_tokens - MESSAGE_OVERHEAD_TOKENS
+            if remaining > 0:
+                kept.append({"role": message["role"],
+                             "content": self.token_counter.truncate(model, message["content"], remaining)})
+                history_tokens += self._message_tokens(model, kept[-1])
+                truncated.append("history")
+            break
+        kept.reverse()
+
+        messages = [{"role": "system", "content": self.system_message}] + kept + [
+            {"role": "user", "content": self.template.format(context=context, question=question)}
+        ]
+        prompt_tokens = system_tokens + history_tokens + context_tokens + question_tokens
+        unbudgeted_tokens = self._unbudgeted_tokens(model, history, chat_history, prompt_tokens, history_tokens)
+        stats = {
+            "budget": self.max_tokens,
+            "system": system_tokens,
+            "context": context_tokens,
+            "history": history_tokens,
+            "history_budget": history_budget,
+            "question": question_tokens,
+            "prompt_tokens": prompt_tokens,
+            "unbudgeted_tokens": unbudgeted_tokens,
+            "tokens_saved": max(unbudgeted_tokens - prompt_tokens, 0),
+            "history_turns": len(kept),
+            "dropped_turns": len(history) - len(kept),
+            "truncated": truncated,
+        }
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += prompt_tokens
+            self.tokens_saved += stats["tokens_saved"]
+        return messages, stats
+
+    def _unbudgeted_tokens(self, model, history, chat_history, prompt_tokens, history_tokens):
+        # What the previous prompt sent: every turn as a message plus the raw history in the template.
+        if not history:
+            return prompt_tokens
+        raw_history = chat_history if isinstance(chat_history, str) else json.dumps(chat_history)
+        all_turns = sum(self._message_tokens(model, message) for message in history)
+        return prompt_tokens - history_tokens + all_turns + self._count(model, raw_history)
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "tokens_saved": self.tokens_saved,
+                "max_tokens": self.max_tokens,
+                "budget_split": self.shares,
+            }
@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+
+from app.repositories.manifest_repository import ManifestRepository
+from app.utils.hashing import hash_text
+from app.utils.semantic_cache import SemanticCache
+
+
+class SemanticCacheService:
+    """
+    Reuses answers to near-duplicate questions instead of calling the LLM again.
+
+    Answers are cached per collection, model and retrieval options, and found by the
+    cosine similarity of the question embedding. Each entry records the collection
+    version from ManifestRepository at the time retrieval ran. Any re-ingestion or
+    deletion bumps that version, which invalidates the collection's cached answers
+    in every worker.
+    """
+
+    def __init__(self, manifest_repo=None):
+        self.logger = logging.getLogger("SemanticCacheService")
+        self.enabled = os.getenv("SEMANTIC_CACHE_ENABLED", "True") == "True"
+        self.ttl = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+        self.cache = SemanticCache(
+            capacity=int(os.getenv("SEMANTIC_CACHE_SIZE", "512")),
+            threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+            ttl=self.ttl,
+            max_namespaces=int(os.getenv("SEMANTIC_CACHE_MAX_NAMESPACES", "64"))
+        )
+        self.manifest_repo = manifest_repo or ManifestRepository()
+
+    def namespace(self, collection_names, model, options):
+        if not isinstance(collection_names, str):
+            collection_names = "+".join(collection_names)
+        return collection_names, model, hash_text(json.dumps(options, sort_keys=True, default=str))
+
+    def get_version(self, collection_names):
+        if isinstance(collection_names, str):
+            return self.manifest_repo.get_version(collection_names)
+        return ",".join(self.manifest_repo.get_version(name) for name in collection_names)
+
+    def lookup(self, namespace, question_embedding, version):
+        if not self.enabled:
+            return None
+        hit = self.cache.get(namespace, question_embedding, version=version)
+        if hit is None:
+            return None
+        response, similarity = hit
+        self.logger.info(f"Semantic cache hit for collection '{namespace[0]}' (similarity {similarity:.4f})")
+        return {**response, "cache_similarity": round(similarity, 4)}
+
+    def store(self, namespace, question_embedding, response, version, latency):
+        if not self.enabled:
+            return
+        self.cache.set(namespace, question_embedding, response, version=version, latency=latency)
+
+    def get_stats(self):
+        return {"enabled": self.enabled, "ttl": self.ttl, **self.cache.get_stats()}
@@ -2,6 +2,8 @@ import re
 import openai
 import os
 import logging
+import time
+from app.utils.completion_cache import CompletionCache
 
 logger = logging.getLogger("SplitGPTService")
 
@@ -9,6 +11,13 @@ class SplitGPTService:
     def __init__(self):
         openai.api_key = os.getenv("OPENAI_API_KEY")
         self.api_key = openai.api_key
+        self.max_tokens = 3000
+        self.temperature = 0.7
+        self.completion_cache = CompletionCache(
+            "split",
+            ttl=int(os.getenv("SPLIT_COMPLETION_CACHE_TTL", "86400")),
+            enabled=os.getenv("COMPLETION_CACHE_ENABLED", "True") == "True"
+        )
 
         # Define TEMPLATE
         self.QA_TEMPLATE_GPTSPLIT = """
@@ -31,7 +40,7 @@ class SplitGPTService:
         Original question: {original_question}
         """
 
-    def split(self, model, question):
+    def split(self, model, question, bypass_cache=False):
         messages = [
             {"role": "system", "content": "You are an AI assistant designed to split questions into multiple distinct questions based on your judgement."},
             {"role": "user", "content": self.QA_TEMPLATE_GPTSPLIT.format(original_question=question)}
@@ -41,15 +50,31 @@ class SplitGPTService:
         logger.debug("Model: %s", model)
         logger.debug("Question: %s", question)
 
+        cache_key = self.completion_cache.key(model, messages, self.temperature, self.max_tokens)
+        response_message = self.completion_cache.get(cache_key, bypass=bypass_cache)
+        if response_message is not None:
+            return response_message
+
+        started = time.perf_counter()
         response = openai.chat.completions.create(
             model=model,
             messages=messages,
-            max_tokens=3000,
-            temperature=0.7
+            max_tokens=self.max_tokens,
+            temperature=self.temperature
         )
 
         response_message = response.choices[0].message.content
-        return self.post_process_response(response_message)
+        # Only well-formed splits are cached; a malformed response raises and is retried next time.
+        result = self.post_process_response(response_message)
+        self.completion_cache.set(cache_key, result, time.perf_counter() - started)
+        return result
+
+    def split_questions(self, model, question, bypass_cache=False):
+        """Split a question and return the sub-questions as a list."""
+        return [
+            line.split(":", 1)[1].strip()
+            for line in self.split(model, question, bypass_cache).splitlines() if ":" in line
+        ]
 
     def post_process_response(self, response: str) -> str:
         split_matches = [match for match in re.finditer(
@@ -0,0 +1,126 @@
+import os
+import re
+from functools import lru_cache
+import fitz  # PyMuPDF for PDF handling
+
+MIN_CHUNK_WORDS = 5
+NON_WORD_PATTERN = re.compile(r'[\W_]+')
+PAGE_NUMBER_PATTERN = re.compile(r'(\b\d{1,2}\b)(?:\s[.\W_]+)*')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+# [CLS] and [SEP] are added by SentenceTransformer on top of the chunk's own tokens.
+SPECIAL_TOKENS = 2
+
+
+class TokenChunker:
+    """
+    Split text into windows of at most `max_tokens` tokens of the embedding model.
+
+    Windows are cut on the fast tokenizer's character offsets in a single pass and snapped
+    to word boundaries, so chunks never split a word and are never silently truncated by
+    SentenceTransformer. Consecutive windows share up to `overlap_tokens` tokens, and the
+    last window is pulled back to full size instead of leaving a tiny tail chunk.
+    """
+
+    def __init__(self, tokenizer, max_tokens, overlap_tokens=0):
+        if not getattr(tokenizer, "is_fast", False):
+            raise ValueError("TokenChunker requires a fast tokenizer with offset mapping")
+        if max_tokens < 1 or not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("Chunk overlap must be smaller than the chunk size")
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+
+    def iter_spans(self, text):
+        """Yield (start, end) character offsets of each chunk of `text`."""
+        encoding = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )
+        offsets = encoding["offset_mapping"]
+        word_ids = encoding.word_ids()
+        total = len(offsets)
+
+        def word_start(index):
+            # Do not start a window in the middle of a word split into several sub-tokens.
+            while 0 < index < total - 1 and word_ids[index] is not None and word_ids[index] == word_ids[index - 1]:
+                index += 1
+            return index
+
+        start = 0
+        while start < total:
+            # Snap before sizing the window, so it never ends inside the final pulled-back one.
+            start = word_start(start)
+            end = min(start + self.max_tokens, total)
+            if end == total:
+                start = word_start(max(0, total - self.max_tokens))
+            else:
+                # Do not end a window in the middle of a word split into several sub-tokens.
+                while end - 1 > start and word_ids[end] is not None and word_ids[end] == word_ids[end - 1]:
+                    end -= 1
+            yield offsets[start][0], offsets[end - 1][1]
+            if end == total:
+                return
+            start = max(start + 1, end - self.overlap_tokens)
+
+    def split(self, text):
+        return [text[start:end] for start, end in self.iter_spans(text)]
+
+
+@lru_cache(maxsize=4)
+def get_token_chunker(tokenizer_name, max_tokens, overlap_tokens):
+    """Build (once per process) a chunker for a tokenizer name, e.g. inside parse pool workers."""
+    from transformers import AutoTokenizer
+    return TokenChunker(AutoTokenizer.from_pretrained(tokenizer_name), max_tokens, overlap_tokens)
+
+
+def iter_pdf_pages(file_path):
+    """Yield (page_number, text) one page at a time; page numbers start at 1."""
+    with fitz.open(file_path) as doc:
+        for page_number, page in enumerate(doc, start=1):
+            yield page_number, page.get_text()
+
+
+def load_pdf(file_path):
+    return [text for _, text in iter_pdf_pages(file_path)]
+
+
+def split_text(texts, chunker):
+    return [chunk for text in texts for chunk in chunker.split(text)]
+
+
+def clean_text(text):
+    # Remove 특수기호, 심볼, whitespace 삭제
+    clean_text = NON_WORD_PATTERN.sub(' ', text)  # text만 추출
+    # page number, footer 삭제
+    clean_text = PAGE_NUMBER_PATTERN.sub('', clean_text)
+    clean_text = WHITESPACE_PATTERN.sub(' ', clean_text).strip()
+    return clean_text
+
+
+def is_meaningful(text):
+    return len(text.split()) > MIN_CHUNK_WORDS
+
+
+def iter_pdf_chunks(file_path, chunker):
+    """
+    Lazily load, split, clean and filter a PDF.
+
+    Only the current page is held in memory. Each cleaned chunk is yielded as soon as it
+    is cut, as a (document, metadata) pair whose metadata records the source file, the
+    page number and the chunk's character offsets within the raw page text.
+    """
+    source = os.path.basename(file_path)
+    for page_number, text in iter_pdf_pages(file_path):
+        for start, end in chunker.iter_spans(text):
+            document = clean_text(text[start:end])
+            if is_meaningful(document):
+                yield document, {"source": source, "page": page_number, "char_start": start, "char_end": end}
+
+
+def parse_pdf_file(file_path, chunker_config):
+    """
+    Parse one PDF into (document, metadata) chunks. Module-level so it can run in a process pool.
+
+    `chunker_config` is the (tokenizer_name, max_tokens, overlap_tokens) tuple of the
+    ingesting service, so workers chunk exactly like the parent process.
+    """
+    return list(iter_pdf_chunks(file_path, get_token_chunker(*chunker_config)))
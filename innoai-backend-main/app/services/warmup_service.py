@@ -0,0 +1,102 @@
+import logging
+import os
+import threading
+import time
+
+WARMUP_STATES = ("pending", "running", "ready", "degraded")
+
+
+class WarmupService:
+    """
+    Warms the serving IngestionService instances once per worker and tracks readiness.
+
+    Every blueprint builds its own IngestionService, each with its own embedding model, so
+    all of them are warmed. With WARMUP_BACKGROUND the warm-up runs on a thread and the
+    worker starts accepting requests straight away; the readiness endpoint keeps answering
+    503 until it finishes, which keeps load balancers from routing cold-start traffic here.
+    A failed warm-up is retried WARMUP_ATTEMPTS times with doubling backoff; after that the
+    state becomes "degraded", which keeps answering 503 unless WARMUP_READY_WHEN_DEGRADED
+    lets the worker serve cold rather than stay out of rotation.
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger("WarmupService")
+        self.enabled = os.getenv("WARMUP_ENABLED", "True") == "True"
+        self.background = os.getenv("WARMUP_BACKGROUND", "True") == "True"
+        self.collection_names = [
+            name.strip() for name in os.getenv("WARMUP_COLLECTIONS", "vehicle_collection").split(",") if name.strip()
+        ]
+        self.max_attempts = max(int(os.getenv("WARMUP_ATTEMPTS", "5")), 1)
+        self.backoff_seconds = float(os.getenv("WARMUP_BACKOFF_SECONDS", "2"))
+        self.max_backoff_seconds = float(os.getenv("WARMUP_MAX_BACKOFF_SECONDS", "60"))
+        self.ready_when_degraded = os.getenv("WARMUP_READY_WHEN_DEGRADED", "False") == "True"
+        self.state = "pending"
+        self.error = None
+        self.attempts = 0
+        self.timings = []
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def start(self, ingestion_services):
+        """Warm the given services, on a background thread when WARMUP_BACKGROUND is set."""
+        with self._lock:
+            if self.state != "pending":
+                return
+            if not self.enabled:
+                self.state = "ready"
+                return
+            self.state = "running"
+            self.started_at = time.time()
+        if self.background:
+            threading.Thread(target=self._run, args=(list(ingestion_services),), name="warm-up", daemon=True).start()
+        else:
+            self._run(list(ingestion_services))
+
+    def _run(self, ingestion_services):
+        self.logger.info(f"Warming up collections {self.collection_names}")
+        # The same service can back several blueprints; warm each instance once.
+        remaining = list({id(service): service for service in ingestion_services}.values())
+        delay = self.backoff_seconds
+        state, error = "ready", None
+        while remaining:
+            with self._lock:
+                self.attempts += 1
+            try:
+                while remaining:
+                    self.timings.append(remaining[0].warm_up(self.collection_names))
+                    remaining.pop(0)
+                state, error = "ready", None
+            except Exception as e:
+                error = str(e)
+                if self.attempts >= self.max_attempts:
+                    self.logger.error(f"Warm-up failed after {self.attempts} attempts, serving cold: {e}")
+                    state = "degraded"
+                    break
+                self.logger.warning(f"Warm-up attempt {self.attempts} failed, retrying in {delay:.1f}s: {e}")
+                with self._lock:
+                    self.error = error
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_seconds)
+        with self._lock:
+            self.state, self.error = state, error
+            self.finished_at = time.time()
+        self.logger.info(f"Warm-up {state} after {self.finished_at - self.started_at:.2f}s")
+
+    def is_ready(self):
+        return self.state == "ready" or (self.state == "degraded" and self.ready_when_degraded)
+
+    def get_status(self):
+        with self._lock:
+            status = {
+                "ready": self.is_ready(),
+                "state": self.state,
+                "attempts": self.attempts,
+                "collections": self.collection_names,
+                "timings": self.timings,
+            }
+            if self.started_at is not None and self.finished_at is not None:
+                status["seconds"] = round(self.finished_at - self.started_at, 3)
+            if self.error:
+                status["error"] = self.error
+            return status
@@ -0,0 +1,118 @@
+# Other modules
+import json
+import logging
+import threading
+
+# Local modules
+from app.extensions import cache
+from app.utils.hashing import hash_text
+
+BYPASS_HEADER = "X-Completion-Cache"
+
+
+def completion_key(model, messages, temperature, max_tokens):
+    """
+    Compute the canonical hash of a chat completion request.
+
+    Parameters:
+        model (str): The model name.
+        messages (list[dict]): The chat messages sent to the model.
+        temperature (float): The sampling temperature.
+        max_tokens (int): The completion token limit.
+
+    Returns:
+        str: The SHA-256 digest of the request serialized with sorted keys and no whitespace.
+    """
+    request = {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    return hash_text(json.dumps(request, sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+
+
+class CompletionCache:
+    """
+    Exact-match cache of LLM completions shared by every worker through app.extensions.cache.
+
+    Entries are keyed by the canonical hash of (model, messages, temperature, max_tokens)
+    under a per-service namespace, so SimpleCache keeps them per process and Redis shares
+    them across workers. Cache errors are logged and treated as misses, so a cache outage
+    only costs the LLM call. A bypassed lookup skips the read but still stores the fresh
+    completion.
+
+    Parameters:
+        namespace (str): The key prefix of the calling service.
+        ttl (int): Seconds an entry is kept; 0 disables the cache.
+        enabled (bool, optional): Whether the cache is used at all. Defaults to True.
+        backend (optional): The Flask-Caching or cachelib cache. Defaults to app.extensions.cache.
+    """
+
+    def __init__(self, namespace: str, ttl: int, enabled: bool = True, backend=None):
+        self.logger = logging.getLogger("CompletionCache")
+        self.namespace = namespace
+        self.ttl = int(ttl)
+        self.enabled = enabled and self.ttl > 0
+        self.backend = backend if backend is not None else cache
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.errors = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def key(self, model, messages, temperature, max_tokens):
+        return f"completion:{self.namespace}:{completion_key(model, messages, temperature, max_tokens)}"
+
+    def _count(self, counter, seconds=0.0):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+            self.saved_seconds += seconds
+
+    def get(self, key, bypass=False):
+        """
+        Return the cached completion text for key, or None on a miss, a bypass or an error.
+        """
+        if not self.enabled:
+            return None
+        if bypass:
+            self._count("bypassed")
+            return None
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            self.logger.error(f"Error when reading completion cache: {e}")
+            self._count("errors")
+            return None
+        if entry is None:
+            self._count("misses")
+            return None
+        self._count("hits", entry["seconds"])
+        self.logger.info(f"Completion cache hit for '{self.namespace}', saved {entry['seconds']:.2f}s")
+        return entry["content"]
+
+    def set(self, key, content, seconds):
+        """Store a completion with the seconds the LLM took to produce it."""
+        if not self.enabled or not content:
+            return
+        try:
+            self.backend.set(key, {"content": content, "seconds": seconds}, timeout=self.ttl)
+        except Exception as e:
+            self.logger.error(f"Error when writing completion cache: {e}")
+            self._count("errors")
+
+    def get_stats(self):
+        """
+        Return hit/miss counters, the hit rate and the LLM seconds saved by hits.
+
+        Returns:
+            dict: enabled, ttl, hits, misses, bypassed, errors, hit_rate and saved_seconds.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "errors": self.errors,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+            }
@@ -0,0 +1,56 @@
+# Other modules
+import hashlib
+
+FILE_READ_SIZE = 1024 * 1024
+
+
+def hash_file(file_path: str) -> str:
+    """
+    Compute the SHA-256 digest of a file without loading it into memory.
+
+    Parameters:
+        file_path (str): The path of the file to hash.
+
+    Returns:
+        str: The hexadecimal digest of the file contents.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(FILE_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_text(text: str) -> str:
+    """
+    Compute the SHA-256 digest of a text.
+
+    Parameters:
+        text (str): The text to hash.
+
+    Returns:
+        str: The hexadecimal digest of the UTF-8 encoded text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_id(prefix: str, text: str, length: int = 24) -> str:
+    """
+    Build a stable, content-derived record id.
+
+    The same text under the same prefix always maps to the same id, so re-ingesting
+    unchanged content is idempotent.
+
+    Parameters:
+        prefix (str): The namespace of the id, usually the source document name.
+        text (str): The content the id is derived from.
+        length (int): The number of hexadecimal digest characters to keep. Defaults to 24.
+
+    Returns:
+        str: The id in the form "{prefix}_{digest}".
+
+    Example:
+        >>> content_id("vehicle_price", "Sonata 2024 price list")
+        'vehicle_price_8e8e89b9ec04f54399b42492'
+    """
+    return f"{prefix}_{hash_text(text)[:length]}"
@@ -0,0 +1,28 @@
+# Other modules
+from itertools import islice
+
+
+def batched(iterable, size: int):
+    """
+    Lazily split an iterable into lists of at most `size` items.
+
+    Parameters:
+        iterable (Iterable): The items to group.
+        size (int): The maximum number of items per batch.
+
+    Returns:
+        Iterator[list]: Consecutive batches; only the last one may be shorter than `size`.
+
+    Example:
+        >>> list(batched(range(5), 2))
+        [[0, 1], [2, 3], [4]]
+    """
+    if size < 1:
+        raise ValueError("Batch size must be at least 1")
+
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,49 @@
+# Other modules
+import threading
+from collections import deque
+
+import numpy as np
+
+
+class LatencyTracker:
+    """
+    Thread-safe rolling window of latency samples per metric.
+
+    Parameters:
+        window (int): The number of most recent samples kept per metric.
+    """
+
+    def __init__(self, window: int = 1000):
+        self.window = max(int(window), 1)
+        self._samples = {}
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def record(self, metric, seconds):
+        with self._lock:
+            samples = self._samples.get(metric)
+            if samples is None:
+                samples = self._samples[metric] = deque(maxlen=self.window)
+            samples.append(seconds)
+            self._counts[metric] = self._counts.get(metric, 0) + 1
+
+    def get_stats(self):
+        """
+        Return the sample count and p50/p95/p99/max in milliseconds for every metric.
+
+        Returns:
+            dict: {metric: {"count", "p50_ms", "p95_ms", "p99_ms", "max_ms"}}; percentiles cover the window.
+        """
+        with self._lock:
+            snapshot = {metric: (self._counts[metric], np.asarray(samples)) for metric, samples in self._samples.items()}
+        stats = {}
+        for metric, (count, samples) in snapshot.items():
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            stats[metric] = {
+                "count": count,
+                "p50_ms": round(float(p50), 1),
+                "p95_ms": round(float(p95), 1),
+                "p99_ms": round(float(p99), 1),
+                "max_ms": round(float(samples.max()) * 1000, 1),
+            }
+        return stats
@@ -0,0 +1,85 @@
+# Other modules
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with an optional time-to-live.
+
+    Parameters:
+        capacity (int): The maximum number of entries kept before the least recently used one is dropped.
+        ttl (float, optional): Seconds after which an entry expires. Defaults to None (never).
+    """
+
+    def __init__(self, capacity: int, ttl: float = None):
+        self.capacity = max(int(capacity), 0)
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Return the cached value for a key, or None if it is missing or expired.
+
+        Parameters:
+            key (Hashable): The cache key.
+
+        Returns:
+            Any: The cached value, or None.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Store a value, evicting the least recently used entry when the cache is full.
+
+        Parameters:
+            key (Hashable): The cache key.
+            value (Any): The value to cache.
+        """
+        if self.capacity == 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.capacity:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get_stats(self):
+        """
+        Return hit/miss counters and the current size of the cache.
+
+        Returns:
+            dict: The hits, misses, hit rate, size and capacity of the cache.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "size": len(self._data),
+                "capacity": self.capacity,
+            }
@@ -0,0 +1,84 @@
+# Other modules
+import numpy as np
+
+
+class PCAProjection:
+    """
+    Linear projection of embeddings onto their top principal components.
+
+    The components are orthonormal and the projection is not whitened, so L2 distances and
+    dot products between projected vectors approximate those of the originals, minus the
+    variance carried by the dropped components.
+
+    Parameters:
+        mean (np.ndarray): The mean of the fitting sample, shape (source_dim,).
+        components (np.ndarray): The principal axes as rows, shape (dim, source_dim).
+        explained_variance_ratio (np.ndarray): The share of the sample variance kept by each component.
+        sample_size (int): The number of embeddings the projection was fitted on.
+    """
+
+    def __init__(self, mean, components, explained_variance_ratio, sample_size):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)
+        self.explained_variance_ratio = np.asarray(explained_variance_ratio, dtype=np.float32)
+        self.sample_size = int(sample_size)
+
+    @property
+    def dim(self):
+        return self.components.shape[0]
+
+    @property
+    def source_dim(self):
+        return self.components.shape[1]
+
+    @classmethod
+    def fit(cls, embeddings, dim):
+        """
+        Fit a projection to `dim` dimensions on a sample of embeddings.
+
+        Parameters:
+            embeddings (array-like): The sample, shape (n, source_dim).
+            dim (int): The target dimension, at most source_dim.
+
+        Returns:
+            PCAProjection: The fitted projection.
+        """
+        sample = np.asarray(embeddings, dtype=np.float64)
+        if sample.ndim != 2 or not len(sample):
+            raise ValueError("PCA needs a non-empty 2-D sample of embeddings")
+        if not 0 < dim <= sample.shape[1]:
+            raise ValueError(f"PCA dimension must be between 1 and {sample.shape[1]}, got {dim}")
+        mean = sample.mean(axis=0)
+        centered = sample - mean
+        # Eigen-decomposing the source_dim x source_dim covariance is cheaper than an SVD of the
+        # sample, and still yields a full orthonormal basis when the sample has fewer rows than dim.
+        covariance = centered.T @ centered / max(len(sample) - 1, 1)
+        eigenvalues, eigenvectors = np.linalg.eigh(covariance)
+        order = np.argsort(eigenvalues)[::-1][:dim]
+        total = eigenvalues.clip(min=0).sum()
+        ratio = eigenvalues[order].clip(min=0) / total if total > 0 else np.zeros(dim)
+        return cls(mean, eigenvectors[:, order].T, ratio, len(sample))
+
+    def transform(self, embeddings):
+        """
+        Project one embedding or a matrix of embeddings.
+
+        Parameters:
+            embeddings (array-like): Shape (source_dim,) or (n, source_dim).
+
+        Returns:
+            np.ndarray: float32 array of shape (dim,) or (n, dim).
+        """
+        return (np.asarray(embeddings, dtype=np.float32) - self.mean) @ self.components.T
+
+    def save(self, file):
+        np.savez(
+            file, mean=self.mean, components=self.components,
+            explained_variance_ratio=self.explained_variance_ratio, sample_size=self.sample_size
+        )
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as arrays:
+            return cls(arrays["mean"], arrays["components"], arrays["explained_variance_ratio"],
+                       int(arrays["sample_size"]))
@@ -0,0 +1,107 @@
+# Other modules
+import numpy as np
+
+
+def normalize_rows(vectors):
+    """
+    Scale every row of a matrix to unit length so dot products become cosine similarities.
+
+    Parameters:
+        vectors (array-like): A (n, dim) matrix or a single (dim,) vector.
+
+    Returns:
+        np.ndarray: float32 array of the same shape with zero rows left untouched.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def mmr_select(query_embedding, embeddings, k, lambda_mult=0.5):
+    """
+    Pick k candidates by maximal marginal relevance.
+
+    Each step takes the candidate maximising
+    lambda_mult * sim(query, doc) - (1 - lambda_mult) * max(sim(doc, selected)),
+    keeping a running max so each step is one vectorized update.
+
+    Parameters:
+        query_embedding (array-like): The (dim,) query vector.
+        embeddings (array-like): The (n, dim) candidate vectors.
+        k (int): The number of candidates to select.
+        lambda_mult (float, optional): 1.0 ranks by relevance only, 0.0 by diversity only. Defaults to 0.5.
+
+    Returns:
+        list[int]: Indices into embeddings in selection order.
+    """
+    embeddings = normalize_rows(embeddings)
+    count = min(int(k), len(embeddings))
+    if count <= 0:
+        return []
+    relevance = embeddings @ normalize_rows(query_embedding)
+    similarity = embeddings @ embeddings.T
+
+    selected = [int(np.argmax(relevance))]
+    max_similarity = similarity[selected[0]].copy()
+    available = np.ones(len(embeddings), dtype=bool)
+    available[selected[0]] = False
+    while len(selected) < count:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        index = int(np.argmax(scores))
+        selected.append(index)
+        available[index] = False
+        np.maximum(max_similarity, similarity[index], out=max_similarity)
+    return selected
+
+
+def assemble_context(results, count_tokens, max_tokens, format_result, separator="\n\n"):
+    """
+    Concatenate ranked search results into a prompt context that fits a token budget.
+
+    Results are taken in rank order; one that would overflow the budget is skipped so a
+    shorter, lower ranked chunk can still fill the remaining space.
+
+    Parameters:
+        results (list[dict]): Ranked search results with id, document and metadata.
+        count_tokens (Callable[[str], int]): Returns the token count of a string.
+        max_tokens (int): The token budget of the assembled context.
+        format_result (Callable[[dict], str]): Renders one result as a context block.
+        separator (str, optional): Placed between blocks. Defaults to a blank line.
+
+    Returns:
+        tuple[str, list[dict], int]: The context, the results it contains and its token count.
+    """
+    separator_tokens = count_tokens(separator)
+    blocks = []
+    used = []
+    total = 0
+    for result in results:
+        block = format_result(result)
+        tokens = count_tokens(block) + (separator_tokens if blocks else 0)
+        if total + tokens > max_tokens:
+            continue
+        blocks.append(block)
+        used.append(result)
+        total += tokens
+    return separator.join(blocks), used, total
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Fuse several ranked id lists with reciprocal-rank fusion.
+
+    Each id scores sum(1 / (k + rank)) over the lists it appears in, with ranks starting at 1.
+
+    Parameters:
+        rankings (list[list[str]]): Ranked id lists, best first.
+        k (int, optional): Damping constant; larger values flatten the rank weights. Defaults to 60.
+
+    Returns:
+        list[tuple[str, float]]: (id, score) pairs, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda entry: entry[1], reverse=True)
@@ -0,0 +1,134 @@
+# Other modules
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Local modules
+from app.utils.retrieval import normalize_rows
+
+
+class SemanticCache:
+    """
+    Thread-safe in-memory cache looked up by embedding similarity instead of exact keys.
+
+    Entries live in namespaces, each holding a small matrix of unit-length embeddings that
+    is scanned with one matrix-vector product per lookup. A namespace carries a version;
+    looking it up with a different version drops all of its entries. Namespaces come from
+    request options, so their number is capped too; the least recently used is dropped.
+
+    Parameters:
+        capacity (int): The maximum number of entries per namespace; the oldest are dropped first.
+        threshold (float): The minimum cosine similarity for a hit.
+        ttl (float, optional): Seconds after which an entry expires. Defaults to None (never).
+        max_namespaces (int, optional): The maximum number of namespaces kept. Defaults to 64.
+    """
+
+    def __init__(self, capacity: int, threshold: float, ttl: float = None, max_namespaces: int = 64):
+        self.capacity = max(int(capacity), 1)
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_namespaces = max(int(max_namespaces), 1)
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self.evicted_namespaces = 0
+        self._namespaces = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, namespace, embedding, version=None):
+        """
+        Return the value stored under the most similar embedding, or None below the threshold.
+
+        Parameters:
+            namespace (Hashable): The namespace to search.
+            embedding (array-like): The lookup embedding.
+            version (Hashable, optional): The current version of the namespace's source data.
+
+        Returns:
+            tuple[Any, float] or None: The cached value and its similarity, or None on a miss.
+        """
+        query = normalize_rows(embedding)
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is not None and entries["version"] != version:
+                del self._namespaces[namespace]
+                entries = None
+            if entries is None or not entries["values"]:
+                self.misses += 1
+                return None
+            self._namespaces.move_to_end(namespace)
+            similarity = entries["vectors"] @ query
+            similarity[np.asarray(entries["expires_at"]) <= time.monotonic()] = -np.inf
+            index = int(np.argmax(similarity))
+            if similarity[index] < self.threshold:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_seconds += entries["latencies"][index]
+            return entries["values"][index], float(similarity[index])
+
+    def set(self, namespace, embedding, value, version=None, latency=0.0):
+        """
+        Store a value under an embedding.
+
+        Parameters:
+            namespace (Hashable): The namespace to store into.
+            embedding (array-like): The embedding the value is found by.
+            value (Any): The value to cache.
+            version (Hashable, optional): The version of the source data the value was built from.
+            latency (float, optional): Seconds it took to produce the value, credited on every hit.
+        """
+        vector = normalize_rows(embedding)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else np.inf
+        with self._lock:
+            entries = self._namespaces.get(namespace)
+            if entries is None or entries["version"] != version:
+                entries = {"version": version, "vectors": np.zeros((0, len(vector)), dtype=np.float32),
+                           "values": [], "expires_at": [], "latencies": []}
+                self._namespaces[namespace] = entries
+            self._namespaces.move_to_end(namespace)
+            while len(self._namespaces) > self.max_namespaces:
+                self._namespaces.popitem(last=False)
+                self.evicted_namespaces += 1
+            now = time.monotonic()
+            # Drop expired entries, then the oldest ones, to make room for the new entry.
+            keep = [i for i, expiry in enumerate(entries["expires_at"]) if expiry > now]
+            if len(keep) >= self.capacity:
+                keep = keep[len(keep) - self.capacity + 1:]
+            entries["vectors"] = np.vstack([entries["vectors"][keep], vector[None, :]])
+            entries["values"] = [entries["values"][i] for i in keep] + [value]
+            entries["expires_at"] = [entries["expires_at"][i] for i in keep] + [expires_at]
+            entries["latencies"] = [entries["latencies"][i] for i in keep] + [latency]
+
+    def clear(self, namespace=None):
+        with self._lock:
+            if namespace is None:
+                self._namespaces.clear()
+            else:
+                self._namespaces.pop(namespace, None)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(entries["values"]) for entries in self._namespaces.values())
+
+    def get_stats(self):
+        """
+        Return hit/miss counters, the hit rate and the seconds saved by hits.
+
+        Returns:
+            dict: hits, misses, hit_rate, saved_seconds, size, namespaces, evicted_namespaces and threshold.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "saved_seconds": round(self.saved_seconds, 3),
+                "size": sum(len(entries["values"]) for entries in self._namespaces.values()),
+                "namespaces": len(self._namespaces),
+                "evicted_namespaces": self.evicted_namespaces,
+                "threshold": self.threshold,
+            }
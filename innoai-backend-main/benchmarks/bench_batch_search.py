@@ -0,0 +1,62 @@
+"""
+Compare batch search against a sequential loop of single searches.
+
+Ingests a PDF into a throw-away local Chroma collection, derives --queries questions from
+its chunks and times IngestionService.search in a loop against one search_batch call.
+The query embedding cache is cleared before each run so both sides pay for encoding.
+
+    python -m benchmarks.bench_batch_search external_resources/pdfs/vehicle_price.pdf --queries 64
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "..", "external_resources", "pdfs", "vehicle_price.pdf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--collection", default="bench_batch_search")
+    parser.add_argument("--queries", type=int, default=64)
+    parser.add_argument("--n-results", type=int, default=5)
+    args = parser.parse_args()
+
+    os.environ["USE_LOCAL_CHROMA_DB"] = "True"
+    os.environ["LOCAL_CHROMA_DB_PATH"] = tempfile.mkdtemp(prefix="chroma_bench_")
+
+    from app.services import text_processing
+    from app.services.ingestion_service import IngestionService
+    logging.disable(logging.INFO)
+
+    service = IngestionService()
+    service.process_pdf(os.path.abspath(args.pdf), args.collection)
+    chunks = [document for document, _ in text_processing.iter_pdf_chunks(os.path.abspath(args.pdf), service.chunker)]
+    queries = [" ".join(chunks[i % len(chunks)].split()[:10]) + f" {i}" for i in range(args.queries)]
+
+    service.query_cache.clear()
+    started = time.perf_counter()
+    sequential = [
+        service.search(query, args.collection, top_k=args.n_results, mmr=False)["results"] for query in queries
+    ]
+    sequential_seconds = time.perf_counter() - started
+
+    service.query_cache.clear()
+    started = time.perf_counter()
+    batch = service.search_batch(queries, args.collection, n_results=args.n_results)["results"]
+    batch_seconds = time.perf_counter() - started
+
+    matches = sum(
+        [result["id"] for result in single] == [result["id"] for result in entry["results"]]
+        for single, entry in zip(sequential, batch)
+    )
+    print(f"queries={len(queries)} n_results={args.n_results} identical_results={matches}/{len(queries)}")
+    print(f"sequential seconds={sequential_seconds:.3f} queries/sec={len(queries) / sequential_seconds:.1f}")
+    print(f"batch      seconds={batch_seconds:.3f} queries/sec={len(queries) / batch_seconds:.1f}")
+    print(f"speedup={sequential_seconds / batch_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of ChromaDB search latency with and without the pooled client.
+
+"before" rebuilds the client and collection handle on every call, which is what
+IngestionService.get_chroma_repo used to do; "after" reuses the pooled handles.
+
+    python -m benchmarks.bench_chroma_client_pool --records 5000 --queries 200
+"""
+import argparse
+import logging
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(label, samples):
+    print(
+        f"{label:<8} mean={statistics.mean(samples) * 1000:.2f}ms "
+        f"p50={percentile(samples, 50) * 1000:.2f}ms "
+        f"p99={percentile(samples, 99) * 1000:.2f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=768)
+    args = parser.parse_args()
+
+    os.environ["USE_LOCAL_CHROMA_DB"] = "True"
+    os.environ["LOCAL_CHROMA_DB_PATH"] = tempfile.mkdtemp(prefix="chroma_bench_")
+
+    from app.repositories.chroma_repository import ChromaRepository
+    logging.disable(logging.INFO)
+
+    rng = np.random.default_rng(0)
+    collection_name = "bench_collection"
+    repo = ChromaRepository(collection_name=collection_name, embedding_dim=args.dim)
+    embeddings = rng.standard_normal((args.records, args.dim), dtype=np.float32)
+    for start in range(0, args.records, 1000):
+        end = min(start + 1000, args.records)
+        repo.upsert_data(
+            [f"document {idx}" for idx in range(start, end)],
+            embeddings[start:end].tolist(),
+            [f"bench_vec{idx}" for idx in range(start, end)],
+            [{"idx": idx} for idx in range(start, end)],
+        )
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32).tolist()
+
+    before = []
+    for query in queries:
+        started = time.perf_counter()
+        ChromaRepository.clear_pool()
+        ChromaRepository(collection_name=collection_name, embedding_dim=args.dim).query_data(query, n_results=10)
+        before.append(time.perf_counter() - started)
+
+    pooled = ChromaRepository(collection_name=collection_name, embedding_dim=args.dim)
+    after = []
+    for query in queries:
+        started = time.perf_counter()
+        pooled.query_data(query, n_results=10)
+        after.append(time.perf_counter() - started)
+
+    print(f"records={args.records} queries={args.queries} dim={args.dim}")
+    report("before", before)
+    report("after", after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare the legacy splitters against the tokenizer-aligned TokenChunker on a PDF.
+
+For each splitter it reports wall time, chunk count, mean tokens per chunk, chunks that
+SentenceTransformer would silently truncate and tiny chunks under --tiny tokens.
+Use --repeat to simulate a large manual by repeating the PDF's pages.
+
+    python -m benchmarks.bench_chunkers external_resources/pdfs/vehicle_price.pdf --repeat 500
+"""
+import argparse
+import os
+import statistics
+import time
+
+from transformers import AutoTokenizer
+
+from app.services import text_processing
+
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "..", "external_resources", "pdfs", "vehicle_price.pdf")
+MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
+MAX_SEQ_LENGTH = 384
+
+
+def legacy_char_splitter(pages):
+    chunks = []
+    for text in pages:
+        for i in range(0, len(text), 1000):
+            chunks.append(text[i:i + 1000])
+    return [text_processing.clean_text(chunk) for chunk in chunks]
+
+
+def legacy_word_splitter(pages):
+    from nltk.tokenize import word_tokenize
+    words = word_tokenize(text_processing.clean_text("\n".join(pages)))
+    return [' '.join(words[i:i + 50]) for i in range(0, len(words), 50)]
+
+
+def token_chunker_splitter(chunker):
+    def split(pages):
+        return [text_processing.clean_text(chunk) for chunk in text_processing.split_text(pages, chunker)]
+    return split
+
+
+def report(name, splitter, pages, tokenizer, tiny):
+    started = time.perf_counter()
+    chunks = [chunk for chunk in splitter(pages) if text_processing.is_meaningful(chunk)]
+    elapsed = time.perf_counter() - started
+    lengths = [len(ids) for ids in tokenizer(chunks, add_special_tokens=True)["input_ids"]] if chunks else [0]
+    print(
+        f"{name:<14} time={elapsed:.3f}s chunks={len(chunks)} "
+        f"mean_tokens={statistics.mean(lengths):.1f} "
+        f"truncated={sum(1 for n in lengths if n > MAX_SEQ_LENGTH)} "
+        f"tiny(<{tiny})={sum(1 for n in lengths if n < tiny)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--repeat", type=int, default=100)
+    parser.add_argument("--overlap", type=int, default=32)
+    parser.add_argument("--tiny", type=int, default=32)
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    chunker = text_processing.TokenChunker(
+        tokenizer, MAX_SEQ_LENGTH - text_processing.SPECIAL_TOKENS, args.overlap
+    )
+    pages = text_processing.load_pdf(args.pdf) * args.repeat
+    print(f"pages={len(pages)} characters={sum(len(page) for page in pages)}")
+
+    report("char-1000", legacy_char_splitter, pages, tokenizer, args.tiny)
+    try:
+        report("nltk-50-words", legacy_word_splitter, pages, tokenizer, args.tiny)
+    except (ImportError, LookupError) as e:
+        print(f"nltk-50-words  skipped: {type(e).__name__} (requires nltk with the punkt model)")
+    report("token-chunker", token_chunker_splitter(chunker), pages, tokenizer, args.tiny)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare CPU embedding backends (torch fp32, torch int8 dynamic quantization, ONNX Runtime).
+
+Sentences are the token chunks of a PDF. For each backend it reports cosine drift against
+the fp32 reference, batch throughput in sentences/sec and p50/p99 single-query latency.
+A backend whose optional dependencies are missing is reported as skipped.
+
+    python -m benchmarks.bench_embedding_backends external_resources/pdfs/vehicle_price.pdf --queries 200
+"""
+import argparse
+import logging
+import os
+import time
+
+import numpy as np
+
+from app.services import text_processing
+from app.services.embedding_backends import EMBEDDING_BACKENDS, load_embedding_model, measure_cosine_drift
+
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "..", "external_resources", "pdfs", "vehicle_price.pdf")
+MODEL_NAME = "all-mpnet-base-v2"
+
+
+def load_sentences(pdf, model, limit):
+    chunker = text_processing.TokenChunker(
+        model.tokenizer, model.max_seq_length - text_processing.SPECIAL_TOKENS, 32
+    )
+    sentences = [document for document, _ in text_processing.iter_pdf_chunks(pdf, chunker)]
+    return sentences[:limit]
+
+
+def throughput(model, sentences, batch_size):
+    model.encode(sentences[:batch_size], batch_size=batch_size)
+    started = time.perf_counter()
+    model.encode(sentences, batch_size=batch_size)
+    return len(sentences) / (time.perf_counter() - started)
+
+
+def single_query_latency(model, queries):
+    model.encode(queries[0])
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        model.encode(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS), choices=EMBEDDING_BACKENDS)
+    parser.add_argument("--sentences", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    reference = load_embedding_model(args.model, "torch")
+    sentences = load_sentences(args.pdf, reference, args.sentences)
+    queries = [" ".join(sentence.split()[:12]) for sentence in sentences][:args.queries]
+    print(f"model={args.model} sentences={len(sentences)} queries={len(queries)} batch_size={args.batch_size}")
+
+    for backend in args.backends:
+        try:
+            model = reference if backend == "torch" else load_embedding_model(args.model, backend)
+        except Exception as e:  # missing optional runtimes surface as plain Exception
+            print(f"{backend:<11} skipped: {type(e).__name__}: {str(e).splitlines()[0]}")
+            continue
+        drift = measure_cosine_drift(reference, model, sentences, batch_size=args.batch_size)
+        rate = throughput(model, sentences, args.batch_size)
+        p50, p99 = single_query_latency(model, queries)
+        print(
+            f"{backend:<11} mean_cosine={drift['mean_cosine']:.5f} min_cosine={drift['min_cosine']:.5f} "
+            f"sentences/sec={rate:.1f} p50={p50:.2f}ms p99={p99:.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Load-test the chatbot, search and chatroom routes offline against a fake OpenAI server.
+
+Starts benchmarks.fake_openai with the given latency profile, replaces MongoDB with an
+in-memory mongomock client and Chroma with a throw-away local directory, ingests --passages
+synthetic passages (or the lines of --corpus), and serves the chatbot, ingestion and
+chatroom blueprints from a threaded werkzeug server. Each route is then driven by
+--concurrency client threads for --requests requests. The report lists throughput, errors
+and p50/p95/p99 latency per route, plus time to the first delta for streamed answers.
+Embedding, Chroma, the Mongo queries and serialization all run for real, so the gap between
+an answer's latency and the fake completion time is the cost of our own code.
+
+    python -m benchmarks.bench_load --concurrency 8 --requests 200 --ttft 0.3 --tokens 100
+"""
+import argparse
+import itertools
+import logging
+import os
+import tempfile
+import threading
+import time
+
+import httpx
+import numpy as np
+
+MODELS = ("Sonata", "Tucson", "Elantra", "Santa Fe", "Ioniq 5", "Kona", "Palisade")
+TRIMS = ("SE", "SEL", "N Line", "Limited", "Calligraphy")
+FEATURES = (
+    "adaptive cruise control", "a panoramic sunroof", "heated rear seats", "wireless charging",
+    "a digital key", "blind-spot view monitor", "a 12.3-inch touchscreen", "remote smart parking assist",
+    "ventilated front seats", "a Bose premium audio system", "highway driving assist", "rear occupant alert",
+)
+ENGINES = ("2.5L four-cylinder", "1.6L turbo hybrid", "2.5L turbo", "dual-motor electric", "1.6L plug-in hybrid")
+ROUTES = ("answer", "answer_stream", "search", "chatroom_create", "chatroom_get", "chatroom_update")
+
+
+def synthetic_passages(count, rng):
+    passages = []
+    for _ in range(count):
+        features = rng.choice(len(FEATURES), 3, replace=False)
+        passages.append(
+            f"The {MODELS[rng.integers(len(MODELS))]} {TRIMS[rng.integers(len(TRIMS))]} comes with the "
+            f"{ENGINES[rng.integers(len(ENGINES))]} engine, {FEATURES[features[0]]}, {FEATURES[features[1]]} "
+            f"and {FEATURES[features[2]]}. It is rated for {rng.integers(24, 54)} mpg combined and starts at "
+            f"${rng.integers(22, 56)},{rng.integers(100, 999)}."
+        )
+    return passages
+
+
+class RouteLoad:
+    """
+    Drives one route with concurrent clients and records per-request latency.
+
+    Parameters:
+        base_url (str): The app server's URL.
+        send (callable): send(client, index) issues one request and returns the seconds to the
+            first answer delta, or None for non-streamed routes; it raises on failure.
+        concurrency (int): The number of client threads.
+        requests (int): The number of measured requests.
+    """
+
+    def __init__(self, base_url, send, concurrency, requests):
+        from app.utils.latency import LatencyTracker
+
+        self.base_url = base_url
+        self.send = send
+        self.concurrency = concurrency
+        self.requests = requests
+        self.latency = LatencyTracker(window=requests)
+        self.errors = 0
+        self.first_error = None
+        self._client_factory = lambda: httpx.Client(base_url=base_url, timeout=120.0)
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _worker(self):
+        with self._client_factory() as client:
+            while True:
+                index = next(self._counter)
+                if index >= self.requests:
+                    return
+                started = time.perf_counter()
+                try:
+                    ttft = self.send(client, index)
+                except Exception as e:
+                    with self._lock:
+                        self.errors += 1
+                        self.first_error = self.first_error or repr(e)
+                    continue
+                self.latency.record("total", time.perf_counter() - started)
+                if ttft is not None:
+                    self.latency.record("ttft", ttft)
+
+    def run(self, warmup):
+        with self._client_factory() as client:
+            for index in range(warmup):
+                self.send(client, index)
+        started = time.perf_counter()
+        workers = [threading.Thread(target=self._worker) for _ in range(self.concurrency)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return time.perf_counter() - started
+
+
+def check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.url.path} returned {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def post(client, path, body):
+    check(client.post(path, json=body))
+
+
+def read_stream(client, body):
+    started = time.perf_counter()
+    ttft = None
+    with client.stream("POST", "/chatbot/answer", json=body) as response:
+        check(response)
+        for line in response.iter_lines():
+            if line == "event: error":
+                raise RuntimeError("answer stream sent an error event")
+            if ttft is None and line == "event: delta":
+                ttft = time.perf_counter() - started
+    if ttft is None:
+        raise RuntimeError("answer stream ended without a delta")
+    return ttft
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--routes", nargs="+", choices=ROUTES, default=list(ROUTES))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per route")
+    parser.add_argument("--warmup", type=int, default=5, help="Unmeasured sequential requests per route")
+    parser.add_argument("--passages", type=int, default=2000)
+    parser.add_argument("--corpus", help="Text file with one passage per line, used instead of synthetic passages")
+    parser.add_argument("--users", type=int, default=100, help="Chatrooms created before the load starts")
+    parser.add_argument("--model", default="gpt-3.5-turbo")
+    parser.add_argument("--ttft", type=float, default=0.3, help="Fake OpenAI seconds to the first token")
+    parser.add_argument("--tokens", type=int, default=100, help="Fake OpenAI tokens per completion")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--caches", action="store_true",
+                        help="Keep the semantic and completion caches on; by default every answer reaches the LLM")
+    args = parser.parse_args()
+
+    storage_root = tempfile.mkdtemp(prefix="load_bench_")
+    os.environ["USE_LOCAL_CHROMA_DB"] = "True"
+    os.environ["LOCAL_CHROMA_DB_PATH"] = os.path.join(storage_root, "chroma")
+    os.environ["INGEST_MANIFEST_PATH"] = os.path.join(storage_root, "manifests")
+    os.environ["LEXICAL_INDEX_PATH"] = os.path.join(storage_root, "lexical")
+    os.environ["SNAPSHOT_PATH"] = os.path.join(storage_root, "snapshots")
+    os.environ["EMBEDDING_CACHE_PATH"] = os.path.join(storage_root, "embedding_cache", "embeddings.sqlite3")
+    os.environ["OPENAI_API_KEY"] = "sk-load-test"
+    if not args.caches:
+        os.environ["SEMANTIC_CACHE_ENABLED"] = "False"
+        os.environ["COMPLETION_CACHE_ENABLED"] = "False"
+
+    from benchmarks.fake_openai import FakeOpenAIServer
+    fake_openai = FakeOpenAIServer(("127.0.0.1", 0), args.ttft, args.tokens, args.tokens_per_second).start()
+
+    # MongoRepository imports MongoClient by name, so the stand-in goes in before the app modules load.
+    import mongomock
+    import pymongo
+    pymongo.MongoClient = mongomock.MongoClient
+    import openai
+    openai.base_url = fake_openai.base_url
+
+    from flask import Flask
+    from werkzeug.serving import make_server
+    from app.extensions import cache
+    from app.routes.api.chatbot import chatbot_bp
+    from app.routes.api.chatroom import chatroom_bp
+    from app.routes.api.ingestion import ingestion_bp
+    logging.disable(logging.INFO)
+
+    app = Flask(__name__)
+    app.config["CACHE_TYPE"] = "SimpleCache"
+    cache.init_app(app)
+    for blueprint in (chatbot_bp, ingestion_bp, chatroom_bp):
+        app.register_blueprint(blueprint)
+    app_server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=app_server.serve_forever, name="load-bench-app", daemon=True).start()
+    base_url = f"http://127.0.0.1:{app_server.server_port}"
+
+    rng = np.random.default_rng(0)
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            passages = [line.strip() for line in f if line.strip()]
+    else:
+        passages = synthetic_passages(args.passages, rng)
+    questions = [" ".join(passages[i].split()[:10]) + "?" for i in rng.integers(0, len(passages), 500)]
+    collection_name = "load_bench"
+
+    with httpx.Client(base_url=base_url, timeout=600.0) as client:
+        started = time.perf_counter()
+        check(client.post("/ingestion/ingest-token-text-split", json={"collection_name": collection_name,
+                                                                      "text": "\n\n".join(passages)}))
+        ingest_seconds = time.perf_counter() - started
+        chatroom_ids = [
+            check(client.post("/chatroom/create-chatroom", json={"user_id": f"user{i}"})).json()["chatroom_id"]
+            for i in range(args.users)
+        ]
+
+    new_users = itertools.count()
+
+    def answer_body(index):
+        return {"model": args.model, "question": questions[index % len(questions)],
+                "chatroom_id": chatroom_ids[index % len(chatroom_ids)], "collection_name": collection_name}
+
+    senders = {
+        "answer": lambda client, index: post(client, "/chatbot/answer", answer_body(index)),
+        "answer_stream": lambda client, index: read_stream(client, {**answer_body(index), "stream": True}),
+        "search": lambda client, index: post(client, "/ingestion/search", {
+            "collection_name": collection_name, "query": questions[index % len(questions)]
+        }),
+        "chatroom_create": lambda client, index: post(client, "/chatroom/create-chatroom", {
+            "user_id": f"new-user{next(new_users)}"
+        }),
+        "chatroom_get": lambda client, index: post(client, "/chatroom/get-chatroom", {
+            "user_id": f"user{index % args.users}"
+        }),
+        "chatroom_update": lambda client, index: post(client, "/chatroom/update-chatroom", {
+            "chatroom_id": chatroom_ids[index % len(chatroom_ids)],
+            "user_message": questions[index % len(questions)], "chatbot_message": "Noted."
+        }),
+    }
+
+    print(
+        f"passages={len(passages)} ingest={ingest_seconds:.1f}s concurrency={args.concurrency} "
+        f"requests={args.requests} fake_completion={fake_openai.completion_seconds:.2f}s "
+        f"(ttft={args.ttft:.2f}s) caches={'on' if args.caches else 'off'}"
+    )
+    for route in args.routes:
+        load = RouteLoad(base_url, senders[route], args.concurrency, args.requests)
+        seconds = load.run(args.warmup)
+        stats = load.latency.get_stats()
+        total = stats.get("total", {"count": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0})
+        line = (
+            f"{route:<16} ok={total['count']:<5} errors={load.errors:<3} throughput={total['count'] / seconds:7.1f}/s "
+            f"p50={total['p50_ms']:.1f}ms p95={total['p95_ms']:.1f}ms p99={total['p99_ms']:.1f}ms "
+            f"max={total['max_ms']:.1f}ms"
+        )
+        if "ttft" in stats:
+            line += f" ttft_p50={stats['ttft']['p50_ms']:.1f}ms ttft_p99={stats['ttft']['p99_ms']:.1f}ms"
+        print(line)
+        if load.first_error:
+            print(f"{'':<16} first error: {load.first_error}")
+    print(f"fake OpenAI served {fake_openai.requests} completions")
+    app_server.shutdown()
+    fake_openai.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Evaluate PCA-compressed collections against the full 768-d index.
+
+Embeds the chunks of every PDF in a directory (or the lines of --corpus) with the service's
+model, stores them at full size and projected to each --dims value in throw-away local
+Chroma collections, and reports for each: recall@k against the exact full-size top-k,
+p50/p99 query latency, raw vector memory and on-disk size. Queries are the first words of
+randomly picked chunks, so they are close to, but not copies of, stored documents.
+
+    python -m benchmarks.bench_pca external_resources/pdfs --dims 64 128 256 --queries 200
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+DEFAULT_PDF_DIR = os.path.join(os.path.dirname(__file__), "..", "external_resources", "pdfs")
+
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+
+
+def fill(repository, documents, embeddings):
+    batch_size = repository.get_max_batch_size()
+    for start in range(0, len(documents), batch_size):
+        end = start + batch_size
+        repository.upsert_data(
+            documents[start:end],
+            np.asarray(embeddings[start:end]).tolist(),
+            [f"id{i}" for i in range(start, min(end, len(documents)))],
+            [{"chunk_index": i} for i in range(start, min(end, len(documents)))],
+        )
+
+
+def evaluate(repository, queries, exact, k):
+    repository.query_data(queries[0].tolist(), n_results=k)
+    timings = []
+    recalls = []
+    for query, expected in zip(queries, exact):
+        started = time.perf_counter()
+        ids = repository.query_data(query.tolist(), n_results=k, include=["distances"])["ids"][0]
+        timings.append((time.perf_counter() - started) * 1000)
+        recalls.append(len({int(result_id[2:]) for result_id in ids} & set(expected)) / k)
+    return np.mean(recalls), np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf_dir", nargs="?", default=DEFAULT_PDF_DIR)
+    parser.add_argument("--corpus", help="Text file with one passage per line, used instead of the PDFs")
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--sample-size", type=int, default=4096)
+    args = parser.parse_args()
+
+    os.environ["USE_LOCAL_CHROMA_DB"] = "True"
+    storage_root = tempfile.mkdtemp(prefix="chroma_bench_")
+
+    from app.repositories.chroma_repository import ChromaRepository
+    from app.services import text_processing
+    from app.services.ingestion_service import IngestionService
+    from app.utils.pca import PCAProjection
+    logging.disable(logging.INFO)
+
+    service = IngestionService()
+    if args.corpus:
+        with open(args.corpus, "r", encoding="utf-8") as f:
+            documents = [line.strip() for line in f if line.strip()]
+    else:
+        documents = []
+        for filename in sorted(os.listdir(args.pdf_dir)):
+            if filename.endswith(".pdf"):
+                file_path = os.path.join(args.pdf_dir, filename)
+                documents.extend(document for document, _ in text_processing.iter_pdf_chunks(file_path, service.chunker))
+    rng = np.random.default_rng(0)
+    embeddings = np.asarray(service.embed_model.encode(documents, batch_size=service.embed_batch_size), dtype=np.float32)
+    picked = rng.integers(0, len(documents), args.queries)
+    query_texts = [" ".join(documents[i].split()[:12]) for i in picked]
+    queries = np.asarray(service.embed_model.encode(query_texts, batch_size=service.embed_batch_size), dtype=np.float32)
+    k = min(args.k, len(documents))
+    exact = [
+        np.argsort(((embeddings - query) ** 2).sum(axis=1))[:k].tolist() for query in queries
+    ]
+    print(f"documents={len(documents)} queries={len(queries)} k={k} source_dim={embeddings.shape[1]}")
+
+    configurations = [("full", None)]
+    for dim in args.dims:
+        if dim >= embeddings.shape[1]:
+            print(f"skipping dim={dim}: not below the source dimension")
+            continue
+        sample = embeddings[rng.permutation(len(embeddings))[:args.sample_size]]
+        configurations.append((f"pca-{dim}", PCAProjection.fit(sample, dim)))
+
+    baseline = None
+    for name, projection in configurations:
+        os.environ["LOCAL_CHROMA_DB_PATH"] = os.path.join(storage_root, name)
+        repository = ChromaRepository(collection_name="bench_pca", embedding_dim=embeddings.shape[1])
+        stored = embeddings if projection is None else projection.transform(embeddings)
+        fill(repository, documents, stored)
+        searched = queries if projection is None else projection.transform(queries)
+        recall, p50, p99 = evaluate(repository, searched, exact, k)
+        vector_mb = stored.shape[0] * stored.shape[1] * 4 / 1024 / 1024
+        disk_mb = directory_size(os.environ["LOCAL_CHROMA_DB_PATH"]) / 1024 / 1024
+        baseline = baseline or (vector_mb, disk_mb, p50)
+        kept = "" if projection is None else f" variance_kept={projection.explained_variance_ratio.sum():.3f}"
+        print(
+            f"{name:<9} dim={stored.shape[1]:<4} recall@{k}={recall:.3f} p50={p50:.2f}ms p99={p99:.2f}ms "
+            f"vectors={vector_mb:.2f}MiB ({vector_mb / baseline[0]:.0%}) disk={disk_mb:.2f}MiB "
+            f"({disk_mb / baseline[1]:.0%}) latency={p50 / baseline[2]:.0%}{kept}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare Chroma queries against the read-optimized mmap snapshot.
+
+Fills a throw-away local Chroma collection with --vectors random embeddings, publishes
+float32 and float16 snapshots from it and reports p50/p99 query latency for each, plus
+the recall@k of Chroma's approximate HNSW results against the snapshot's exact top-k.
+
+    python -m benchmarks.bench_snapshot_search --vectors 100000 --queries 200
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import numpy as np
+
+
+def latency(search, queries):
+    search(queries[0])
+    timings = []
+    for query in queries:
+        started = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - started) * 1000)
+    return np.percentile(timings, 50), np.percentile(timings, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["USE_LOCAL_CHROMA_DB"] = "True"
+    os.environ["LOCAL_CHROMA_DB_PATH"] = tempfile.mkdtemp(prefix="chroma_bench_")
+    snapshot_path = tempfile.mkdtemp(prefix="snapshot_bench_")
+
+    from app.repositories.chroma_repository import ChromaRepository
+    from app.repositories.vector_snapshot_repository import VectorSnapshotRepository
+    logging.disable(logging.INFO)
+
+    rng = np.random.default_rng(0)
+    chroma_repo = ChromaRepository(collection_name="bench_snapshot", embedding_dim=args.dim)
+    batch_size = chroma_repo.get_max_batch_size()
+    for start in range(0, args.vectors, batch_size):
+        count = min(batch_size, args.vectors - start)
+        chroma_repo.upsert_data(
+            [f"document {start + i}" for i in range(count)],
+            rng.standard_normal((count, args.dim)).astype(np.float32).tolist(),
+            [f"id{start + i}" for i in range(count)],
+            [{"chunk_index": start + i} for i in range(count)],
+        )
+    queries = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+    print(f"vectors={args.vectors} dim={args.dim} queries={args.queries} k={args.k}")
+
+    p50, p99 = latency(lambda query: chroma_repo.query_data(query.tolist(), n_results=args.k), queries)
+    print(f"chroma-hnsw       p50={p50:.2f}ms p99={p99:.2f}ms")
+    chroma_ids = [chroma_repo.query_data(query.tolist(), n_results=args.k)["ids"][0] for query in queries]
+
+    for dtype in ("float32", "float16"):
+        snapshots = VectorSnapshotRepository(
+            "bench_snapshot", snapshot_path=os.path.join(snapshot_path, dtype), metric="l2", dtype=dtype
+        )
+        started = time.perf_counter()
+        chroma_repo.export_snapshot(snapshots)
+        publish_seconds = time.perf_counter() - started
+        p50, p99 = latency(lambda query: snapshots.search(query, n_results=args.k), queries)
+        exact_ids = [snapshots.search(query, n_results=args.k)["ids"][0] for query in queries]
+        recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(chroma_ids, exact_ids)])
+        size_mb = snapshots.current().matrix.nbytes / 1024 / 1024
+        print(
+            f"snapshot-{dtype:<8} p50={p50:.2f}ms p99={p99:.2f}ms publish={publish_seconds:.1f}s "
+            f"matrix={size_mb:.1f}MiB chroma_recall@{args.k}={recall:.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""
+Throughput and peak-memory benchmark for PDF ingestion.
+
+Ingests a PDF into a throw-away local Chroma collection and reports chunks/sec
+together with the peak Python heap (tracemalloc) and process RSS.
+
+    python -m benchmarks.bench_streaming_ingest external_resources/pdfs/vehicle_price.pdf
+    EMBEDDING_BATCH_SIZE=64 INGEST_BATCH_SIZE=512 python -m benchmarks.bench_streaming_ingest manual.pdf
+"""
+import argparse
+import logging
+import os
+import resource
+import tempfile
+import tracemalloc
+
+DEFAULT_PDF = os.path.join(os.path.dirname(__file__), "..", "external_resources", "pdfs", "vehicle_price.pdf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pdf", nargs="?", default=DEFAULT_PDF)
+    parser.add_argument("--collection", default="bench_ingest")
+    args = parser.parse_args()
+
+    os.environ["USE_LOCAL_CHROMA_DB"] = "True"
+    os.environ["LOCAL_CHROMA_DB_PATH"] = tempfile.mkdtemp(prefix="chroma_bench_")
+
+    from app.services.ingestion_service import IngestionService
+    logging.disable(logging.INFO)
+
+    service = IngestionService()
+    tracemalloc.start()
+    result = service.process_pdf(os.path.abspath(args.pdf), args.collection)
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(f"file={result.get('file')} chunks={result['chunks']} seconds={result['seconds']}")
+    print(f"throughput={result['chunks_per_sec']} chunks/sec")
+    print(f"peak_heap={peak_heap / 1024 / 1024:.1f}MiB peak_rss={peak_rss_kb / 1024:.1f}MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Local OpenAI-compatible chat completions server with a configurable latency profile.
+
+Answers POST /v1/chat/completions without calling OpenAI. Every completion takes --ttft
+seconds to its first token and then produces --tokens tokens at --tokens-per-second, so a
+blocking completion returns after ttft + tokens / tokens-per-second and a streamed one
+sends its chunks at that pace. Point the openai package at it with
+openai.base_url = "http://127.0.0.1:<port>/v1/".
+
+    python -m benchmarks.fake_openai --port 8089 --ttft 0.3 --tokens 100 --tokens-per-second 50
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("The", "Sonata", "offers", "hybrid", "and", "turbo", "engines", "with", "smart", "cruise", "control")
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    """
+    Threaded HTTP server that answers chat completions with canned text after a set delay.
+
+    Parameters:
+        address (tuple): The (host, port) to bind; port 0 picks a free one.
+        ttft (float): Seconds before the first token.
+        tokens (int): Tokens per completion.
+        tokens_per_second (float): Generation speed after the first token.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, ttft=0.3, tokens=100, tokens_per_second=50.0):
+        super().__init__(address, CompletionHandler)
+        self.ttft = ttft
+        self.tokens = max(int(tokens), 1)
+        self.token_interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1/"
+
+    @property
+    def completion_seconds(self):
+        return self.ttft + self.tokens * self.token_interval
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name="fake-openai", daemon=True).start()
+        return self
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        self.server.count_request()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        model = request.get("model", "gpt-3.5-turbo")
+        words = [WORDS[i % len(WORDS)] for i in range(self.server.tokens)]
+        time.sleep(self.server.ttft)
+        if request.get("stream"):
+            self.stream(completion_id, model, words)
+            return
+        time.sleep(len(words) * self.server.token_interval)
+        self.send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(words)},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(words), "total_tokens": len(words)},
+        })
+
+    def stream(self, completion_id, model, words):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for index, word in enumerate(words):
+                if index:
+                    time.sleep(self.server.token_interval)
+                delta = {"role": "assistant", "content": word} if index == 0 else {"content": f" {word}"}
+                self.send_chunk(completion_id, model, delta, None)
+            self.send_chunk(completion_id, model, {}, "stop")
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The app closes the upstream when its own client disconnects.
+            pass
+
+    def send_chunk(self, completion_id, model, delta, finish_reason):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttft", type=float, default=0.3)
+    parser.add_argument("--tokens", type=int, default=100)
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    args = parser.parse_args()
+
+    server = FakeOpenAIServer((args.host, args.port), args.ttft, args.tokens, args.tokens_per_second)
+    print(f"Serving fake OpenAI at {server.base_url} ({server.completion_seconds:.2f}s per completion)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
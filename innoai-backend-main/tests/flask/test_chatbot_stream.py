@@ -0,0 +1,65 @@
+# Other modules
+import pytest
+
+# Local modules
+from app import create_app
+from tests.flask.test_create_app import StartupConfig, populated_service  # noqa: F401
+
+
+class StreamConfig(StartupConfig):
+    WTF_CSRF_ENABLED = False
+
+
+class RecordingChatroomService:
+    def __init__(self):
+        self.messages = []
+
+    def update_chatroom_message(self, chatroom_id, user_message, chatbot_message):
+        self.messages.append((chatroom_id, user_message, chatbot_message))
+
+
+@pytest.fixture
+def stream_client(populated_service, monkeypatch):
+    from app.routes.api import chatbot
+
+    chatroom_service = RecordingChatroomService()
+    monkeypatch.setattr(chatbot, "ingestion_service", populated_service)
+    monkeypatch.setattr(chatbot, "chatroom_service", chatroom_service)
+    monkeypatch.setattr(chatbot.semantic_cache_service, "enabled", False)
+
+    def answer_stream(model, question, chat_history, context, chatroom_service, chatroom_id, *args):
+        try:
+            for delta in ("The Sonata ", "is a hybrid."):
+                yield delta
+        finally:
+            chatroom_service.update_chatroom_message(chatroom_id, question, "The Sonata ")
+
+    monkeypatch.setattr(chatbot.answer_gpt_service, "answer_stream", answer_stream)
+    yield create_app(StreamConfig).test_client(), chatroom_service
+
+
+def ask(client):
+    return client.post("/chatbot/answer", buffered=False, json={
+        "model": "gpt-3.5-turbo", "question": "Which engine does the Sonata have?",
+        "chatroom_id": "room-1", "stream": True
+    })
+
+
+def test_disconnect_before_first_delta_still_saves_the_question(stream_client):
+    client, chatroom_service = stream_client
+
+    response = ask(client)
+    first = next(response.response)
+    response.close()
+
+    assert first.startswith(b"event: context")
+    assert chatroom_service.messages == [("room-1", "Which engine does the Sonata have?", "")]
+
+
+def test_streamed_answer_is_saved_once(stream_client):
+    client, chatroom_service = stream_client
+
+    body = ask(client).get_data(as_text=True)
+
+    assert "event: done" in body
+    assert chatroom_service.messages == [("room-1", "Which engine does the Sonata have?", "The Sonata ")]
@@ -0,0 +1,70 @@
+# Other modules
+import sys
+import types
+
+import mongomock
+import pytest
+
+# Local modules
+from app import create_app
+from app.config.base import Config
+from app.repositories import mongo_repository
+from app.repositories.chroma_repository import ChromaRepository
+from app.services import ingestion_service
+from tests.services.fake_models import FakeEmbeddingModel
+
+
+class StartupConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+
+
+@pytest.fixture
+def populated_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_LOCAL_CHROMA_DB", "True")
+    monkeypatch.setenv("LOCAL_CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setenv("INGEST_MANIFEST_PATH", str(tmp_path / "manifests"))
+    monkeypatch.setenv("LEXICAL_INDEX_PATH", str(tmp_path / "lexical"))
+    monkeypatch.setenv("SNAPSHOT_PATH", str(tmp_path / "snapshots"))
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "False")
+    monkeypatch.setenv("WARMUP_ENABLED", "False")
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    monkeypatch.setattr(ingestion_service, "load_embedding_model", lambda name, backend: FakeEmbeddingModel(backend))
+    monkeypatch.setattr(mongo_repository, "MongoClient", mongomock.MongoClient)
+    from app.routes.api import ingestion
+
+    service = ingestion_service.IngestionService()
+    service.ingest_new_records(service.get_chroma_repo("vehicle_collection"), "brochure", [
+        f"The {model} comes with a hybrid engine and adaptive cruise control"
+        for model in ("Sonata", "Tucson", "Elantra", "Kona", "Palisade")
+    ])
+    monkeypatch.setattr(ingestion, "ingestion_service", service)
+    yield service
+    ChromaRepository.clear_pool()
+
+
+def test_create_app_starts_against_a_populated_collection(populated_service, monkeypatch):
+    exports = []
+    monkeypatch.setattr(populated_service, "visualize_embeddings_with_tensorboard",
+                        lambda *args, **kwargs: exports.append(args))
+
+    app = create_app(StartupConfig)
+
+    assert app.url_map.bind("localhost").match("/health/ready", method="GET")[0] == "health.ready"
+    assert exports == []
+
+
+def test_tensorboard_export_on_startup_is_capped(populated_service, monkeypatch, tmp_path):
+    saved = []
+    helper = types.ModuleType("app.utils.tensorboard_helper")
+    helper.save_embeddings = lambda embeddings, metadata, log_dir: saved.append((embeddings, metadata))
+    helper.setup_tensorboard = lambda log_dir: None
+    monkeypatch.setitem(sys.modules, "app.utils.tensorboard_helper", helper)
+    monkeypatch.setenv("TENSORBOARD_ON_STARTUP", "True")
+    monkeypatch.setattr(populated_service, "tensorboard_max_records", 3)
+
+    create_app(StartupConfig)
+
+    embeddings, metadata = saved[0]
+    assert len(embeddings) == len(metadata) == 3
+    assert len(embeddings[0]) == 768 and metadata[0].startswith("The ")
@@ -0,0 +1,63 @@
+# Other modules
+import importlib
+import json
+
+import pytest
+from flask import Flask
+
+# Local modules
+from app.repositories.chroma_repository import ChromaRepository
+from app.services import ingestion_service
+from tests.services.fake_models import FakeEmbeddingModel
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_LOCAL_CHROMA_DB", "True")
+    monkeypatch.setenv("LOCAL_CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setenv("INGEST_MANIFEST_PATH", str(tmp_path / "manifests"))
+    monkeypatch.setenv("LEXICAL_INDEX_PATH", str(tmp_path / "lexical"))
+    monkeypatch.setenv("SNAPSHOT_PATH", str(tmp_path / "snapshots"))
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "False")
+    monkeypatch.setenv("EXPORT_PAGE_SIZE", "2")
+    monkeypatch.setattr(ingestion_service, "load_embedding_model", lambda name, backend: FakeEmbeddingModel(backend))
+    ingestion = importlib.import_module("app.routes.api.ingestion")
+    service = ingestion_service.IngestionService()
+    monkeypatch.setattr(ingestion, "ingestion_service", service)
+    service.ingest_new_records(service.get_chroma_repo("vehicle_collection"), "brochure", [
+        f"The {model} comes with a hybrid engine and adaptive cruise control"
+        for model in ("Sonata", "Tucson", "Elantra", "Kona", "Palisade")
+    ])
+
+    app = Flask(__name__)
+    app.register_blueprint(ingestion.ingestion_bp)
+    yield app.test_client()
+    ChromaRepository.clear_pool()
+
+
+def test_get_all_data_streams_every_page_as_ndjson(client):
+    response = client.post("/ingestion/get-all-data", json={"collection_name": "vehicle_collection"})
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == 5
+    assert len({record["id"] for record in records}) == 5
+    assert all(record["metadata"]["source"] == "brochure" and "embedding" not in record for record in records)
+
+
+def test_get_all_data_applies_include_and_filters(client):
+    response = client.post("/ingestion/get-all-data", json={
+        "collection_name": "vehicle_collection",
+        "include": ["embeddings"],
+        "where_document": {"$contains": "Kona"},
+    })
+
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [set(record) for record in records] == [{"id", "embedding"}]
+
+
+def test_get_all_data_rejects_unknown_fields(client):
+    response = client.post("/ingestion/get-all-data", json={"collection_name": "vehicle_collection",
+                                                            "include": ["distances"]})
+    assert response.status_code == 400
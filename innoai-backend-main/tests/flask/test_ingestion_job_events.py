@@ -0,0 +1,63 @@
+# Other modules
+import importlib
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+from flask import Flask
+
+# Local modules
+from app.repositories import mongo_repository
+from app.repositories.mongo_repository import MongoRepository
+from app.services import ingestion_service
+from app.services.ingestion_job_service import IngestionJobService
+from tests.services.fake_models import FakeEmbeddingModel
+
+
+@pytest.fixture
+def job_events(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_LOCAL_CHROMA_DB", "True")
+    monkeypatch.setenv("LOCAL_CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setenv("INGEST_MANIFEST_PATH", str(tmp_path / "manifests"))
+    monkeypatch.setenv("LEXICAL_INDEX_PATH", str(tmp_path / "lexical"))
+    monkeypatch.setenv("SNAPSHOT_PATH", str(tmp_path / "snapshots"))
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "False")
+    monkeypatch.setattr(ingestion_service, "load_embedding_model", lambda name, backend: FakeEmbeddingModel(backend))
+    monkeypatch.setattr(mongo_repository, "MongoClient", mongomock.MongoClient)
+    ingestion = importlib.import_module("app.routes.api.ingestion")
+    mongo_repo = MongoRepository()
+    monkeypatch.setattr(ingestion, "ingestion_job_service", IngestionJobService(None, mongo_repo))
+    monkeypatch.setattr(ingestion, "JOB_EVENTS_POLL_SECONDS", 0.01)
+
+    app = Flask(__name__)
+    app.register_blueprint(ingestion.ingestion_bp)
+    yield app.test_client(), ingestion, mongo_repo
+
+
+def running_job(mongo_repo, updated):
+    job_id = mongo_repo.create_ingestion_job("token_text_split", {"text": "Sonata", "collection_name": "vehicle_collection"})
+    mongo_repo.ingestion_job_collection.update_one(
+        {"job_id": job_id}, {"$set": {"status": "running", "updatedDate": updated.isoformat()}}
+    )
+    return job_id
+
+
+def test_job_events_end_with_timeout_when_the_job_is_stale(job_events):
+    client, _, mongo_repo = job_events
+    job_id = running_job(mongo_repo, datetime.utcnow() - timedelta(hours=1))
+
+    body = client.get(f"/ingestion/jobs/{job_id}/events").get_data(as_text=True)
+
+    assert [line for line in body.splitlines() if line.startswith("event:")] == ["event: progress", "event: timeout"]
+    assert '"reason": "stale"' in body
+
+
+def test_job_events_end_with_timeout_after_the_maximum_wait(job_events, monkeypatch):
+    client, ingestion, mongo_repo = job_events
+    monkeypatch.setattr(ingestion, "JOB_EVENTS_TIMEOUT_SECONDS", 0.05)
+    job_id = running_job(mongo_repo, datetime.utcnow())
+
+    body = client.get(f"/ingestion/jobs/{job_id}/events").get_data(as_text=True)
+
+    assert body.rstrip().splitlines()[-2] == "event: timeout"
+    assert '"reason": "max_wait"' in body
@@ -0,0 +1,47 @@
+# Other modules
+import numpy as np
+import pytest
+
+# Local modules
+from app.repositories.chroma_repository import ChromaRepository
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_LOCAL_CHROMA_DB", "True")
+    monkeypatch.setenv("LOCAL_CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    repository = ChromaRepository("vehicle_collection", embedding_dim=4)
+    embeddings = np.random.default_rng(0).standard_normal((7, 4)).astype(np.float32)
+    repository.upsert_data(
+        [f"document {i}" for i in range(7)],
+        embeddings.tolist(),
+        [f"id{i}" for i in range(7)],
+        [{"chunk_index": i, "page": i % 2} for i in range(7)],
+    )
+    yield repository
+    ChromaRepository.clear_pool()
+
+
+def test_iter_records_pages_through_the_whole_collection(repository):
+    records = list(repository.iter_records(page_size=3))
+
+    assert sorted(record["id"] for record in records) == [f"id{i}" for i in range(7)]
+    assert all(record["document"] == f"document {record['metadata']['chunk_index']}" for record in records)
+    assert "embedding" not in records[0]
+
+
+def test_iter_records_stops_on_a_full_last_page(repository):
+    repository.delete_data(["id6"])
+
+    assert len(list(repository.iter_records(page_size=3))) == 6
+
+
+def test_iter_records_with_an_empty_include_returns_ids_only(repository):
+    assert list(repository.iter_records(include=[], page_size=4))[0].keys() == {"id"}
+
+
+def test_iter_records_applies_filters_on_every_page(repository):
+    records = list(repository.iter_records(include=["metadatas", "embeddings"], page_size=2, where={"page": 1}))
+
+    assert sorted(record["id"] for record in records) == ["id1", "id3", "id5"]
+    assert all(len(record["embedding"]) == 4 and isinstance(record["embedding"], list) for record in records)
@@ -0,0 +1,56 @@
+# Other modules
+import numpy as np
+import pytest
+
+# Local modules
+from app.repositories.embedding_cache_repository import EmbeddingCacheRepository
+
+
+@pytest.fixture
+def embedding_cache(tmp_path):
+    return EmbeddingCacheRepository(cache_path=str(tmp_path / "embeddings.sqlite3"), max_entries=10)
+
+
+def test_embedding_cache_hits_and_misses(embedding_cache):
+    vector = np.arange(4, dtype=np.float32)
+    embedding_cache.put_many([("a", vector)])
+
+    found = embedding_cache.get_many(["a", "b"])
+
+    assert list(found) == ["a"]
+    np.testing.assert_allclose(found["a"], vector)
+    assert found["a"].dtype == np.float32
+    stats = embedding_cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_embedding_cache_evicts_least_recently_used(embedding_cache):
+    embedding_cache.put_many([(f"key{idx}", np.ones(4)) for idx in range(10)])
+    embedding_cache.get_many(["key0"])
+
+    embedding_cache.put_many([("key10", np.ones(4))])
+
+    assert embedding_cache.get_stats()["entries"] <= 10
+    assert "key0" in embedding_cache.get_many(["key0"])
+
+
+def test_embedding_cache_decodes_rows_written_with_another_dtype(tmp_path):
+    cache_path = str(tmp_path / "embeddings.sqlite3")
+    vector = np.linspace(0, 1, 8, dtype=np.float32)
+    EmbeddingCacheRepository(cache_path=cache_path, dtype="float32").put_many([("a", vector)])
+
+    found = EmbeddingCacheRepository(cache_path=cache_path, dtype="float16").get_many(["a"])
+
+    np.testing.assert_array_equal(found["a"], vector)
+
+
+def test_embedding_cache_treats_truncated_blob_as_miss(embedding_cache):
+    embedding_cache.put_many([("a", np.ones(8)), ("b", np.ones(8))])
+    embedding_cache._conn.execute("UPDATE embeddings SET vector = ? WHERE key = 'a'", (b"\x00" * 6,))
+    embedding_cache._conn.commit()
+
+    found = embedding_cache.get_many(["a", "b"])
+
+    assert list(found) == ["b"]
+    assert embedding_cache.get_stats()["misses"] == 1
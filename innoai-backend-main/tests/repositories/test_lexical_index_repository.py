@@ -0,0 +1,81 @@
+# Other modules
+import pytest
+
+# Local modules
+from app.repositories.lexical_index_repository import LexicalIndexRepository
+
+
+@pytest.fixture
+def lexical_index(tmp_path):
+    index = LexicalIndexRepository("vehicle_collection", index_path=str(tmp_path))
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Sonata engine oil filter part 26300 35505",
+            "Sonata exterior color options and trims",
+            "Avante engine oil capacity and filter",
+        ],
+    )
+    index.commit()
+    return index
+
+
+def test_search_ranks_exact_part_number_first(lexical_index):
+    hits = lexical_index.search("part 26300-35505", n_results=2)
+    assert hits[0][0] == "a"
+    assert len(hits) == 1
+
+
+def test_search_respects_n_results(lexical_index):
+    assert [doc_id for doc_id, _ in lexical_index.search("engine oil filter", n_results=2)] in (["a", "c"], ["c", "a"])
+
+
+def test_index_is_reloaded_from_disk(lexical_index, tmp_path):
+    reloaded = LexicalIndexRepository("vehicle_collection", index_path=str(tmp_path))
+    assert len(reloaded) == 3
+    assert reloaded.search("trims") == lexical_index.search("trims")
+
+
+def test_remove_and_replace_documents(lexical_index):
+    lexical_index.remove(["a"])
+    lexical_index.add(["b"], ["Sonata engine hybrid battery"])
+    lexical_index.commit()
+
+    assert len(lexical_index) == 2
+    assert lexical_index.search("26300") == []
+    assert lexical_index.search("trims") == []
+    assert lexical_index.search("battery")[0][0] == "b"
+
+
+def test_delete_clears_index(lexical_index, tmp_path):
+    lexical_index.delete()
+    assert LexicalIndexRepository("vehicle_collection", index_path=str(tmp_path)).search("engine") == []
+
+
+def test_commits_from_two_workers_are_merged(lexical_index, tmp_path, monkeypatch):
+    monkeypatch.setenv("LEXICAL_INDEX_REFRESH_SECONDS", "0")
+    worker = LexicalIndexRepository("vehicle_collection", index_path=str(tmp_path))
+    reader = LexicalIndexRepository("vehicle_collection", index_path=str(tmp_path))
+
+    lexical_index.add(["d"], ["Tucson hybrid panoramic sunroof"])
+    lexical_index.commit()
+    worker.add(["e"], ["Kona electric heat pump"])
+    worker.remove(["b"])
+    worker.commit()
+
+    assert len(worker) == 4
+    assert reader.search("sunroof")[0][0] == "d"
+    assert reader.search("heat pump")[0][0] == "e"
+    assert reader.search("trims") == []
+
+
+def test_commit_keeps_the_previous_generation(lexical_index, tmp_path):
+    previous = (tmp_path / "vehicle_collection" / "CURRENT").read_text()
+    lexical_index.add(["d"], ["Tucson hybrid panoramic sunroof"])
+    lexical_index.commit()
+    lexical_index.add(["e"], ["Kona electric heat pump"])
+    lexical_index.commit()
+
+    current = (tmp_path / "vehicle_collection" / "CURRENT").read_text()
+    generations = {path.name for path in (tmp_path / "vehicle_collection").iterdir() if path.is_dir()}
+    assert previous not in generations and current in generations and len(generations) == 2
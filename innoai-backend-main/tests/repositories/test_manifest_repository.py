@@ -0,0 +1,89 @@
+# Other modules
+import multiprocessing
+
+import numpy as np
+import pytest
+
+# Local modules
+from app.repositories.manifest_repository import ManifestRepository
+from app.utils.hashing import content_id
+from app.utils.pca import PCAProjection
+
+
+@pytest.fixture
+def manifest_repo(tmp_path):
+    return ManifestRepository(manifest_path=str(tmp_path))
+
+
+def test_content_id_is_stable():
+    assert content_id("vehicle_price", "Sonata price list") == content_id("vehicle_price", "Sonata price list")
+    assert content_id("vehicle_price", "Sonata price list") != content_id("vehicle_color", "Sonata price list")
+    assert content_id("vehicle_price", "Sonata price list").startswith("vehicle_price_")
+
+
+def test_manifest_round_trip(manifest_repo):
+    assert manifest_repo.get_source("vehicle_collection", "vehicle_price.pdf") is None
+
+    manifest_repo.update_source("vehicle_collection", "vehicle_price.pdf", "abc", ["id1", "id2"], "settings-v1")
+    entry = manifest_repo.get_source("vehicle_collection", "vehicle_price.pdf")
+
+    assert entry["file_hash"] == "abc"
+    assert entry["fingerprint"] == "settings-v1"
+    assert entry["chunk_ids"] == ["id1", "id2"]
+
+
+def test_manifest_delete_collection(manifest_repo):
+    manifest_repo.update_source("vehicle_collection", "vehicle_price.pdf", "abc", ["id1"])
+    manifest_repo.update_source("other_collection", "vehicle_price.pdf", "abc", ["id1"])
+
+    manifest_repo.delete_collection("vehicle_collection")
+
+    assert manifest_repo.get_source("vehicle_collection", "vehicle_price.pdf") is None
+    assert manifest_repo.get_source("other_collection", "vehicle_price.pdf") is not None
+
+
+def test_version_changes_on_bump_and_delete(manifest_repo):
+    assert manifest_repo.get_version("vehicle_collection") == "0"
+
+    manifest_repo.bump_version("vehicle_collection")
+    bumped = manifest_repo.get_version("vehicle_collection")
+    assert bumped != "0"
+
+    manifest_repo.delete_collection("vehicle_collection")
+    assert manifest_repo.get_version("vehicle_collection") not in ("0", bumped)
+
+
+def test_projection_is_stored_once_and_deleted_with_collection(manifest_repo):
+    rng = np.random.default_rng(0)
+    first = PCAProjection.fit(rng.standard_normal((20, 8)), 2)
+    second = PCAProjection.fit(rng.standard_normal((20, 8)), 4)
+    assert manifest_repo.get_projection("vehicle_collection") is None
+
+    stored = manifest_repo.save_projection("vehicle_collection", first)
+    kept = manifest_repo.save_projection("vehicle_collection", second)
+
+    assert stored.dim == 2 and kept.dim == 2
+    assert np.array_equal(kept.components, first.components)
+    manifest_repo.delete_collection("vehicle_collection")
+    assert manifest_repo.get_projection("vehicle_collection") is None
+
+
+def record_sources(manifest_path, worker):
+    manifest_repo = ManifestRepository(manifest_path=manifest_path)
+    for idx in range(20):
+        manifest_repo.update_source("vehicle_collection", f"worker{worker}_{idx}.pdf", "abc", [f"id{idx}"])
+
+
+def test_concurrent_processes_keep_each_others_sources(tmp_path):
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=record_sources, args=(str(tmp_path), worker)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(30)
+
+    manifest_repo = ManifestRepository(manifest_path=str(tmp_path))
+    assert all(
+        manifest_repo.get_source("vehicle_collection", f"worker{worker}_{idx}.pdf") is not None
+        for worker in range(4) for idx in range(20)
+    )
@@ -0,0 +1,95 @@
+# Other modules
+import inspect
+
+import numpy as np
+import pytest
+
+# Local modules
+from app.repositories.chroma_repository import ChromaRepository
+from app.repositories.sharded_chroma_repository import ShardedChromaRepository
+
+
+@pytest.fixture
+def local_chroma(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_LOCAL_CHROMA_DB", "True")
+    monkeypatch.setenv("LOCAL_CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    yield
+    ChromaRepository.clear_pool()
+
+
+@pytest.fixture
+def embeddings():
+    return np.random.default_rng(0).standard_normal((40, 8)).astype(np.float32)
+
+
+def fill(repository, embeddings):
+    repository.upsert_data(
+        [f"document {i}" for i in range(len(embeddings))],
+        embeddings.tolist(),
+        [f"id{i}" for i in range(len(embeddings))],
+        [{"chunk_index": i} for i in range(len(embeddings))],
+    )
+
+
+def test_routing_is_stable_and_spreads_records(local_chroma, embeddings):
+    sharded = ShardedChromaRepository.create("vehicle_collection", 3, embedding_dim=8)
+    fill(sharded, embeddings)
+
+    assert [shard.collection_name for shard in sharded.shards] == [
+        "vehicle_collection__shard0", "vehicle_collection__shard1", "vehicle_collection__shard2"
+    ]
+    assert sharded.count() == len(embeddings)
+    for shard_index, shard in enumerate(sharded.shards):
+        ids = {record["id"] for record in shard.iter_records(include=[])}
+        assert ids and all(sharded.shard_for(record_id) == shard_index for record_id in ids)
+    assert sharded.get_existing_ids(["id1", "id2", "missing"]) == {"id1", "id2"}
+
+
+def test_query_merges_shards_in_global_distance_order(local_chroma, embeddings):
+    sharded = ShardedChromaRepository.create("vehicle_collection", 4, embedding_dim=8)
+    fill(sharded, embeddings)
+    queries = embeddings[[3, 17]] + 0.01
+
+    results = sharded.query_data_batch(queries.tolist(), n_results=5)
+
+    for row, query in enumerate(queries):
+        expected = np.argsort(((embeddings - query) ** 2).sum(axis=1))[:5]
+        assert results["ids"][row] == [f"id{i}" for i in expected]
+        assert results["distances"][row] == sorted(results["distances"][row])
+        assert results["metadatas"][row][0] == {"chunk_index": int(expected[0])}
+    single = sharded.query_data(queries[0].tolist(), n_results=5, include=["documents"])
+    assert single["ids"][0] == results["ids"][0]
+    assert single["documents"][0][0] == f"document {int(np.argmin(((embeddings - queries[0]) ** 2).sum(axis=1)))}"
+
+
+def test_fan_out_over_logical_collections(local_chroma, embeddings):
+    first = ChromaRepository(collection_name="vehicle_collection", embedding_dim=8)
+    second = ChromaRepository(collection_name="price_collection", embedding_dim=8)
+    first.upsert_data(["a"], [embeddings[0].tolist()], ["a"], [{"chunk_index": 0}])
+    second.upsert_data(["b"], [embeddings[1].tolist()], ["b"], [{"chunk_index": 0}])
+
+    combined = ShardedChromaRepository("vehicle_collection+price_collection", [first, second])
+    results = combined.query_data(embeddings[1].tolist(), n_results=2)
+
+    assert results["ids"][0] == ["b", "a"]
+    assert combined.count() == 2
+
+
+# Pool-level and per-physical-collection members that a fan-out does not offer.
+CHROMA_ONLY_MEMBERS = {"clear_pool", "collection"}
+# Optional parameters that only make sense for one physical collection.
+CHROMA_ONLY_PARAMETERS = {"delete_collection": {"collection_name"}}
+
+
+def test_sharded_repository_implements_the_chroma_repository_interface():
+    for name, member in vars(ChromaRepository).items():
+        if name.startswith("_") or name in CHROMA_ONLY_MEMBERS:
+            continue
+        assert callable(getattr(ShardedChromaRepository, name, None)), f"ShardedChromaRepository lacks {name}"
+        chroma = inspect.signature(member).parameters
+        sharded = inspect.signature(getattr(ShardedChromaRepository, name)).parameters
+        expected = {key: value for key, value in chroma.items() if key not in CHROMA_ONLY_PARAMETERS.get(name, ())}
+        assert list(sharded) == list(expected), f"{name}{inspect.signature(member)} differs"
+        assert [parameter.default for parameter in sharded.values()] == [
+            parameter.default for parameter in expected.values()
+        ], f"{name} defaults differ"
@@ -0,0 +1,73 @@
+# Other modules
+import numpy as np
+import pytest
+
+# Local modules
+from app.repositories.vector_snapshot_repository import VectorSnapshotRepository
+
+
+def make_records(embeddings):
+    return [
+        {"id": f"id{i}", "document": f"document {i}", "metadata": {"chunk_index": i}, "embedding": embedding}
+        for i, embedding in enumerate(embeddings)
+    ]
+
+
+@pytest.fixture
+def embeddings():
+    return np.random.default_rng(0).standard_normal((50, 8)).astype(np.float32)
+
+
+def test_l2_search_matches_brute_force(tmp_path, embeddings):
+    snapshots = VectorSnapshotRepository("vehicle_collection", snapshot_path=str(tmp_path), metric="l2")
+    snapshots.block_rows = 16
+    snapshots.publish(len(embeddings), make_records(embeddings))
+    query = embeddings[7] + 0.01
+
+    results = snapshots.search(query, n_results=5)
+
+    expected = np.argsort(((embeddings - query) ** 2).sum(axis=1))[:5]
+    assert results["ids"][0] == [f"id{i}" for i in expected]
+    assert results["distances"][0][0] == pytest.approx(float(((embeddings[7] - query) ** 2).sum()), abs=1e-4)
+    assert results["documents"][0][0] == "document 7"
+    assert results["metadatas"][0][0] == {"chunk_index": 7}
+
+
+def test_cosine_float16_search(tmp_path, embeddings):
+    snapshots = VectorSnapshotRepository("vehicle_collection", snapshot_path=str(tmp_path), metric="cosine", dtype="float16")
+    snapshots.publish(len(embeddings), make_records(embeddings))
+
+    results = snapshots.search(embeddings[3] * 4, n_results=1, include_embeddings=True)
+
+    assert results["ids"][0] == ["id3"]
+    assert results["distances"][0][0] == pytest.approx(0.0, abs=1e-3)
+    assert results["embeddings"][0].shape == (1, 8)
+
+
+def test_published_generation_is_picked_up_by_other_readers(tmp_path, embeddings):
+    writer = VectorSnapshotRepository("vehicle_collection", snapshot_path=str(tmp_path))
+    reader = VectorSnapshotRepository("vehicle_collection", snapshot_path=str(tmp_path))
+    reader.refresh_seconds = 0
+    assert reader.search(embeddings[0]) is None
+
+    writer.publish(10, make_records(embeddings[:10]))
+    assert reader.search(embeddings[0], n_results=1)["ids"][0] == ["id0"]
+
+    writer.publish(len(embeddings), make_records(embeddings[::-1]))
+    assert reader.search(embeddings[0], n_results=1)["ids"][0] == [f"id{len(embeddings) - 1}"]
+
+
+def test_publish_trims_when_fewer_records_arrive(tmp_path, embeddings):
+    snapshots = VectorSnapshotRepository("vehicle_collection", snapshot_path=str(tmp_path))
+    assert snapshots.publish(20, make_records(embeddings[:12]))["records"] == 12
+    assert len(snapshots.search(embeddings[0], n_results=50)["ids"][0]) == 12
+
+
+def test_publish_grows_when_more_records_arrive(tmp_path, embeddings):
+    snapshots = VectorSnapshotRepository("vehicle_collection", snapshot_path=str(tmp_path))
+    assert snapshots.publish(12, make_records(embeddings))["records"] == len(embeddings)
+
+    results = snapshots.search(embeddings[49], n_results=len(embeddings))
+    assert len(results["ids"][0]) == len(embeddings)
+    assert results["ids"][0][0] == "id49"
+    assert snapshots.current().matrix.shape == embeddings.shape
@@ -0,0 +1,56 @@
+# Other modules
+import hashlib
+
+import numpy as np
+
+
+class FakeEncoding(dict):
+    def __init__(self, offsets, word_ids):
+        super().__init__(offset_mapping=offsets, input_ids=list(range(len(offsets))))
+        self._word_ids = word_ids
+
+    def word_ids(self):
+        return self._word_ids
+
+
+class FakeTokenizer:
+    """Fast-tokenizer stand-in: words split on whitespace, then into sub-tokens of up to `piece` characters."""
+
+    is_fast = True
+    name_or_path = "fake-tokenizer"
+
+    def __init__(self, piece=4):
+        self.piece = piece
+
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=True, verbose=False):
+        offsets = []
+        word_ids = []
+        word = -1
+        position = 0
+        for token in text.split():
+            start = text.index(token, position)
+            position = start + len(token)
+            word += 1
+            for piece_start in range(start, position, self.piece):
+                offsets.append((piece_start, min(piece_start + self.piece, position)))
+                word_ids.append(word)
+        return FakeEncoding(offsets, word_ids)
+
+
+class FakeEmbeddingModel:
+    """SentenceTransformer stand-in with deterministic unit vectors that depend on the text and the seed."""
+
+    max_seq_length = 66
+
+    def __init__(self, seed="torch", dim=768):
+        self.seed = seed
+        self.dim = dim
+        self.tokenizer = FakeTokenizer()
+
+    def encode(self, texts, batch_size=32, **kwargs):
+        vectors = []
+        for text in texts:
+            digest = hashlib.sha256(f"{self.seed}:{text}".encode("utf-8")).digest()
+            vector = np.random.default_rng(int.from_bytes(digest[:8], "little")).standard_normal(self.dim)
+            vectors.append(vector / np.linalg.norm(vector))
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dim)
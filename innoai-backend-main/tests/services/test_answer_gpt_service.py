@@ -0,0 +1,59 @@
+# Other modules
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from flask import Flask, has_app_context
+
+# Local modules
+from app.services.answer_gpt_service import AnswerGPTService
+from app.utils.completion_cache import CompletionCache
+
+
+class RecordingBackend:
+    """Dict cache that records the thread and app context of every call."""
+
+    def __init__(self):
+        self.entries = {}
+        self.calls = []
+
+    def get(self, key):
+        self.calls.append(("get", threading.current_thread(), has_app_context()))
+        return self.entries.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.calls.append(("set", threading.current_thread(), has_app_context()))
+        self.entries[key] = value
+
+
+class FakeAsyncClient:
+    def __init__(self):
+        self.requests = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **request):
+        self.requests += 1
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="The Sonata is a sedan."))])
+
+
+def test_answer_async_reads_and_writes_the_completion_cache_off_the_loop():
+    service = AnswerGPTService()
+    backend = RecordingBackend()
+    service.completion_cache = CompletionCache("answer", ttl=60, backend=backend)
+    client = FakeAsyncClient()
+
+    async def answer_twice():
+        loop_thread = threading.current_thread()
+        answers = [
+            await service.answer_async(client, "gpt-4o", "What is the Sonata?", "", "Sonata sedan")
+            for _ in range(2)
+        ]
+        return loop_thread, answers
+
+    with Flask(__name__).app_context():
+        loop_thread, answers = asyncio.run(answer_twice())
+
+    assert answers == ["The Sonata is a sedan."] * 2
+    assert client.requests == 1
+    assert [call[0] for call in backend.calls] == ["get", "set", "get"]
+    assert all(thread is not loop_thread and in_app_context for _, thread, in_app_context in backend.calls)
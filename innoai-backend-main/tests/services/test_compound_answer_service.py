@@ -0,0 +1,120 @@
+# Other modules
+import asyncio
+
+import pytest
+
+# Local modules
+from app.services import compound_answer_service
+from app.services.compound_answer_service import CompoundAnswerService
+
+
+class FakeSplitService:
+    def split_questions(self, model, question, bypass_cache=False):
+        return ["engines?", "colors?", "price?"]
+
+
+class FakeIngestionService:
+    def embed_queries(self, queries):
+        return [[0.0] for _ in queries]
+
+    def search(self, query, collection_name, **options):
+        return {"results": [{"id": f"{query}-doc", "distance": 0.1, "document": query, "metadata": {}}]}
+
+    def count_tokens(self, text):
+        return len(text.split())
+
+
+class FakeAnswerService:
+    api_key = "test"
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def answer_async(self, client, model, question, chat_history, context, prompt_stats=None,
+                           bypass_cache=False):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.2)
+        self.in_flight -= 1
+        return f"answer to {question}"
+
+
+class FakeChatroomService:
+    def __init__(self):
+        self.updates = []
+
+    def update_chatroom_message(self, chatroom_id, user_message, chatbot_message):
+        self.updates.append((chatroom_id, user_message, chatbot_message))
+
+
+@pytest.fixture
+def service_parts(monkeypatch):
+    monkeypatch.setattr(compound_answer_service.openai, "AsyncOpenAI", lambda api_key=None: object())
+    return FakeAnswerService(), FakeChatroomService()
+
+
+def make_service(service_parts):
+    answer_service, chatroom_service = service_parts
+    return CompoundAnswerService(answer_service, FakeSplitService(), FakeIngestionService(), chatroom_service)
+
+
+def test_sub_questions_are_answered_concurrently_and_merged_in_order(monkeypatch, service_parts):
+    monkeypatch.setenv("COMPOUND_MAX_CONCURRENCY", "4")
+    service = make_service(service_parts)
+
+    result = service.answer("gpt-4o", "engines, colors and price?", "", "vehicle_collection", 100,
+                            lambda result: result["document"], "room-1")
+
+    assert service_parts[0].peak == 3
+    assert [part["question"] for part in result["sub_questions"]] == ["engines?", "colors?", "price?"]
+    assert result["sub_questions"][1]["sources"][0]["id"] == "colors?-doc"
+    assert result["answer"].startswith("### engines?\nanswer to engines?\n\n### colors?")
+    assert service_parts[1].updates == [("room-1", "engines, colors and price?", result["answer"])]
+
+
+def test_semaphore_bounds_completions_in_flight(monkeypatch, service_parts):
+    monkeypatch.setenv("COMPOUND_MAX_CONCURRENCY", "2")
+    service = make_service(service_parts)
+
+    result = service.answer("gpt-4o", "engines, colors and price?", "", "vehicle_collection", 100,
+                            lambda result: result["document"], "room-1")
+
+    assert service_parts[0].peak == 2
+    assert result["total_seconds"] >= 0.4
+
+
+class FailingIngestionService(FakeIngestionService):
+    def __init__(self, failing):
+        self.failing = failing
+
+    def search(self, query, collection_name, **options):
+        if query in self.failing:
+            return {"error": "collection unavailable"}
+        return super().search(query, collection_name, **options)
+
+
+def test_failed_sub_question_is_reported_while_the_others_are_answered(service_parts):
+    answer_service, chatroom_service = service_parts
+    service = CompoundAnswerService(answer_service, FakeSplitService(), FailingIngestionService({"colors?"}),
+                                    chatroom_service)
+
+    result = service.answer("gpt-4o", "engines, colors and price?", "", "vehicle_collection", 100,
+                            lambda result: result["document"], "room-1")
+
+    colors = result["sub_questions"][1]
+    assert colors["error"] == "Retrieval failed for 'colors?': collection unavailable"
+    assert "answer" not in colors and colors["sources"] == []
+    assert [part.get("answer") for part in result["sub_questions"]] == ["answer to engines?", None, "answer to price?"]
+    assert "colors?" not in result["answer"]
+
+
+def test_compound_answer_fails_when_every_sub_question_fails(service_parts):
+    answer_service, chatroom_service = service_parts
+    service = CompoundAnswerService(answer_service, FakeSplitService(),
+                                    FailingIngestionService({"engines?", "colors?", "price?"}), chatroom_service)
+
+    with pytest.raises(ValueError, match="collection unavailable"):
+        service.answer("gpt-4o", "engines, colors and price?", "", "vehicle_collection", 100,
+                       lambda result: result["document"], "room-1")
+    assert chatroom_service.updates == []
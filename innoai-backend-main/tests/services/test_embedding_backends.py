@@ -0,0 +1,28 @@
+# Other modules
+import numpy as np
+import pytest
+
+# Local modules
+from app.services.embedding_backends import load_embedding_model, measure_cosine_drift
+
+
+class FixedEncoder:
+    def __init__(self, vectors):
+        self.vectors = np.asarray(vectors, dtype=np.float32)
+
+    def encode(self, sentences, batch_size=32, normalize_embeddings=False):
+        return self.vectors / np.linalg.norm(self.vectors, axis=1, keepdims=True)
+
+
+def test_load_embedding_model_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        load_embedding_model("all-mpnet-base-v2", "tensorrt")
+
+
+def test_measure_cosine_drift_reports_worst_sentence():
+    reference = FixedEncoder([[1.0, 0.0], [0.0, 1.0]])
+    candidate = FixedEncoder([[1.0, 0.0], [1.0, 1.0]])
+    drift = measure_cosine_drift(reference, candidate, ["a", "b"])
+    assert drift["sentences"] == 2
+    assert drift["min_cosine"] == pytest.approx(np.sqrt(0.5))
+    assert drift["max_drift"] == pytest.approx(1 - np.sqrt(0.5))
@@ -0,0 +1,107 @@
+# Other modules
+import threading
+import time
+from datetime import datetime, timedelta
+
+import mongomock
+import pytest
+
+# Local modules
+from app.repositories import mongo_repository
+from app.repositories.mongo_repository import MongoRepository
+from app.services.ingestion_job_service import IngestionJobService
+
+
+class FakeIngestionService:
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+        self.release.set()
+
+    def process_token_text_splitter(self, text, collection_name):
+        self.calls.append(("token_text_split", text, collection_name))
+        self.release.wait(5)
+        return {"message": "Ingestion complete", "items": []}
+
+    def process_pdf(self, file_path, collection_name, progress_callback=None):
+        self.calls.append(("pdf", file_path, collection_name))
+        raise ValueError("Failed to process PDF")
+
+
+@pytest.fixture
+def mongo_repo(monkeypatch):
+    monkeypatch.setattr(mongo_repository, "MongoClient", mongomock.MongoClient)
+    return MongoRepository()
+
+
+@pytest.fixture
+def make_service(monkeypatch, mongo_repo):
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return IngestionJobService(FakeIngestionService(), mongo_repo)
+    return make
+
+
+def test_text_job_runs_in_the_background_and_records_its_result(make_service):
+    service = make_service()
+
+    job_id = service.submit("token_text_split", {"text": "Sonata engines", "collection_name": "vehicle_collection"})
+    service.executor.shutdown(wait=True)
+
+    job = service.get_job(job_id)
+    assert job["status"] == "done"
+    assert job["result"]["message"] == "Ingestion complete"
+    assert service.ingestion_service.calls == [("token_text_split", "Sonata engines", "vehicle_collection")]
+
+
+def test_failed_job_records_the_error(make_service):
+    service = make_service()
+
+    job_id = service.submit("pdf", {"file_path": "missing.pdf", "collection_name": "vehicle_collection"})
+    service.executor.shutdown(wait=True)
+
+    assert service.get_job(job_id)["status"] == "failed"
+    assert service.get_job(job_id)["error"] == "Failed to process PDF"
+
+
+def test_unknown_job_type_is_rejected_and_mongo_is_only_opened_on_use(monkeypatch):
+    monkeypatch.setattr(mongo_repository, "MongoClient", mongomock.MongoClient)
+    service = IngestionJobService(FakeIngestionService())
+    assert service._mongo_repo is None
+
+    with pytest.raises(ValueError):
+        service.submit("video", {})
+
+
+def test_heartbeat_keeps_a_silent_running_job_from_looking_orphaned(make_service, mongo_repo):
+    service = make_service(INGEST_JOB_HEARTBEAT_SECONDS="0.05")
+    service.ingestion_service.release.clear()
+
+    job_id = service.submit("token_text_split", {"text": "Sonata", "collection_name": "vehicle_collection"})
+    time.sleep(0.1)
+    claimed_at = service.get_job(job_id)["updatedDate"]
+    time.sleep(0.3)
+
+    assert service.get_job(job_id)["status"] == "running"
+    assert service.get_job(job_id)["updatedDate"] > claimed_at
+    assert mongo_repo.requeue_stale_ingestion_jobs(claimed_at) == 0
+    service.ingestion_service.release.set()
+    service.executor.shutdown(wait=True)
+    assert service.get_job(job_id)["status"] == "done"
+
+
+def test_resume_requeues_only_stale_running_jobs(make_service, mongo_repo):
+    stale_id = mongo_repo.create_ingestion_job("token_text_split", {"text": "a", "collection_name": "c"})
+    live_id = mongo_repo.create_ingestion_job("token_text_split", {"text": "b", "collection_name": "c"})
+    long_ago = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    mongo_repo.ingestion_job_collection.update_one({"job_id": stale_id},
+                                                   {"$set": {"status": "running", "updatedDate": long_ago}})
+    mongo_repo.update_ingestion_job(live_id, status="running")
+    service = make_service(INGEST_JOB_STALE_SECONDS="600")
+
+    assert service.start().result() == 1
+    service.executor.shutdown(wait=True)
+
+    assert service.get_job(stale_id)["status"] == "done"
+    assert service.get_job(live_id)["status"] == "running"
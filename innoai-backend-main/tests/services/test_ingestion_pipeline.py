@@ -0,0 +1,104 @@
+# Other modules
+import threading
+
+import numpy as np
+
+# Local modules
+from app.services.ingestion_pipeline import ChromaWriter, ProjectionStage
+from app.utils.pca import PCAProjection
+
+
+def test_stage_holds_batches_until_sample_is_complete():
+    rng = np.random.default_rng(0)
+    fitted = []
+    stage = ProjectionStage(dim=3, sample_size=10, on_fit=lambda projection: fitted.append(projection) or projection)
+
+    assert stage.push(rng.standard_normal((6, 8)), "first") == []
+    released = stage.push(rng.standard_normal((6, 8)), "second")
+    following = stage.push(rng.standard_normal((2, 8)), "third")
+
+    assert len(fitted) == 1 and fitted[0].sample_size == 10
+    assert [payload for _, payload in released] == ["first", "second"]
+    assert [embeddings.shape for embeddings, _ in released + following] == [(6, 3), (6, 3), (2, 3)]
+    assert stage.close() == []
+
+
+def test_stream_fits_on_short_ingestion_and_keeps_tuple_layout():
+    rng = np.random.default_rng(1)
+    batches = [(["doc"] * 4, rng.standard_normal((4, 8)), ["id"] * 4, [{}] * 4) for _ in range(2)]
+    stage = ProjectionStage(dim=2, sample_size=100)
+
+    projected = list(stage.project_stream(iter(batches), embedding_index=1))
+
+    assert stage.projection.sample_size == 8
+    assert [batch[1].shape for batch in projected] == [(4, 2), (4, 2)]
+    assert projected[0][0] == batches[0][0] and projected[1][2] == batches[1][2]
+
+
+def test_stage_keeps_full_size_embeddings_when_sample_is_smaller_than_dim():
+    rng = np.random.default_rng(3)
+    fitted = []
+    stage = ProjectionStage(dim=8, sample_size=4, on_fit=fitted.append)
+    first = rng.standard_normal((3, 16))
+    second = rng.standard_normal((2, 16))
+
+    assert stage.push(first, "first") == []
+    [(released, payload)] = stage.close()
+    [(following, _)] = stage.push(second, "second")
+
+    assert payload == "first" and np.array_equal(released, first)
+    assert np.array_equal(following, second)
+    assert fitted == [] and stage.projection is None
+    assert stage.close() == []
+
+
+def test_stage_with_existing_projection_passes_batches_through():
+    rng = np.random.default_rng(2)
+    projection = PCAProjection.fit(rng.standard_normal((20, 8)), 2)
+    stage = ProjectionStage(projection=projection)
+    embeddings = rng.standard_normal((5, 8))
+
+    [(projected, payload)] = stage.push(embeddings, "batch")
+
+    assert payload == "batch"
+    assert np.allclose(projected, projection.transform(embeddings))
+
+
+class GatedRepository:
+    def __init__(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def upsert_data(self, documents, embeddings, ids, metadata):
+        self.gate.wait(5)
+        if "bad" in ids:
+            raise ValueError("dimension mismatch")
+        self.batches.append(ids)
+
+
+def test_writer_applies_back_pressure_and_keeps_order():
+    repository = GatedRepository()
+    writer = ChromaWriter(repository, max_pending=1)
+    writer.submit(["a"], ["A"], [[0.0]], [{}])
+    writer.submit(["b"], ["B"], [[0.0]], [{}])
+
+    third = threading.Thread(target=writer.submit, args=(["c"], ["C"], [[0.0]], [{}]))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+
+    repository.gate.set()
+    third.join(5)
+    assert writer.close() == {}
+    assert repository.batches == [["a"], ["b"], ["c"]]
+
+
+def test_writer_reports_failed_batches_by_source():
+    repository = GatedRepository()
+    repository.gate.set()
+    writer = ChromaWriter(repository)
+    writer.submit(["ok"], ["A"], [[0.0]], [{}], sources={"good.pdf"})
+    writer.submit(["bad"], ["B"], [[0.0]], [{}], sources={"broken.pdf", "shared.pdf"})
+
+    assert writer.close() == {"broken.pdf": "dimension mismatch", "shared.pdf": "dimension mismatch"}
+    assert repository.batches == [["ok"]]
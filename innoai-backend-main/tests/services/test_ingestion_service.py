@@ -0,0 +1,272 @@
+# Other modules
+import os
+
+import pytest
+
+# Local modules
+from app.repositories.chroma_repository import ChromaRepository
+from app.services import ingestion_service, text_processing
+from app.services.ingestion_service import IngestionService
+from app.services.text_processing import TokenChunker
+from tests.services.fake_models import FakeEmbeddingModel, FakeTokenizer
+
+PAGES = {
+    1: "The Sonata comes with a hybrid engine and adaptive cruise control on every trim.",
+    2: "The Tucson offers a panoramic sunroof heated rear seats and wireless charging as options.",
+}
+
+
+@pytest.fixture
+def make_service(tmp_path, monkeypatch):
+    monkeypatch.setenv("USE_LOCAL_CHROMA_DB", "True")
+    monkeypatch.setenv("LOCAL_CHROMA_DB_PATH", str(tmp_path / "chroma"))
+    monkeypatch.setenv("INGEST_MANIFEST_PATH", str(tmp_path / "manifests"))
+    monkeypatch.setenv("LEXICAL_INDEX_PATH", str(tmp_path / "lexical"))
+    monkeypatch.setenv("SNAPSHOT_PATH", str(tmp_path / "snapshots"))
+    monkeypatch.setenv("EMBEDDING_CACHE_ENABLED", "False")
+    monkeypatch.setattr(ingestion_service, "load_embedding_model", lambda name, backend: FakeEmbeddingModel(backend))
+
+    def make(**env):
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        return IngestionService()
+
+    yield make
+    ChromaRepository.clear_pool()
+
+
+@pytest.fixture
+def pdf(tmp_path, monkeypatch):
+    """A file standing in for a PDF whose pages are read from the mutable `pages` dict."""
+    pages = dict(PAGES)
+    file_path = tmp_path / "vehicle_brochure.pdf"
+    file_path.write_bytes(b"%PDF-1.4 brochure v1")
+    monkeypatch.setattr(text_processing, "iter_pdf_pages", lambda path: sorted(pages.items()))
+    return str(file_path), pages
+
+
+def stored_embeddings(service, ids):
+    result = service.get_chroma_repo("vehicle_collection").collection.get(ids=ids, include=["embeddings"])
+    return dict(zip(result["ids"], (list(embedding) for embedding in result["embeddings"])))
+
+
+def test_unchanged_file_is_skipped_until_ingestion_settings_change(make_service, pdf):
+    file_path, _ = pdf
+    first = make_service().process_pdf(file_path, "vehicle_collection")
+    assert first["upserted"] == first["chunks"] > 0
+
+    assert make_service().process_pdf(file_path, "vehicle_collection")["skipped"]
+
+    service = make_service(EMBEDDING_BACKEND="onnx")
+    chunk_ids = service.manifest_repo.get_source("vehicle_collection", "vehicle_brochure.pdf")["chunk_ids"]
+    before = stored_embeddings(service, chunk_ids)
+    result = service.process_pdf(file_path, "vehicle_collection")
+
+    assert not result.get("skipped")
+    assert result["upserted"] == result["chunks"]
+    after = stored_embeddings(service, chunk_ids)
+    assert all(after[chunk_id] != before[chunk_id] for chunk_id in chunk_ids)
+    assert service.process_pdf(file_path, "vehicle_collection")["skipped"]
+
+
+def test_chunker_change_reingests_and_removes_old_chunks(make_service, pdf):
+    file_path, _ = pdf
+    make_service().process_pdf(file_path, "vehicle_collection")
+
+    service = make_service(CHUNK_MAX_TOKENS="12", CHUNK_OVERLAP_TOKENS="4")
+    result = service.process_pdf(file_path, "vehicle_collection")
+
+    assert not result.get("skipped")
+    chunk_ids = service.manifest_repo.get_source("vehicle_collection", "vehicle_brochure.pdf")["chunk_ids"]
+    assert service.get_chroma_repo("vehicle_collection").count() == len(chunk_ids)
+
+
+def test_moved_chunks_get_a_metadata_update_without_reembedding(make_service, pdf):
+    file_path, pages = pdf
+    service = make_service()
+    service.process_pdf(file_path, "vehicle_collection")
+    chunk_ids = service.manifest_repo.get_source("vehicle_collection", "vehicle_brochure.pdf")["chunk_ids"]
+    before = stored_embeddings(service, chunk_ids)
+
+    pages[1], pages[2] = PAGES[2], PAGES[1]
+    with open(file_path, "wb") as f:
+        f.write(b"%PDF-1.4 brochure v2")
+    result = service.process_pdf(file_path, "vehicle_collection")
+
+    assert result["upserted"] == 0 and result["deleted"] == 0
+    assert result["metadata_updated"] == len(chunk_ids)
+    assert stored_embeddings(service, chunk_ids) == before
+    stored = service.get_chroma_repo("vehicle_collection").get_records(chunk_ids)
+    assert {record["metadata"]["page"]: record["document"].split()[1] for record in stored.values()} == {
+        1: "Tucson", 2: "Sonata"
+    }
+
+
+def test_moved_chunks_are_updated_on_their_shard(make_service, pdf):
+    file_path, pages = pdf
+    service = make_service(CHROMA_SHARDS="3")
+    service.process_pdf(file_path, "vehicle_collection")
+
+    pages[1], pages[2] = PAGES[2], PAGES[1]
+    with open(file_path, "wb") as f:
+        f.write(b"%PDF-1.4 brochure v2")
+    result = service.process_pdf(file_path, "vehicle_collection")
+
+    assert result["upserted"] == 0 and result["metadata_updated"] == result["chunks"]
+    chunk_ids = service.manifest_repo.get_source("vehicle_collection", "vehicle_brochure.pdf")["chunk_ids"]
+    stored = service.get_chroma_repo("vehicle_collection").get_records(chunk_ids)
+    assert {record["metadata"]["page"]: record["document"].split()[1] for record in stored.values()} == {
+        1: "Tucson", 2: "Sonata"
+    }
+
+def test_search_pushes_metadata_and_document_filters_into_the_query(make_service, pdf):
+    file_path, _ = pdf
+    service = make_service()
+    service.process_pdf(file_path, "vehicle_collection")
+
+    by_page = service.search("hybrid engine", "vehicle_collection", top_k=5, mmr=False, mode="vector",
+                             where={"page": 2})
+    by_text = service.search("hybrid engine", "vehicle_collection", top_k=5, mmr=False, mode="vector",
+                             where_document={"$contains": "cruise control"})
+
+    assert [hit["metadata"]["page"] for hit in by_page["results"]] == [2]
+    assert [hit["metadata"]["page"] for hit in by_text["results"]] == [1]
+    assert service.search("hybrid engine", "vehicle_collection", top_k=5, mode="vector",
+                          where={"page": 3}) == {"error": "Search results are empty"}
+
+
+@pytest.fixture
+def pdf_directory(tmp_path, monkeypatch):
+    """Text files named *.pdf; parse workers are forked, so they inherit the patched parsing."""
+    directory = tmp_path / "pdfs"
+    directory.mkdir()
+    for index, model in enumerate(("Sonata", "Tucson", "Elantra")):
+        (directory / f"{model.lower()}.pdf").write_text(
+            f"The {model} comes with a hybrid engine and adaptive cruise control on every trim. "
+            f"Option package {index} adds a panoramic sunroof heated rear seats and wireless charging.",
+            encoding="utf-8"
+        )
+
+    def read_pages(path):
+        if os.path.basename(path) == "broken.pdf":
+            raise ValueError("cannot parse broken.pdf")
+        with open(path, "r", encoding="utf-8") as f:
+            return [(1, f.read())]
+
+    monkeypatch.setattr(text_processing, "iter_pdf_pages", read_pages)
+    monkeypatch.setattr(text_processing, "get_token_chunker",
+                        lambda name, max_tokens, overlap_tokens: TokenChunker(FakeTokenizer(), max_tokens, overlap_tokens))
+    monkeypatch.setenv("INGEST_PARSE_START_METHOD", "fork")
+    monkeypatch.setenv("INGEST_PARSE_WORKERS", "2")
+    monkeypatch.setenv("INGEST_BATCH_SIZE", "3")
+    monkeypatch.setenv("INGEST_WRITE_QUEUE_SIZE", "1")
+    monkeypatch.setenv("CHUNK_MAX_TOKENS", "16")
+    monkeypatch.setenv("CHUNK_OVERLAP_TOKENS", "4")
+    return directory
+
+
+def test_directory_pipeline_batches_across_files_and_is_incremental(make_service, pdf_directory):
+    service = make_service()
+    progress = []
+
+    first = service.process_all_pdfs_in_directory(str(pdf_directory), "vehicle_collection", progress.append)
+
+    chroma_repo = service.get_chroma_repo("vehicle_collection")
+    assert first["errors"] == []
+    assert [result["file"] for result in first["results"]] == ["elantra", "sonata", "tucson"]
+    assert first["chunks"] == chroma_repo.count() == sum(result["chunks"] for result in first["results"])
+    assert progress[-1]["files_parsed"] == 3 and progress[-1]["chunks_embedded"] == first["chunks"]
+
+    (pdf_directory / "tucson.pdf").write_text("The Tucson now ships with a plug-in hybrid engine and a digital key.",
+                                              encoding="utf-8")
+    second = service.process_all_pdfs_in_directory(str(pdf_directory), "vehicle_collection")
+
+    by_file = {result["file"]: result for result in second["results"]}
+    assert by_file["sonata"]["skipped"] and by_file["elantra"]["skipped"]
+    assert by_file["tucson"]["upserted"] == by_file["tucson"]["chunks"] < first["results"][2]["chunks"]
+    assert by_file["tucson"]["deleted"] > 0
+    assert chroma_repo.count() == sum(result["chunks"] for result in second["results"])
+
+
+def test_directory_pipeline_reports_unparseable_files_and_keeps_the_rest(make_service, pdf_directory):
+    (pdf_directory / "broken.pdf").write_text("unreadable", encoding="utf-8")
+    service = make_service()
+
+    result = service.process_all_pdfs_in_directory(str(pdf_directory), "vehicle_collection")
+
+    assert [error["file"] for error in result["errors"]] == [str(pdf_directory / "broken.pdf")]
+    assert "cannot parse broken.pdf" in result["errors"][0]["error"]
+    assert len(result["results"]) == 3
+    assert service.manifest_repo.get_source("vehicle_collection", "broken.pdf") is None
+
+
+def test_search_batch_runs_one_query_per_filter_and_keeps_input_order(make_service, pdf, monkeypatch):
+    file_path, _ = pdf
+    service = make_service()
+    service.process_pdf(file_path, "vehicle_collection")
+    filters = []
+    query_data_batch = ChromaRepository.query_data_batch
+
+    def recording_query(repository, query_embeddings, n_results=5, where=None, where_document=None, include=None):
+        filters.append((len(query_embeddings), n_results, where, where_document))
+        return query_data_batch(repository, query_embeddings, n_results, where, where_document, include)
+
+    monkeypatch.setattr(ChromaRepository, "query_data_batch", recording_query)
+
+    result = service.search_batch([
+        "hybrid engine",
+        {"query": "sunroof", "where": {"page": 2}},
+        {"query": "adaptive cruise", "n_results": 1},
+        {"query": "wireless charging", "where": {"page": 2}, "n_results": 1},
+        {"query": "Sonata", "where_document": {"$contains": "Sonata"}},
+    ], "vehicle_collection")
+
+    assert sorted(filters, key=repr) == sorted([
+        (2, 5, None, None),
+        (2, 5, {"page": 2}, None),
+        (1, 5, None, {"$contains": "Sonata"}),
+    ], key=repr)
+    results = result["results"]
+    assert [entry["query"] for entry in results] == [
+        "hybrid engine", "sunroof", "adaptive cruise", "wireless charging", "Sonata"
+    ]
+    assert len(results[0]["results"]) == 2 and len(results[2]["results"]) == 1
+    assert all(hit["metadata"]["page"] == 2 for entry in results[1::2][:2] for hit in entry["results"])
+    assert [hit["metadata"]["page"] for hit in results[4]["results"]] == [1]
+
+
+def test_search_batch_rejects_entries_without_a_query(make_service):
+    assert make_service().search_batch([{"where": {"page": 1}}], "vehicle_collection") == {
+        "error": "Every batch entry needs a query"
+    }
+
+
+def test_multi_collection_search_fans_out_over_the_shared_executor(make_service, pdf):
+    file_path, _ = pdf
+    service = make_service()
+    service.process_pdf(file_path, "sonata_collection")
+    service.process_pdf(file_path, "vehicle_collection")
+    names = ["sonata_collection", "vehicle_collection"]
+
+    fan_out = service.get_search_repo(names)
+    assert fan_out.executor is service.search_executor
+    assert fan_out is not service.get_search_repo(names)
+
+    combined = service.search("hybrid engine", names, top_k=4, mmr=False, mode="vector")
+    assert len(combined["results"]) == 4
+    assert service.search("hybrid engine", names, top_k=2, mode="hybrid") == {
+        "error": "Hybrid search supports a single collection"
+    }
+    assert len(service.search("hybrid engine", ["sonata_collection"] * 2, top_k=2, mode="hybrid")["results"]) == 2
+
+
+def test_warm_up_skips_missing_collections_without_creating_them(make_service, pdf):
+    file_path, _ = pdf
+    service = make_service()
+    service.process_pdf(file_path, "vehicle_collection")
+
+    timings = service.warm_up(["vehicle_collection", "vehicle_colection"])
+
+    assert timings["vehicle_colection"] is None and timings["vehicle_collection"] >= 0
+    client = service.get_chroma_repo("vehicle_collection").client
+    assert [collection.name for collection in client.list_collections()] == ["vehicle_collection"]
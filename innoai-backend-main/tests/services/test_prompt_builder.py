@@ -0,0 +1,118 @@
+# Other modules
+import json
+
+import pytest
+
+# Local modules
+from app.services.prompt_builder import (
+    MESSAGE_OVERHEAD_TOKENS, TRUNCATION_MARKER, PromptBuilder, TokenCounter, parse_budget_split
+)
+
+
+class WordCounter:
+    def count(self, model, text):
+        return len(text.split())
+
+    def truncate(self, model, text, max_tokens):
+        return " ".join(text.split()[:max_tokens])
+
+
+TEMPLATE = "Answer from context.\n<context>\n{context}\n</context>\nQuestion: {question}"
+
+
+def make_builder(monkeypatch, max_tokens, split="system=0.1,context=0.4,history=0.4,question=0.1"):
+    monkeypatch.setenv("PROMPT_MAX_TOKENS", str(max_tokens))
+    monkeypatch.setenv("PROMPT_BUDGET_SPLIT", split)
+    return PromptBuilder("You are an expert researcher.", TEMPLATE, token_counter=WordCounter())
+
+
+def history(turns, words_per_turn=10):
+    return json.dumps([
+        {"role": "user" if i % 2 == 0 else "assistant", "content": " ".join([f"turn{i}"] * words_per_turn)}
+        for i in range(turns)
+    ])
+
+
+def test_history_is_sent_once_as_messages(monkeypatch):
+    builder = make_builder(monkeypatch, 1000)
+
+    messages, stats = builder.build("gpt-4o", "what engines?", history(2), "Sonata engines")
+
+    assert [message["role"] for message in messages] == ["system", "user", "assistant", "user"]
+    assert "turn0" not in messages[-1]["content"]
+    assert "Sonata engines" in messages[-1]["content"] and "what engines?" in messages[-1]["content"]
+    assert stats["dropped_turns"] == 0 and stats["history_turns"] == 2
+    # The old prompt also pasted the raw history JSON into the template.
+    assert stats["tokens_saved"] == builder.get_stats()["tokens_saved"] > 0
+
+
+def test_oldest_turns_are_dropped_and_the_oldest_kept_turn_truncated(monkeypatch):
+    builder = make_builder(monkeypatch, 90)
+
+    messages, stats = builder.build("gpt-4o", "what engines?", history(6), "Sonata engines")
+
+    history_messages = messages[1:-1]
+    assert [message["content"].split()[0] for message in history_messages] == ["turn1", "turn2", "turn3", "turn4", "turn5"]
+    assert len(history_messages[0]["content"].split()) == 7
+    assert stats["dropped_turns"] == 1 and stats["truncated"] == ["history"]
+    assert stats["prompt_tokens"] <= 90
+
+
+def test_context_and_question_are_cut_to_their_share(monkeypatch):
+    builder = make_builder(monkeypatch, 100)
+
+    messages, stats = builder.build("gpt-4o", "word " * 30, "", "chunk " * 80)
+
+    assert stats["context"] == 40 and stats["question"] == 10
+    assert stats["truncated"] == ["question", "context"]
+    assert stats["history"] == 0 and len(messages) == 2
+
+
+def test_budget_split_is_normalised_and_validated():
+    shares = parse_budget_split("system=1,context=2,history=1,question=0")
+    assert shares["context"] == pytest.approx(0.5)
+    with pytest.raises(ValueError):
+        parse_budget_split("system=1,context=2")
+    with pytest.raises(ValueError):
+        parse_budget_split("system=1,context=1,history=1,question=1,tools=1")
+
+
+def test_message_overhead_is_counted(monkeypatch):
+    builder = make_builder(monkeypatch, 1000)
+
+    _, stats = builder.build("gpt-4o", "q", history(1, words_per_turn=3), "c")
+
+    assert stats["history"] == 3 + MESSAGE_OVERHEAD_TOKENS
+
+
+def test_history_is_held_to_its_share_plus_what_other_sections_leave(monkeypatch):
+    builder = make_builder(monkeypatch, 1000, split="system=0.1,context=0.4,history=0.1,question=0.4")
+
+    _, stats = builder.build("gpt-4o", "word " * 400, history(40), "chunk " * 400)
+
+    # System uses 19 of its 100 tokens, so history may use its 100 plus the 81 left over.
+    assert stats["history_budget"] == 181
+    assert stats["history"] <= 181 < stats["history"] + 10 + MESSAGE_OVERHEAD_TOKENS
+    assert stats["prompt_tokens"] <= 1000
+
+
+class CharEncoding:
+    """One token per character, so the two-character marker costs two tokens."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.mark.parametrize("encoding", [CharEncoding(), None])
+def test_truncate_leaves_room_for_the_marker(encoding):
+    counter = TokenCounter()
+    counter._encodings["gpt-4o"] = encoding
+    text = "Sonata hybrid engine and adaptive cruise control " * 20
+
+    for max_tokens in (1, 2, 3, 10, 57):
+        truncated = counter.truncate("gpt-4o", text, max_tokens)
+        assert counter.count("gpt-4o", truncated) <= max_tokens
+        assert truncated == "" or truncated.endswith(TRUNCATION_MARKER)
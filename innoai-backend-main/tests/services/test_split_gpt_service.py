@@ -0,0 +1,31 @@
+# Other modules
+from types import SimpleNamespace
+
+from cachelib import SimpleCache
+
+# Local modules
+from app.services import split_gpt_service
+from app.services.split_gpt_service import SplitGPTService
+
+
+def make_fake_chat(calls, content):
+    def create(**request):
+        calls.append(request)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+    return SimpleNamespace(completions=SimpleNamespace(create=create))
+
+
+def test_repeated_split_is_served_from_the_completion_cache(monkeypatch):
+    calls = []
+    monkeypatch.setattr(split_gpt_service.openai, "chat",
+                        make_fake_chat(calls, "Split question 1: Engines?\nSplit question 2: Colors?"), raising=False)
+    service = SplitGPTService()
+    service.completion_cache.backend = SimpleCache()
+
+    first = service.split_questions("gpt-4o", "Engines and colors?")
+    second = service.split_questions("gpt-4o", "Engines and colors?")
+    service.split_questions("gpt-4o", "Engines and colors?", bypass_cache=True)
+
+    assert first == second == ["Engines?", "Colors?"]
+    assert len(calls) == 2
+    assert service.completion_cache.get_stats()["hits"] == 1
@@ -0,0 +1,60 @@
+# Other modules
+import pytest
+
+# Local modules
+from app.services.text_processing import TokenChunker, clean_text, is_meaningful
+from tests.services.fake_models import FakeTokenizer
+
+LETTERS = "a b c d e f g h i j"
+
+
+def test_clean_text_strips_symbols_and_page_numbers():
+    assert clean_text("Sonata — price list!\n\n 12 ") == "Sonata price list"
+
+
+def test_clean_text_collapses_whitespace():
+    assert clean_text("  exterior\tcolor \n options  ") == "exterior color options"
+
+
+def test_is_meaningful_requires_more_than_five_words():
+    assert not is_meaningful("one two three four five")
+    assert is_meaningful("one two three four five six")
+
+
+def test_chunker_returns_nothing_for_empty_text():
+    assert TokenChunker(FakeTokenizer(), max_tokens=4).split("") == []
+
+
+def test_chunker_keeps_short_text_in_one_window():
+    assert TokenChunker(FakeTokenizer(), max_tokens=8, overlap_tokens=2).split("Sonata hybrid engine") == [
+        "Sonata hybrid engine"
+    ]
+
+
+def test_consecutive_windows_share_the_overlap():
+    chunks = TokenChunker(FakeTokenizer(), max_tokens=4, overlap_tokens=2).split(LETTERS)
+
+    assert chunks == ["a b c d", "c d e f", "e f g h", "g h i j"]
+
+
+def test_last_window_is_pulled_back_to_full_size():
+    chunks = TokenChunker(FakeTokenizer(), max_tokens=4).split(LETTERS)
+
+    assert chunks == ["a b c d", "e f g h", "g h i j"]
+
+
+def test_windows_snap_to_word_boundaries():
+    text = "one two three four five six seven eight nine ten"
+
+    chunks = TokenChunker(FakeTokenizer(piece=4), max_tokens=4, overlap_tokens=1).split(text)
+
+    assert chunks == ["one two three", "four five six", "six seven", "eight nine ten"]
+    for chunk in chunks:
+        assert f" {chunk} " in f" {text} "
+    for previous, following in zip(chunks, chunks[1:]):
+        assert previous not in following
+
+
+def test_chunker_rejects_overlap_not_below_window():
+    with pytest.raises(ValueError):
+        TokenChunker(FakeTokenizer(), max_tokens=4, overlap_tokens=4)
@@ -0,0 +1,107 @@
+# Other modules
+import threading
+
+# Local modules
+from app.services import warmup_service
+from app.services.warmup_service import WarmupService
+
+
+class RecordingService:
+    def __init__(self, release=None, error=None, failures=None):
+        self.calls = []
+        self.release = release
+        self.error = error
+        self.failures = failures
+
+    def warm_up(self, collection_names):
+        if self.release is not None:
+            self.release.wait(5)
+        if self.error is not None and (self.failures is None or self.failures > 0):
+            if self.failures is not None:
+                self.failures -= 1
+            raise self.error
+        self.calls.append(list(collection_names))
+        return {name: 0.0 for name in collection_names}
+
+
+def test_warm_up_runs_once_per_service_instance(monkeypatch):
+    monkeypatch.setenv("WARMUP_BACKGROUND", "False")
+    monkeypatch.setenv("WARMUP_COLLECTIONS", "vehicle_collection, price_collection")
+    service = RecordingService()
+    warmup = WarmupService()
+
+    warmup.start([service, service])
+    warmup.start([service])
+
+    assert service.calls == [["vehicle_collection", "price_collection"]]
+    status = warmup.get_status()
+    assert status["ready"] and status["state"] == "ready"
+    assert status["timings"] == [{"vehicle_collection": 0.0, "price_collection": 0.0}]
+
+
+def test_not_ready_until_background_warm_up_finishes(monkeypatch):
+    monkeypatch.setenv("WARMUP_BACKGROUND", "True")
+    release = threading.Event()
+    warmup = WarmupService()
+
+    warmup.start([RecordingService(release=release)])
+    assert not warmup.is_ready() and warmup.get_status()["state"] == "running"
+
+    release.set()
+    for _ in range(100):
+        if warmup.is_ready():
+            break
+        threading.Event().wait(0.01)
+    assert warmup.is_ready()
+
+
+def test_failed_warm_up_is_retried_with_backoff(monkeypatch):
+    monkeypatch.setenv("WARMUP_BACKGROUND", "False")
+    monkeypatch.setenv("WARMUP_BACKOFF_SECONDS", "0.01")
+    delays = []
+    monkeypatch.setattr(warmup_service.time, "sleep", delays.append)
+    warmed = RecordingService()
+    flaky = RecordingService(error=RuntimeError("chroma unavailable"), failures=2)
+    warmup = WarmupService()
+
+    warmup.start([warmed, flaky])
+
+    status = warmup.get_status()
+    assert status["state"] == "ready" and status["attempts"] == 3 and "error" not in status
+    assert delays == [0.01, 0.02]
+    assert len(warmed.calls) == 1 and len(flaky.calls) == 1
+
+
+def test_warm_up_is_degraded_and_not_ready_after_bounded_attempts(monkeypatch):
+    monkeypatch.setenv("WARMUP_BACKGROUND", "False")
+    monkeypatch.setenv("WARMUP_ATTEMPTS", "3")
+    monkeypatch.setattr(warmup_service.time, "sleep", lambda seconds: None)
+    warmup = WarmupService()
+
+    warmup.start([RecordingService(error=RuntimeError("chroma unavailable"))])
+
+    status = warmup.get_status()
+    assert not status["ready"] and not warmup.is_ready()
+    assert status["state"] == "degraded" and status["attempts"] == 3
+    assert status["error"] == "chroma unavailable"
+
+
+def test_degraded_warm_up_serves_cold_when_configured(monkeypatch):
+    monkeypatch.setenv("WARMUP_BACKGROUND", "False")
+    monkeypatch.setenv("WARMUP_ATTEMPTS", "1")
+    monkeypatch.setenv("WARMUP_READY_WHEN_DEGRADED", "True")
+    warmup = WarmupService()
+
+    warmup.start([RecordingService(error=RuntimeError("chroma unavailable"))])
+
+    assert warmup.get_status()["ready"] and warmup.get_status()["state"] == "degraded"
+
+
+def test_disabled_warm_up_is_ready_immediately(monkeypatch):
+    monkeypatch.setenv("WARMUP_ENABLED", "False")
+    service = RecordingService()
+    warmup = WarmupService()
+
+    warmup.start([service])
+
+    assert warmup.is_ready() and service.calls == []
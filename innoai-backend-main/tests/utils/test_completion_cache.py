@@ -0,0 +1,56 @@
+# Other modules
+from cachelib import SimpleCache
+
+# Local modules
+from app.utils.completion_cache import CompletionCache, completion_key
+
+MESSAGES = [{"role": "system", "content": "You are an expert researcher."}, {"role": "user", "content": "Engines?"}]
+
+
+class BrokenBackend:
+    def get(self, key):
+        raise ConnectionError("redis is down")
+
+    def set(self, key, value, timeout=None):
+        raise ConnectionError("redis is down")
+
+
+def test_key_is_canonical_and_covers_every_request_field():
+    reordered = [{"content": message["content"], "role": message["role"]} for message in MESSAGES]
+
+    assert completion_key("gpt-4o", MESSAGES, 0.1, 3000) == completion_key("gpt-4o", reordered, 0.1, 3000)
+    assert completion_key("gpt-4o", MESSAGES, 0.1, 3000) != completion_key("gpt-4o", MESSAGES, 0.2, 3000)
+    assert completion_key("gpt-4o", MESSAGES, 0.1, 3000) != completion_key("gpt-4o-mini", MESSAGES, 0.1, 3000)
+
+
+def test_hits_misses_and_bypass_are_counted():
+    completion_cache = CompletionCache("answer", ttl=60, backend=SimpleCache())
+    key = completion_cache.key("gpt-4o", MESSAGES, 0.1, 3000)
+
+    assert completion_cache.get(key) is None
+    completion_cache.set(key, "Two engines.", 1.5)
+    assert completion_cache.get(key) == "Two engines."
+    assert completion_cache.get(key, bypass=True) is None
+
+    stats = completion_cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    assert stats["saved_seconds"] == 1.5
+
+
+def test_namespaces_do_not_share_entries():
+    backend = SimpleCache()
+    answer_cache = CompletionCache("answer", ttl=60, backend=backend)
+    split_cache = CompletionCache("split", ttl=60, backend=backend)
+    answer_cache.set(answer_cache.key("gpt-4o", MESSAGES, 0.1, 3000), "Two engines.", 1.0)
+
+    assert split_cache.get(split_cache.key("gpt-4o", MESSAGES, 0.1, 3000)) is None
+
+
+def test_backend_errors_count_as_misses_and_zero_ttl_disables():
+    completion_cache = CompletionCache("answer", ttl=60, backend=BrokenBackend())
+    completion_cache.set("key", "Two engines.", 1.0)
+
+    assert completion_cache.get("key") is None
+    assert completion_cache.get_stats()["errors"] == 2
+    assert not CompletionCache("split", ttl=0, backend=SimpleCache()).enabled
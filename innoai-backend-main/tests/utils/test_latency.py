@@ -0,0 +1,29 @@
+# Other modules
+import pytest
+
+# Local modules
+from app.utils.latency import LatencyTracker
+
+
+def test_percentiles_cover_the_window_and_count_everything():
+    tracker = LatencyTracker(window=100)
+    for millis in range(1, 201):
+        tracker.record("stream_ttft", millis / 1000)
+
+    stats = tracker.get_stats()["stream_ttft"]
+
+    assert stats["count"] == 200
+    assert stats["p50_ms"] == pytest.approx(150.5)
+    assert stats["max_ms"] == pytest.approx(200.0)
+    assert stats["p95_ms"] <= stats["p99_ms"] <= stats["max_ms"]
+
+
+def test_metrics_are_tracked_separately():
+    tracker = LatencyTracker()
+    tracker.record("stream_total", 0.5)
+    tracker.record("blocking_total", 2.0)
+
+    stats = tracker.get_stats()
+
+    assert stats["stream_total"]["p50_ms"] == pytest.approx(500.0)
+    assert stats["blocking_total"]["p50_ms"] == pytest.approx(2000.0)
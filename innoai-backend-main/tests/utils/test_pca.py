@@ -0,0 +1,48 @@
+# Other modules
+import numpy as np
+import pytest
+
+# Local modules
+from app.utils.pca import PCAProjection
+
+
+@pytest.fixture
+def low_rank_embeddings():
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal((300, 4)) @ rng.standard_normal((4, 32)) + 3.0).astype(np.float32)
+
+
+def test_projection_preserves_distances_of_low_rank_data(low_rank_embeddings):
+    projection = PCAProjection.fit(low_rank_embeddings, 4)
+    projected = projection.transform(low_rank_embeddings)
+
+    assert projected.shape == (300, 4) and projected.dtype == np.float32
+    assert projection.explained_variance_ratio.sum() == pytest.approx(1.0, abs=1e-4)
+    original = np.linalg.norm(low_rank_embeddings[0] - low_rank_embeddings[1:], axis=1)
+    reduced = np.linalg.norm(projected[0] - projected[1:], axis=1)
+    assert np.allclose(original, reduced, rtol=1e-3, atol=1e-3)
+    assert np.allclose(projection.transform(low_rank_embeddings[5]), projected[5], atol=1e-5)
+
+
+def test_small_sample_still_yields_orthonormal_components(low_rank_embeddings):
+    projection = PCAProjection.fit(low_rank_embeddings[:3], 8)
+
+    assert projection.components.shape == (8, 32)
+    assert np.allclose(projection.components @ projection.components.T, np.eye(8), atol=1e-4)
+
+
+def test_save_and_load_round_trip(tmp_path, low_rank_embeddings):
+    projection = PCAProjection.fit(low_rank_embeddings, 2)
+    path = tmp_path / "vehicle_collection.pca.npz"
+    with open(path, "wb") as f:
+        projection.save(f)
+
+    loaded = PCAProjection.load(str(path))
+
+    assert loaded.dim == 2 and loaded.source_dim == 32 and loaded.sample_size == 300
+    assert np.array_equal(loaded.transform(low_rank_embeddings), projection.transform(low_rank_embeddings))
+
+
+def test_fit_rejects_dimension_above_source(low_rank_embeddings):
+    with pytest.raises(ValueError):
+        PCAProjection.fit(low_rank_embeddings, 64)
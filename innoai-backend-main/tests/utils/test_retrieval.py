@@ -0,0 +1,36 @@
+# Other modules
+import numpy as np
+
+# Local modules
+from app.utils.retrieval import assemble_context, mmr_select, reciprocal_rank_fusion
+
+
+def test_mmr_select_with_lambda_one_ranks_by_relevance():
+    embeddings = [[1.0, 0.0], [0.9, 0.1], [0.0, 1.0]]
+    assert mmr_select([1.0, 0.0], embeddings, 3, lambda_mult=1.0) == [0, 1, 2]
+
+
+def test_mmr_select_skips_near_duplicates():
+    embeddings = [[1.0, 0.0], [0.99, 0.01], [0.6, 0.8]]
+    assert mmr_select([1.0, 0.0], embeddings, 2, lambda_mult=0.3) == [0, 2]
+
+
+def test_mmr_select_caps_k_at_candidate_count():
+    assert sorted(mmr_select(np.ones(4), np.eye(4)[:2], 5)) == [0, 1]
+    assert mmr_select(np.ones(4), np.empty((0, 4)), 3) == []
+
+
+def test_assemble_context_skips_results_over_budget():
+    results = [{"document": "one two three"}, {"document": " ".join(["word"] * 10)}, {"document": "four five"}]
+    context, used, tokens = assemble_context(
+        results, lambda text: len(text.split()), 6, lambda result: result["document"], separator="\n"
+    )
+    assert context == "one two three\nfour five"
+    assert used == [results[0], results[2]]
+    assert tokens == 5
+
+
+def test_reciprocal_rank_fusion_rewards_ids_in_both_lists():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+    assert fused[0][0] == "c"
+    assert {item for item, _ in fused} == {"a", "b", "c", "d"}
@@ -0,0 +1,63 @@
+# Other modules
+import time
+
+# Local modules
+from app.utils.semantic_cache import SemanticCache
+
+
+def test_hit_above_threshold_and_miss_below():
+    cache = SemanticCache(capacity=10, threshold=0.9)
+    cache.set("ns", [1.0, 0.0], "answer", latency=2.0)
+
+    value, similarity = cache.get("ns", [0.99, 0.05])
+    assert value == "answer"
+    assert similarity > 0.99
+    assert cache.get("ns", [1.0, 0.0])[0] == "answer"
+    assert cache.get("ns", [0.5, 0.5]) is None
+    assert cache.get("other", [1.0, 0.0]) is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["saved_seconds"] == 4.0
+
+
+def test_version_change_invalidates_namespace():
+    cache = SemanticCache(capacity=10, threshold=0.9)
+    cache.set("ns", [1.0, 0.0], "old", version="v1")
+
+    assert cache.get("ns", [1.0, 0.0], version="v2") is None
+    assert cache.get("ns", [1.0, 0.0], version="v1") is None
+    assert len(cache) == 0
+
+
+def test_entries_expire_after_ttl():
+    cache = SemanticCache(capacity=10, threshold=0.9, ttl=0.01)
+    cache.set("ns", [1.0, 0.0], "answer")
+    time.sleep(0.02)
+    assert cache.get("ns", [1.0, 0.0]) is None
+
+
+def test_capacity_drops_oldest_entry():
+    cache = SemanticCache(capacity=2, threshold=0.99)
+    cache.set("ns", [1.0, 0.0, 0.0], "first")
+    cache.set("ns", [0.0, 1.0, 0.0], "second")
+    cache.set("ns", [0.0, 0.0, 1.0], "third")
+
+    assert cache.get("ns", [1.0, 0.0, 0.0]) is None
+    assert cache.get("ns", [0.0, 1.0, 0.0])[0] == "second"
+    assert len(cache) == 2
+
+
+def test_least_recently_used_namespace_is_evicted():
+    cache = SemanticCache(capacity=4, threshold=0.9, max_namespaces=2)
+    cache.set("sonata", [1.0, 0.0], "a")
+    cache.set("tucson", [1.0, 0.0], "b")
+    assert cache.get("sonata", [1.0, 0.0]) == ("a", 1.0)
+
+    cache.set("elantra", [1.0, 0.0], "c")
+
+    assert cache.get("tucson", [1.0, 0.0]) is None
+    assert cache.get("sonata", [1.0, 0.0]) == ("a", 1.0)
+    assert cache.get_stats()["namespaces"] == 2
+    assert cache.get_stats()["evicted_namespaces"] == 1